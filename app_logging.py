@@ -0,0 +1,111 @@
+"""Leveled, non-blocking logging for both front ends.
+
+Modules log through get_logger(name), children of the "mic_mute" logger.
+setup_logging() gives that logger a single QueueHandler, so a log call on a
+hot path (hotkey, poll, audio worker) only builds a record and appends it to
+a queue; a QueueListener thread formats and writes it to a rotating file in
+~/.mic_mute_app/ and, when there is a console, to stderr. Records below the
+current level are dropped by Logger.isEnabledFor() before any formatting,
+so disabled debug calls with %-style arguments cost well under a
+microsecond. set_level() changes the level at runtime (tray menu, config).
+
+Until setup_logging() runs (benchmarks, scripts importing the modules)
+nothing is configured and Python's last-resort handler prints warnings and
+errors only.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOGGER_NAME = "mic_mute"
+LOG_FILE_NAME = "mic_mute_app.log"
+LEVEL_NAMES = ("DEBUG", "INFO", "WARNING", "ERROR")
+DEFAULT_LEVEL = "INFO"
+
+_listener = None
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() formats the full line and copies the record on the
+    calling thread; merging the arguments into the message is all that must
+    happen there, so later changes to a mutable argument cannot alter it.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def get_logger(name):
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def setup_logging(directory, level=DEFAULT_LEVEL, console=True, max_bytes=1024 * 1024, backup_count=3):
+    """Route all app loggers through a queue to a rotating file (and stderr if there is one).
+
+    Returns the log file path, or None if only the console could be set up.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener.log_path
+    formatter = logging.Formatter("%(asctime)s.%(msecs)03d [%(levelname)s] %(name)s: %(message)s",
+                                  datefmt="%Y-%m-%d %H:%M:%S")
+    handlers = []
+    log_path = os.path.join(directory, LOG_FILE_NAME)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    except OSError as e:
+        log_path = None
+        if sys.stderr is not None:
+            sys.stderr.write(f"Cannot write log file in {directory}: {str(e)}\n")
+    # Windowed PyInstaller builds have no stderr
+    if console and sys.stderr is not None:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        handlers.append(console_handler)
+
+    # Process and multiprocessing names are never logged; skip looking them up for every record
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    records = queue.SimpleQueue()
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers[:] = [_QueueHandler(records)]
+    logger.propagate = False
+    set_level(level)
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=False)
+    _listener.log_path = log_path
+    _listener.start()
+    return log_path
+
+
+def set_level(level):
+    """Set the app-wide level by name (see LEVEL_NAMES); unknown names fall back to INFO."""
+    level = str(level).upper()
+    if level not in LEVEL_NAMES:
+        level = DEFAULT_LEVEL
+    logging.getLogger(LOGGER_NAME).setLevel(level)
+    return level
+
+
+def current_level():
+    return logging.getLevelName(logging.getLogger(LOGGER_NAME).getEffectiveLevel())
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
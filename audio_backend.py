@@ -0,0 +1,555 @@
+"""Audio endpoint backends for the microphone mute controller.
+
+AudioEndpointBackend is the only place the apps talk to the audio stack: it
+binds the capture endpoint, reads and writes the mute state, pushes mute
+changes and enumerates capture devices. The *_device methods address every
+capture endpoint by id for DeviceManager; open_devices() binds them all once
+and the interfaces stay cached until close_devices(). watch_devices() reports
+endpoint hot-plug and default-device changes (IMMNotificationClient on
+Windows) so callers rebind only when the endpoint really changed. PycawAudioBackend is the Windows
+implementation; FakeAudioBackend is deterministic, runs fully in process and
+can inject latency and failures so hot paths can be measured off Windows.
+"""
+import collections
+import random
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("audio_backend")
+
+
+class AudioBackendError(Exception):
+    """Raised when the audio endpoint cannot be reached."""
+
+
+class NoAudioDeviceError(AudioBackendError):
+    """Raised by activate() when there is no capture endpoint to bind."""
+
+
+class AudioDevice:
+    """A capture endpoint as reported by a backend."""
+    __slots__ = ("id", "name")
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+    def __repr__(self):
+        return f"AudioDevice({self.id!r}, {self.name!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, AudioDevice) and (self.id, self.name) == (other.id, other.name)
+
+    def __hash__(self):
+        return hash((self.id, self.name))
+
+
+# Events passed to watch_devices() callbacks
+DEVICE_DEFAULT_CHANGED = "default-changed"
+DEVICE_ADDED = "added"
+DEVICE_REMOVED = "removed"
+DEVICE_STATE_CHANGED = "state-changed"
+
+
+class AudioEndpointBackend:
+    """Interface every audio backend implements.
+
+    bound_device_id is the id of the endpoint activate() bound, or None.
+    """
+    bound_device_id = None
+
+    def initialize_thread(self):
+        """Prepare the calling thread for backend calls (e.g. enter a COM apartment)."""
+
+    def uninitialize_thread(self):
+        """Undo initialize_thread on the calling thread."""
+
+    def activate(self):
+        """Bind the default capture endpoint. Raises NoAudioDeviceError if there is none."""
+        raise NotImplementedError
+
+    def release(self):
+        """Drop the bound endpoint and any subscription on it."""
+        raise NotImplementedError
+
+    def is_active(self):
+        raise NotImplementedError
+
+    def get_mute(self):
+        raise NotImplementedError
+
+    def set_mute(self, muted):
+        raise NotImplementedError
+
+    def subscribe(self, callback):
+        """Register callback(is_muted) for mute changes. Returns True if push notifications are active."""
+        return False
+
+    def unsubscribe(self):
+        pass
+
+    def list_devices(self):
+        """Return the active capture endpoints as AudioDevice instances."""
+        return []
+
+    def default_device_id(self):
+        """Id of the current default capture endpoint (None if there is none), without binding it."""
+        raise NotImplementedError
+
+    def watch_devices(self, callback):
+        """Register callback(event, device_id) for endpoint changes (DEVICE_* events).
+
+        Returns True if notifications are active. Callbacks arrive on a foreign thread.
+        """
+        return False
+
+    def unwatch_devices(self):
+        pass
+
+    def open_devices(self):
+        """Bind every active capture endpoint and return them as AudioDevice instances."""
+        raise NotImplementedError
+
+    def close_devices(self):
+        """Drop the endpoints bound by open_devices() and their subscriptions."""
+
+    def get_device_mute(self, device_id):
+        raise NotImplementedError
+
+    def set_device_mute(self, device_id, muted):
+        raise NotImplementedError
+
+    def subscribe_device(self, device_id, callback):
+        """Register callback(is_muted) for one bound device. Returns True if push notifications are active."""
+        return False
+
+
+class PycawAudioBackend(AudioEndpointBackend):
+    """Windows Core Audio backend built on pycaw/comtypes."""
+
+    def __init__(self):
+        self.volume = None
+        self._callback_object = None
+        self.device_volumes = {}  # device id -> IAudioEndpointVolume, filled by open_devices()
+        self._device_callbacks = {}
+        self.bound_device_id = None
+        self._enumerator = None
+        self._notification_client = None
+
+    def initialize_thread(self):
+        import pythoncom
+        pythoncom.CoInitialize()
+
+    def uninitialize_thread(self):
+        import pythoncom
+        pythoncom.CoUninitialize()
+
+    def activate(self):
+        from ctypes import cast, POINTER
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+        self.release()
+        device = AudioUtilities.GetMicrophone()
+        if not device:
+            raise NoAudioDeviceError("No microphone device found")
+        interface = device.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        self.volume = cast(interface, POINTER(IAudioEndpointVolume))
+        self.bound_device_id = device.GetId()
+
+    def release(self):
+        self.unsubscribe()
+        self.volume = None
+        self.bound_device_id = None
+
+    def _device_enumerator(self):
+        if self._enumerator is None:
+            from pycaw.pycaw import AudioUtilities
+            self._enumerator = AudioUtilities.GetDeviceEnumerator()
+        return self._enumerator
+
+    def default_device_id(self):
+        from _ctypes import COMError
+        from pycaw.constants import EDataFlow, ERole
+
+        try:
+            device = self._device_enumerator().GetDefaultAudioEndpoint(EDataFlow.eCapture.value, ERole.eMultimedia.value)
+        except COMError:
+            return None  # E_NOTFOUND: no capture endpoint at all
+        return device.GetId()
+
+    def watch_devices(self, callback):
+        from pycaw.constants import EDataFlow, ERole
+
+        try:
+            from pycaw.callbacks import MMNotificationClient
+        except ImportError:
+            log.warning("This pycaw version has no MMNotificationClient; device changes are only detected by auto-refresh")
+            return False
+
+        class DeviceNotificationClient(MMNotificationClient):
+            # Called on a COM worker thread; only forward the event
+            def on_default_device_changed(self, flow, flow_id, role, role_id, default_device_id):
+                if flow_id == EDataFlow.eCapture.value and role_id == ERole.eMultimedia.value:
+                    callback(DEVICE_DEFAULT_CHANGED, default_device_id)
+
+            def on_device_added(self, added_device_id):
+                callback(DEVICE_ADDED, added_device_id)
+
+            def on_device_removed(self, removed_device_id):
+                callback(DEVICE_REMOVED, removed_device_id)
+
+            def on_device_state_changed(self, device_id, new_state, new_state_id):
+                callback(DEVICE_STATE_CHANGED, device_id)
+
+        self.unwatch_devices()
+        try:
+            client = DeviceNotificationClient()
+            self._device_enumerator().RegisterEndpointNotificationCallback(client)
+            self._notification_client = client
+            log.info("Registered audio endpoint change notifications")
+            return True
+        except Exception as e:
+            log.warning(f"Audio endpoint notifications unavailable: {str(e)}")
+            return False
+
+    def unwatch_devices(self):
+        if self._notification_client is None:
+            return
+        try:
+            self._device_enumerator().UnregisterEndpointNotificationCallback(self._notification_client)
+        except Exception as e:
+            log.warning(f"Failed to unregister audio endpoint notifications: {str(e)}")
+        self._notification_client = None
+
+    def is_active(self):
+        return self.volume is not None
+
+    def _require_volume(self):
+        if self.volume is None:
+            raise AudioBackendError("Audio device not initialized")
+        return self.volume
+
+    def get_mute(self):
+        return bool(self._require_volume().GetMute())
+
+    def set_mute(self, muted):
+        self._require_volume().SetMute(1 if muted else 0, None)
+
+    def subscribe(self, callback):
+        self.unsubscribe()
+        try:
+            callback_object = self._create_callback(callback)
+            self._require_volume().RegisterControlChangeNotify(callback_object)
+            self._callback_object = callback_object
+            log.info("Registered endpoint volume change notifications")
+            return True
+        except Exception as e:
+            log.warning(f"Endpoint volume notifications unavailable: {str(e)}")
+            return False
+
+    @staticmethod
+    def _create_callback(callback):
+        from comtypes import COMObject
+        from pycaw.pycaw import IAudioEndpointVolumeCallback
+
+        class EndpointVolumeCallback(COMObject):
+            _com_interfaces_ = [IAudioEndpointVolumeCallback]
+
+            def OnNotify(self, pNotify):
+                # Called on a COM worker thread; the callback must only marshal the value.
+                callback(bool(pNotify.contents.bMuted))
+
+        return EndpointVolumeCallback()
+
+    def unsubscribe(self):
+        if self._callback_object is None:
+            return
+        try:
+            self.volume.UnregisterControlChangeNotify(self._callback_object)
+        except Exception as e:
+            log.warning(f"Failed to unregister endpoint volume notifications: {str(e)}")
+        self._callback_object = None
+
+    def list_devices(self):
+        from pycaw.pycaw import AudioUtilities
+        from pycaw.constants import DEVICE_STATE, EDataFlow
+
+        enumerator = AudioUtilities.GetDeviceEnumerator()
+        collection = enumerator.EnumAudioEndpoints(EDataFlow.eCapture.value, DEVICE_STATE.ACTIVE.value)
+        devices = []
+        for index in range(collection.GetCount()):
+            device = AudioUtilities.CreateDevice(collection.Item(index))
+            devices.append(AudioDevice(device.id, device.FriendlyName))
+        return devices
+
+    def open_devices(self):
+        from ctypes import cast, POINTER
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+        from pycaw.constants import DEVICE_STATE, EDataFlow
+
+        self.close_devices()
+        enumerator = AudioUtilities.GetDeviceEnumerator()
+        collection = enumerator.EnumAudioEndpoints(EDataFlow.eCapture.value, DEVICE_STATE.ACTIVE.value)
+        devices = []
+        for index in range(collection.GetCount()):
+            endpoint = collection.Item(index)
+            device = AudioUtilities.CreateDevice(endpoint)
+            try:
+                interface = endpoint.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+            except Exception as e:
+                log.warning(f"Skipping capture device {device.FriendlyName}: {str(e)}")
+                continue
+            self.device_volumes[device.id] = cast(interface, POINTER(IAudioEndpointVolume))
+            devices.append(AudioDevice(device.id, device.FriendlyName))
+        return devices
+
+    def close_devices(self):
+        for device_id, callback_object in self._device_callbacks.items():
+            try:
+                self.device_volumes[device_id].UnregisterControlChangeNotify(callback_object)
+            except Exception as e:
+                log.warning(f"Failed to unregister notifications for {device_id}: {str(e)}")
+        self._device_callbacks = {}
+        self.device_volumes = {}
+
+    def _device_volume(self, device_id):
+        volume = self.device_volumes.get(device_id)
+        if volume is None:
+            raise AudioBackendError(f"Audio device {device_id} not open")
+        return volume
+
+    def get_device_mute(self, device_id):
+        return bool(self._device_volume(device_id).GetMute())
+
+    def set_device_mute(self, device_id, muted):
+        self._device_volume(device_id).SetMute(1 if muted else 0, None)
+
+    def subscribe_device(self, device_id, callback):
+        try:
+            callback_object = self._create_callback(callback)
+            self._device_volume(device_id).RegisterControlChangeNotify(callback_object)
+            self._device_callbacks[device_id] = callback_object
+            return True
+        except Exception as e:
+            log.warning(f"Notifications unavailable for {device_id}: {str(e)}")
+            return False
+
+
+class FakeAudioBackend(AudioEndpointBackend):
+    """Deterministic in-memory backend with configurable latency and failure injection.
+
+    call_latency delays every get/set/activate call by that many seconds.
+    failure_rate makes each call fail with that probability (seeded, so runs are
+    reproducible); fail_next() queues explicit failures. Setting available to
+    False simulates an unplugged microphone. call_counts records every call.
+    The first device is the default endpoint and shares muted with the
+    single-device API; the others keep their state in device_muted.
+    """
+
+    def __init__(self, muted=False, devices=None, call_latency=0.0, failure_rate=0.0,
+                 seed=0, notifications=True):
+        self.muted = bool(muted)
+        self.devices = list(devices) if devices is not None else [AudioDevice("fake-mic-0", "Fake Microphone")]
+        self.call_latency = call_latency
+        self.failure_rate = failure_rate
+        self.notifications = notifications
+        self.available = True
+        self.active = False
+        self.call_counts = collections.Counter()
+        self._random = random.Random(seed)
+        self._pending_failures = collections.deque()
+        self._callback = None
+        self._lock = threading.Lock()
+        self.device_muted = {}
+        self.open_device_ids = set()
+        self._device_callbacks = {}
+        self.bound_device_id = None
+        self._watch_callback = None
+
+    def fail_next(self, count=1, operation=None):
+        """Make the next count calls (of operation, or of any kind) raise AudioBackendError."""
+        with self._lock:
+            self._pending_failures.extend([operation] * count)
+
+    def _call(self, operation):
+        with self._lock:
+            self.call_counts[operation] += 1
+            latency = self.call_latency
+            fail = False
+            if self._pending_failures and self._pending_failures[0] in (None, operation):
+                self._pending_failures.popleft()
+                fail = True
+            elif self.failure_rate and self._random.random() < self.failure_rate:
+                fail = True
+        if latency:
+            time.sleep(latency)
+        if fail:
+            raise AudioBackendError(f"Injected {operation} failure")
+
+    def activate(self):
+        self._call("activate")
+        if not self.available or not self.devices:
+            self.active = False
+            raise NoAudioDeviceError("No microphone device found")
+        self.active = True
+        self.bound_device_id = self.devices[0].id
+
+    def release(self):
+        self.unsubscribe()
+        self.active = False
+        self.bound_device_id = None
+
+    def default_device_id(self):
+        self._call("default_device_id")
+        return self.devices[0].id if self.available and self.devices else None
+
+    def watch_devices(self, callback):
+        if not self.notifications:
+            return False
+        with self._lock:
+            self._watch_callback = callback
+        return True
+
+    def unwatch_devices(self):
+        with self._lock:
+            self._watch_callback = None
+
+    def simulate_device_change(self, devices, event=None):
+        """Replace the endpoint list (devices[0] is the new default) as a hot-plug would, notifying from a foreign thread."""
+        previous_default = self.devices[0].id if self.devices else None
+        previous_ids = {device.id for device in self.devices}
+        self.devices = list(devices)
+        current_ids = {device.id for device in self.devices}
+        events = [(DEVICE_ADDED, device_id) for device_id in current_ids - previous_ids]
+        events += [(DEVICE_REMOVED, device_id) for device_id in previous_ids - current_ids]
+        default = self.devices[0].id if self.devices else None
+        if default != previous_default:
+            events.append((DEVICE_DEFAULT_CHANGED, default))
+        if event is not None:
+            events = [event]
+        with self._lock:
+            callback = self._watch_callback
+        if callback is None:
+            return
+
+        def deliver():
+            for name, device_id in events:
+                callback(name, device_id)
+
+        thread = threading.Thread(target=deliver, daemon=True)
+        thread.start()
+        thread.join()
+
+    def is_active(self):
+        return self.active
+
+    def get_mute(self):
+        self._call("get_mute")
+        if not self.active or not self.available:
+            raise AudioBackendError("Audio device not initialized")
+        return self.muted
+
+    def set_mute(self, muted):
+        self._call("set_mute")
+        if not self.active or not self.available:
+            raise AudioBackendError("Audio device not initialized")
+        changed = self.muted != bool(muted)
+        self.muted = bool(muted)
+        if changed:
+            self._notify()
+
+    def subscribe(self, callback):
+        if not self.notifications or not self.active:
+            return False
+        with self._lock:
+            self._callback = callback
+        return True
+
+    def unsubscribe(self):
+        with self._lock:
+            self._callback = None
+
+    def list_devices(self):
+        self._call("list_devices")
+        return list(self.devices) if self.available else []
+
+    def open_devices(self):
+        self._call("open_devices")
+        devices = list(self.devices) if self.available else []
+        self.open_device_ids = {device.id for device in devices}
+        return devices
+
+    def close_devices(self):
+        with self._lock:
+            self._device_callbacks = {}
+        self.open_device_ids = set()
+
+    def _is_default(self, device_id):
+        return bool(self.devices) and device_id == self.devices[0].id
+
+    def _require_device(self, device_id):
+        if device_id not in self.open_device_ids or not self.available:
+            raise AudioBackendError(f"Audio device {device_id} not open")
+
+    def get_device_mute(self, device_id):
+        self._call("get_device_mute")
+        self._require_device(device_id)
+        if self._is_default(device_id):
+            return self.muted
+        return self.device_muted.get(device_id, False)
+
+    def set_device_mute(self, device_id, muted):
+        self._call("set_device_mute")
+        self._require_device(device_id)
+        self._set_device_state(device_id, bool(muted))
+
+    def subscribe_device(self, device_id, callback):
+        if not self.notifications or device_id not in self.open_device_ids:
+            return False
+        with self._lock:
+            self._device_callbacks[device_id] = callback
+        return True
+
+    def simulate_external_device_change(self, device_id, muted):
+        """Change one device's mute state as another application would."""
+        thread = threading.Thread(target=self._set_device_state, args=(device_id, bool(muted)), daemon=True)
+        thread.start()
+        thread.join()
+
+    def _set_device_state(self, device_id, muted):
+        if self._is_default(device_id):
+            changed = self.muted != muted
+            self.muted = muted
+            if changed:
+                self._notify()
+            return
+        changed = self.device_muted.get(device_id, False) != muted
+        self.device_muted[device_id] = muted
+        if changed:
+            with self._lock:
+                callback = self._device_callbacks.get(device_id)
+            if callback is not None:
+                callback(muted)
+
+    def simulate_external_change(self, muted, threaded=True):
+        """Change the mute state as another application would, notifying from a foreign thread like COM does."""
+        self.muted = bool(muted)
+        if threaded:
+            thread = threading.Thread(target=self._notify, daemon=True)
+            thread.start()
+            thread.join()
+        else:
+            self._notify()
+
+    def _notify(self):
+        with self._lock:
+            callback = self._callback
+            device_callback = self._device_callbacks.get(self.devices[0].id) if self.devices else None
+        if callback is not None:
+            callback(self.muted)
+        if device_callback is not None:
+            device_callback(self.muted)
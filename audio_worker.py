@@ -0,0 +1,439 @@
+"""Dedicated audio thread that owns the audio backend.
+
+All backend calls (and on Windows the COM apartment they need) live on one
+worker thread. The UI only posts requests, which never block: requests that
+arrive while the worker is busy, e.g. while a flaky USB microphone stalls, are
+coalesced into a single pass. The worker also owns a DeviceManager for the
+other capture endpoints; device commands queued together are merged and
+applied in the same pass. Endpoint hot-plug notifications from the backend
+only schedule a cheap check of the default endpoint id; the endpoint is
+re-bound only when that id differs from the bound one. Retries back off per
+RetryPolicy, and a CircuitBreaker stops implicit re-activation while the
+device keeps failing, so a missing microphone is not hammered on every poll.
+Results are reported through callbacks invoked
+on the worker thread; front ends marshal them onto their UI thread. Backend
+call durations, passes, retries and activation attempts are recorded in
+metrics.REGISTRY.
+"""
+import threading
+import time
+
+from audio_backend import DEVICE_DEFAULT_CHANGED, NoAudioDeviceError
+from app_logging import get_logger
+from device_manager import DeviceManager
+from metrics import REGISTRY
+from retry_policy import HALF_OPEN, OPEN, CircuitBreaker, RetryPolicy
+
+log = get_logger("audio_worker")
+
+_BREAKER_LEVELS = {OPEN: 2, HALF_OPEN: 1}  # Gauge value; anything else is closed (0)
+
+_get_mute_seconds = REGISTRY.histogram("get_mute_seconds", "Duration of GetMute calls on the audio worker")
+_set_mute_seconds = REGISTRY.histogram("set_mute_seconds", "Duration of SetMute calls on the audio worker")
+_activate_seconds = REGISTRY.histogram("activate_seconds", "Duration of successful device activations")
+_passes = REGISTRY.counter("worker_passes_total", "Audio worker passes (coalesced requests)")
+_activation_attempts = REGISTRY.counter("activation_attempts_total", "Device activation attempts")
+_activation_failures = REGISTRY.counter("activation_failures_total", "Failed device activation attempts")
+_command_retries = REGISTRY.counter("command_retries_total", "Read/toggle attempts retried after a failure")
+_breaker_state = REGISTRY.gauge("breaker_state", "Audio circuit breaker: 0 closed, 1 half-open, 2 open")
+
+
+class AudioWorker:
+    """Serializes mute commands against an AudioEndpointBackend on a single thread.
+
+    Callbacks (all called on the worker thread or a backend notification thread):
+    on_state(is_muted, source) after a read, toggle, set or push notification;
+    on_error(message) when a command fails after retries;
+    on_device(active, push_active) after every (re)activation attempt;
+    on_devices(snapshot) whenever the per-device table (DeviceManager.snapshot()) changes;
+    on_breaker(state, description) whenever the circuit breaker changes state.
+    Extra on_state-style listeners can be added with add_state_listener(), and
+    every request accepts on_done(is_muted, error), called once the pass that
+    served it has finished (is_muted is None when error is set).
+    """
+
+    def __init__(self, backend, on_state=None, on_error=None, on_device=None,
+                 retries=3, retry_delay=0.2, on_devices=None, on_breaker=None,
+                 retry_policy=None, breaker=None):
+        self.backend = backend
+        self.on_state = on_state
+        self.on_error = on_error
+        self.on_device = on_device
+        self.on_devices = on_devices
+        self.device_manager = DeviceManager(backend, on_change=self._on_device_change)
+        self.on_breaker = on_breaker
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy(attempts=retries, base_delay=retry_delay)
+        self.breaker = breaker if breaker is not None else CircuitBreaker(failure_threshold=retries)
+        self.breaker.on_change = self._on_breaker_change
+        REGISTRY.gauge("breaker_rejections", "Polls rejected by the open circuit breaker",
+                       function=lambda: self.breaker.rejected)
+        self.activation_attempts = 0
+        self.push_active = False
+        self.device_watch_active = False
+        self.check_count = 0
+        self.rebind_count = 0
+        self.thread_init_seconds = None
+        self.last_state = None
+        self._state_listeners = []
+        self._pending_callbacks = []
+        self._pass_error = None
+        self._condition = threading.Condition()
+        self._pending_toggles = 0
+        self._pending_target = None
+        self._pending_read = False
+        self._pending_refresh = False
+        self._pending_device_targets = {}  # selector tuple (None = all) -> muted, merged in request order
+        self._pending_device_refresh = False
+        self._pending_check = False
+        self._busy = False
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread and bind the default capture endpoint on it."""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._pending_refresh = True
+        self._pending_read = True
+        self._thread = threading.Thread(target=self._run, name="AudioWorker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop the worker; the backend is released and uninitialized on the worker thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        thread.join(timeout)
+        self._thread = None
+
+    def is_busy(self):
+        """True while a command is executing or waiting to execute."""
+        with self._condition:
+            return self._busy or self._has_pending()
+
+    def add_state_listener(self, listener):
+        """Also report every state to listener(is_muted, source)."""
+        with self._condition:
+            self._state_listeners = self._state_listeners + [listener]
+
+    def remove_state_listener(self, listener):
+        with self._condition:
+            self._state_listeners = [item for item in self._state_listeners if item != listener]
+
+    def request_toggle(self, on_done=None):
+        """Flip the mute state. Toggles issued before the worker gets to them cancel out in pairs."""
+        with self._condition:
+            self._pending_toggles += 1
+            self._add_callback(on_done)
+            self._condition.notify()
+
+    def request_mute(self, muted, on_done=None):
+        """Set an explicit mute state; supersedes any toggles still pending."""
+        with self._condition:
+            self._pending_target = bool(muted)
+            self._pending_toggles = 0
+            self._add_callback(on_done)
+            self._condition.notify()
+
+    def request_read(self, on_done=None):
+        """Read the current mute state and report it through on_state."""
+        with self._condition:
+            self._pending_read = True
+            self._add_callback(on_done)
+            self._condition.notify()
+
+    def request_device_check(self):
+        """Re-bind the default capture endpoint only if its id changed since it was bound."""
+        with self._condition:
+            self._pending_check = True
+            self._condition.notify()
+
+    def request_mute_devices(self, muted, selectors=None, on_done=None):
+        """Mute or unmute several capture devices in one pass.
+
+        selectors are device ids or friendly names; None means every capture
+        device. Later requests for the same selectors replace earlier ones.
+        """
+        key = None if selectors is None else tuple(selectors)
+        with self._condition:
+            if key is None:
+                self._pending_device_targets.clear()
+            self._pending_device_targets.pop(key, None)
+            self._pending_device_targets[key] = bool(muted)
+            self._add_callback(on_done)
+            self._condition.notify()
+
+    def request_device_refresh(self, on_done=None):
+        """Enumerate the capture devices again on the next pass."""
+        with self._condition:
+            self._pending_device_refresh = True
+            self._add_callback(on_done)
+            self._condition.notify()
+
+    def device_states(self):
+        """Per-device snapshot, see DeviceManager.snapshot(); safe from any thread."""
+        return self.device_manager.snapshot()
+
+    def _add_callback(self, on_done):
+        if on_done is not None:
+            self._pending_callbacks.append(on_done)
+
+    def request_refresh(self):
+        """Re-bind the default capture endpoint and re-read its state."""
+        with self._condition:
+            self._pending_refresh = True
+            self._pending_read = True
+            self._condition.notify()
+
+    def _has_pending(self):
+        return (self._pending_toggles or self._pending_target is not None
+                or self._pending_read or self._pending_refresh
+                or self._pending_device_targets or self._pending_device_refresh or self._pending_check)
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self.backend.initialize_thread()
+        except Exception as e:
+            log.error(f"Audio worker failed to initialize backend thread: {str(e)}")
+        self.thread_init_seconds = time.perf_counter() - started
+        try:
+            self.device_watch_active = self.backend.watch_devices(self._on_endpoint_event)
+        except Exception as e:
+            log.error(f"Failed to watch audio endpoints: {str(e)}")
+        try:
+            while True:
+                with self._condition:
+                    while self._running and not self._has_pending():
+                        self._condition.wait()
+                    if not self._running:
+                        break
+                    toggles, self._pending_toggles = self._pending_toggles, 0
+                    target, self._pending_target = self._pending_target, None
+                    read, self._pending_read = self._pending_read, False
+                    refresh, self._pending_refresh = self._pending_refresh, False
+                    device_targets, self._pending_device_targets = self._pending_device_targets, {}
+                    device_refresh, self._pending_device_refresh = self._pending_device_refresh, False
+                    check, self._pending_check = self._pending_check, False
+                    callbacks, self._pending_callbacks = self._pending_callbacks, []
+                    self._busy = True
+                self._pass_error = None
+                _passes.inc()
+                try:
+                    if check and not refresh and self._endpoint_changed():
+                        refresh = read = True
+                    device_refresh = device_refresh or (refresh and self.device_manager.is_open)
+                    if device_targets or device_refresh:
+                        self._process_devices(device_targets, device_refresh)
+                        # The default endpoint may be one of them; without push its state must be re-read
+                        read = read or (bool(device_targets) and not self.push_active)
+                    self._process(toggles, target, read, refresh)
+                except Exception as e:
+                    log.error(f"Audio worker command failed: {str(e)}")
+                    self._pass_error = str(e)
+                finally:
+                    with self._condition:
+                        self._busy = False
+                self._complete(callbacks)
+        finally:
+            with self._condition:
+                callbacks, self._pending_callbacks = self._pending_callbacks, []
+            self._pass_error = "Audio worker stopped"
+            self._complete(callbacks)
+            try:
+                self.backend.unwatch_devices()
+                self.device_manager.close()
+                self.backend.release()
+                self.backend.uninitialize_thread()
+            except Exception as e:
+                log.error(f"Audio worker failed to release backend: {str(e)}")
+
+    def _complete(self, callbacks):
+        """Answer every request served by the last pass with its outcome."""
+        error = self._pass_error
+        state = None if error else self.last_state
+        for on_done in callbacks:
+            try:
+                on_done(state, error)
+            except Exception as e:
+                log.error(f"Audio request callback failed: {str(e)}")
+
+    def _process(self, toggles, target, read, refresh):
+        if not refresh and not self.backend.is_active() and not self.breaker.allow():
+            # Explicit refreshes and endpoint changes always go through; polls wait for the breaker
+            self._pass_error = f"Audio device unavailable ({self.breaker.describe()})"
+            return
+        if refresh or not self.backend.is_active():
+            self._activate()
+        if not self.backend.is_active():
+            self._emit_error("No audio device")
+            return
+        if target is None and toggles % 2 == 0:
+            if read or toggles:
+                self._with_retries(self._read, "Read")
+            return
+        self._with_retries(lambda: self._write(target, toggles), "Toggle")
+
+    def _endpoint_changed(self):
+        self.check_count += 1
+        try:
+            default_id = self.backend.default_device_id()
+        except Exception as e:
+            log.error(f"Failed to query the default capture endpoint: {str(e)}")
+            return self.breaker.allow()
+        if default_id == self.backend.bound_device_id:
+            return False
+        if default_id is None:
+            return False  # Nothing to bind; the lost endpoint shows up as a failed read
+        log.info(f"Default capture endpoint changed to {default_id}")
+        return True
+
+    def _on_endpoint_event(self, event, device_id):
+        # Called on a COM notification thread: only queue work for the worker
+        if event == DEVICE_DEFAULT_CHANGED or device_id == self.backend.bound_device_id or not self.backend.is_active():
+            self.request_device_check()
+        if self.device_manager.is_open and event != DEVICE_DEFAULT_CHANGED:
+            self.request_device_refresh()
+
+    def _process_devices(self, device_targets, refresh):
+        if refresh:
+            self.device_manager.close()
+        try:
+            self.device_manager.open()
+        except Exception as e:
+            self.device_manager.close()
+            self._emit_error(f"Device enumeration failed: {str(e)}")
+            return
+        targets = {}
+        for selectors, muted in device_targets.items():
+            for device_id in self.device_manager.resolve(selectors):
+                targets[device_id] = muted
+        errors = self.device_manager.set_mute(targets)
+        if targets:
+            log.info(f"{len(targets) - len(errors)} of {len(targets)} capture device(s) updated")
+        if errors:
+            self._emit_error(f"{len(errors)} device(s) failed")
+        if self.on_devices:
+            self.on_devices(self.device_manager.snapshot())
+
+    def _on_device_change(self, device_id, is_muted):
+        if self.on_devices and not self._busy:
+            # Changes made by a device pass are reported once at its end
+            self.on_devices(self.device_manager.snapshot())
+
+    def _get_mute(self):
+        started = time.perf_counter()
+        is_muted = self.backend.get_mute()
+        _get_mute_seconds.record(time.perf_counter() - started)
+        return is_muted
+
+    def _set_mute(self, muted):
+        started = time.perf_counter()
+        self.backend.set_mute(muted)
+        _set_mute_seconds.record(time.perf_counter() - started)
+
+    def _read(self):
+        self._emit_state(self._get_mute(), "read")
+
+    def _write(self, target, toggles):
+        if target is None:
+            target = not self._get_mute()
+        elif toggles % 2:
+            target = not target
+        self._set_mute(target)
+        # Read back so callers can reconcile when the device does not take the new state
+        actual = self._get_mute()
+        log.debug("Toggled: %s", "Muted" if actual else "Unmuted")
+        self._emit_state(actual, "command")
+
+    def _with_retries(self, operation, label):
+        attempts = self.retry_policy.attempts
+        for attempt in range(attempts):
+            try:
+                operation()
+                self.breaker.record_success()
+                return True
+            except Exception as e:
+                log.error(f"{label} attempt {attempt + 1} failed: {str(e)}")
+                self.breaker.record_failure()
+                self.backend.release()
+                if attempt == attempts - 1 or self.breaker.state == OPEN:
+                    break
+                _command_retries.inc()
+                self._sleep(self.retry_policy.delay(attempt))
+                self._activate(attempts=1)
+                if not self.backend.is_active():
+                    break
+        log.error(f"All {label.lower()} attempts failed")
+        self._emit_error(f"{label} failed")
+        return False
+
+    def _activate(self, attempts=None):
+        self.rebind_count += 1
+        attempts = self.retry_policy.attempts if attempts is None else attempts
+        for attempt in range(attempts):
+            self.activation_attempts += 1
+            _activation_attempts.inc()
+            started = time.perf_counter()
+            try:
+                self.backend.activate()
+                _activate_seconds.record(time.perf_counter() - started)
+                log.info("Audio device initialized successfully")
+                self.breaker.record_success()
+                break
+            except NoAudioDeviceError as e:
+                _activation_failures.inc()
+                log.error("%s", e)
+                self.backend.release()
+                self.breaker.record_failure()
+                break
+            except Exception as e:
+                _activation_failures.inc()
+                log.error(f"Audio device initialization attempt {attempt + 1} failed: {str(e)}")
+                self.backend.release()
+                self.breaker.record_failure()
+                if attempt == attempts - 1 or self.breaker.state == OPEN:
+                    break
+                self._sleep(self.retry_policy.delay(attempt))
+        self.push_active = False
+        if self.backend.is_active():
+            self.push_active = self.backend.subscribe(self._on_notification)
+        if self.on_device:
+            self.on_device(self.backend.is_active(), self.push_active)
+
+    def _sleep(self, seconds):
+        """Back off on the worker thread; returns early when the worker is stopped."""
+        with self._condition:
+            self._condition.wait_for(lambda: not self._running, seconds)
+
+    def _on_breaker_change(self, breaker):
+        _breaker_state.set(_BREAKER_LEVELS.get(breaker.state, 0))
+        if breaker.state == OPEN:
+            log.warning(f"Audio circuit breaker open: {breaker.describe()}")
+        else:
+            log.info(f"Audio circuit breaker {breaker.state}")
+        if self.on_breaker:
+            self.on_breaker(breaker.state, breaker.describe())
+
+    def _on_notification(self, is_muted):
+        self._emit_state(is_muted, "notification")
+
+    def _emit_state(self, is_muted, source):
+        is_muted = bool(is_muted)
+        self.last_state = is_muted
+        if self.on_state:
+            self.on_state(is_muted, source)
+        for listener in self._state_listeners:
+            try:
+                listener(is_muted, source)
+            except Exception as e:
+                log.error(f"Audio state listener failed: {str(e)}")
+
+    def _emit_error(self, message):
+        self._pass_error = message
+        if self.on_error:
+            self.on_error(message)
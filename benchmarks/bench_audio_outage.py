@@ -0,0 +1,95 @@
+"""Check that a prolonged microphone outage keeps activation attempts bounded.
+
+Usage: python benchmarks/bench_audio_outage.py [--outage 10] [--poll-ms 100] [--reset-timeout 1] [--max-reset-timeout 30]
+
+An AudioWorker runs over a FakeAudioBackend that has no microphone (every
+activate() fails) for --outage seconds while the PyQt6 app's fast poll
+(request_read every --poll-ms) keeps running. It is run twice:
+
+  no breaker  a breaker that never opens, i.e. the old behaviour where every
+              poll re-activates the device
+  breaker     the default CircuitBreaker with the given timeouts
+
+For the breaker run the script asserts that activation attempts stay within
+the bound the breaker guarantees (the first pass's retries plus one trial per
+open period), then plugs the microphone back in and checks that the worker
+recovers within one maximum open period. Exits non-zero on failure.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import FakeAudioBackend
+from audio_worker import AudioWorker
+from retry_policy import CircuitBreaker, RetryPolicy
+
+
+def activation_bound(outage, retries, reset_timeout, max_reset_timeout):
+    """Attempts a breaker with these settings may make during the outage."""
+    attempts = retries
+    elapsed = timeout = reset_timeout
+    while elapsed <= outage:
+        attempts += 1
+        timeout = min(max_reset_timeout, timeout * 2)
+        elapsed += timeout
+    return attempts
+
+
+def run(breaker, outage, poll_interval, retries):
+    backend = FakeAudioBackend()
+    backend.available = False
+    worker = AudioWorker(backend, retry_policy=RetryPolicy(attempts=retries, base_delay=0.01), breaker=breaker)
+    worker.start()
+    started = time.monotonic()
+    while time.monotonic() - started < outage:
+        worker.request_read()
+        time.sleep(poll_interval)
+    attempts = backend.call_counts["activate"]
+
+    backend.available = True
+    recovered_at = None
+    deadline = time.monotonic() + breaker.max_reset_timeout + 1.0
+    while time.monotonic() < deadline:
+        worker.request_read()
+        time.sleep(poll_interval)
+        if backend.is_active() and worker.last_state is not None:
+            recovered_at = time.monotonic()
+            break
+    worker.stop()
+    recovery = None if recovered_at is None else recovered_at - started - outage
+    return attempts, recovery
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--outage", type=float, default=10.0, help="seconds without a microphone")
+    parser.add_argument("--poll-ms", type=float, default=100.0)
+    parser.add_argument("--reset-timeout", type=float, default=1.0)
+    parser.add_argument("--max-reset-timeout", type=float, default=30.0)
+    parser.add_argument("--retries", type=int, default=3)
+    args = parser.parse_args()
+    poll_interval = args.poll_ms / 1000.0
+
+    attempts, _ = run(CircuitBreaker(failure_threshold=10 ** 9), args.outage, poll_interval, args.retries)
+    print(f"no breaker: {attempts} activation attempts in {args.outage:.0f} s ({attempts / args.outage:.1f}/s)")
+
+    breaker = CircuitBreaker(failure_threshold=args.retries, reset_timeout=args.reset_timeout,
+                             max_reset_timeout=args.max_reset_timeout)
+    attempts, recovery = run(breaker, args.outage, poll_interval, args.retries)
+    bound = activation_bound(args.outage, args.retries, args.reset_timeout, args.max_reset_timeout)
+    print(f"breaker:    {attempts} activation attempts in {args.outage:.0f} s (bound {bound}), "
+          f"{breaker.rejected} polls rejected without a backend call")
+    ok = attempts <= bound
+    if recovery is None:
+        print("breaker:    did not recover after the microphone came back")
+        ok = False
+    else:
+        print(f"breaker:    recovered {recovery:.2f} s after the microphone came back")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
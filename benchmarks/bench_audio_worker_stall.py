@@ -0,0 +1,110 @@
+"""Measure GUI event-loop latency while the audio backend stalls.
+
+Usage: python benchmarks/bench_audio_worker_stall.py [--stall-ms 500] [--duration 3]
+
+A Qt event loop (offscreen platform) runs a 5 ms heartbeat timer and records
+how late each beat fires while toggles are issued every 50 ms against a
+FakeAudioBackend whose every call stalls for --stall-ms. The "inline" mode
+calls the backend on the GUI thread like the old toggle_mute did; the
+"worker" mode goes through AudioWorker with results delivered by queued
+signals.
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer, Qt, pyqtSignal
+
+from audio_backend import FakeAudioBackend
+from audio_worker import AudioWorker
+
+HEARTBEAT_MS = 5
+TOGGLE_MS = 50
+
+
+class WorkerSignals(QObject):
+    mute_state = pyqtSignal(bool, str)
+
+
+def run(mode, stall_ms, duration):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    backend = FakeAudioBackend()
+    backend.activate()
+    backend.call_latency = stall_ms / 1000.0
+    lags = []
+    toggles = [0]
+    delivered = []
+    last_beat = [time.perf_counter()]
+
+    def heartbeat():
+        now = time.perf_counter()
+        lags.append(max(0.0, (now - last_beat[0]) * 1000.0 - HEARTBEAT_MS))
+        last_beat[0] = now
+
+    worker = None
+    if mode == "worker":
+        signals = WorkerSignals()
+        signals.mute_state.connect(lambda muted, source: delivered.append(muted), Qt.ConnectionType.QueuedConnection)
+        worker = AudioWorker(backend, on_state=signals.mute_state.emit, retry_delay=0)
+        worker.start()
+
+    def toggle():
+        toggles[0] += 1
+        if worker is not None:
+            worker.request_toggle()
+        else:
+            backend.set_mute(not backend.get_mute())
+            delivered.append(backend.muted)
+
+    beat_timer = QTimer()
+    beat_timer.timeout.connect(heartbeat)
+    beat_timer.start(HEARTBEAT_MS)
+    toggle_timer = QTimer()
+    toggle_timer.timeout.connect(toggle)
+    toggle_timer.start(TOGGLE_MS)
+    QTimer.singleShot(int(duration * 1000), toggle_timer.stop)
+
+    def finish():
+        if worker is not None and worker.is_busy():
+            QTimer.singleShot(50, finish)
+            return
+        app.quit()
+
+    QTimer.singleShot(int(duration * 1000), finish)
+    app.exec()
+    beat_timer.stop()
+    if worker is not None:
+        worker.stop()
+
+    lags.sort()
+    expected = toggles[0] % 2 == 1
+    return {
+        "mode": mode,
+        "toggles_requested": toggles[0],
+        "set_mute_calls": backend.call_counts["set_mute"],
+        "final_state_consistent": backend.muted == expected and (not delivered or delivered[-1] == expected),
+        "loop_lag_p50_ms": lags[len(lags) // 2] if lags else 0.0,
+        "loop_lag_p99_ms": lags[int(len(lags) * 0.99)] if lags else 0.0,
+        "loop_lag_max_ms": lags[-1] if lags else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stall-ms", type=float, default=500.0)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--modes", default="inline,worker")
+    args = parser.parse_args()
+
+    for mode in args.modes.split(","):
+        result = run(mode, args.stall_ms, args.duration)
+        print(", ".join(f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                        for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
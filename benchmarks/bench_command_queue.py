@@ -0,0 +1,164 @@
+"""Stress the UI command queue: toggles from many threads against a fake backend.
+
+Usage: python benchmarks/bench_command_queue.py [--toggles 10000] [--threads 8] [--fake-tk]
+
+Each run posts --toggles toggles from --threads threads at once, then
+--toggles + 1 so the two runs should end in opposite states. Two consumers
+are used:
+
+  queue    a thread standing in for the Tk loop: it drains CommandQueue
+           whenever woken and applies coalesce()d batches to a
+           FakeAudioBackend (always runs)
+  tkinter  the Tkinter app, with toggle_mute() called from the threads and
+           its own <<MicMuteCommand>> handler draining. pystray, PIL and Tk
+           are replaced by the recording fakes in tk_fakes.py where they are
+           missing or Tk has no display (or with --fake-tk), so this always
+           runs; the script exits non-zero if the app cannot be imported
+
+Fails unless every posted toggle is drained and the backend ends in the state
+implied by the toggle count. For the Tkinter app, the status label and the
+overlay must match that state too. Also reports how many SetMute calls and
+batches the toggles collapsed into, and the post-to-drain delay.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import FakeAudioBackend
+from command_queue import MUTE, TOGGLE, CommandQueue, coalesce, resolve_mute
+from metrics import REGISTRY
+
+import tk_fakes
+
+
+def fire(post, toggles, threads):
+    """Post toggles from threads threads released together; returns once all are posted."""
+    start = threading.Barrier(threads)
+
+    def producer(count):
+        start.wait()
+        for index in range(count):
+            post()
+            if index % 64 == 0:
+                time.sleep(0)  # Let the consumer interleave with the producers
+
+    workers = [threading.Thread(target=producer, args=(toggles // threads + (i < toggles % threads),))
+               for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def run_queue(toggles, threads):
+    backend = FakeAudioBackend()
+    backend.activate()
+    initial = backend.get_mute()
+    woken = threading.Event()
+    queue = CommandQueue(woken.set)
+    steps, done = [0], threading.Event()
+
+    def consumer():
+        while not done.is_set():
+            woken.wait()
+            woken.clear()
+            for name, args in coalesce(queue.drain()):
+                if name == MUTE:
+                    current = backend.get_mute()
+                    new_mute = resolve_mute(current, *args)
+                    if new_mute != current:
+                        backend.set_mute(new_mute)
+                    steps[0] += 1
+                elif name == "stop":
+                    done.set()
+
+    thread = threading.Thread(target=consumer)
+    thread.start()
+    started = time.perf_counter()
+    fire(lambda: queue.post(TOGGLE), toggles, threads)
+    queue.post("stop")
+    thread.join()
+    elapsed = time.perf_counter() - started
+    expected = initial != (toggles % 2 == 1)
+    ok = backend.get_mute() == expected and len(queue) == 0
+    return ok, {"final": backend.get_mute(), "expected": expected, "mute_steps": steps[0],
+                "set_mute_calls": backend.call_counts["set_mute"], "seconds": elapsed}
+
+
+def run_tkinter(toggles, threads):
+    import tkinter as tk
+    import mic_state_controller_tkinter as module
+    from sound_bank import NullSoundSink
+    root = tk.Tk()
+    backend = FakeAudioBackend()
+    app = module.MicMuteApp(root, audio_backend=backend, sound_sink=NullSoundSink())
+    root.update()
+    initial = backend.get_mute()
+    batches = REGISTRY.counter("command_batches_total").value
+    set_mutes = backend.call_counts["set_mute"]
+    producers = threading.Thread(target=fire, args=(app.toggle_mute, toggles, threads))
+
+    def check_done():
+        if not producers.is_alive() and len(app.commands) == 0:
+            root.quit()
+        else:
+            root.after(10, check_done)
+
+    started = time.perf_counter()
+    producers.start()
+    root.after(10, check_done)
+    root.mainloop()
+    app.process_commands()
+    elapsed = time.perf_counter() - started
+    expected = initial != (toggles % 2 == 1)
+    final = backend.get_mute()
+    label = app.label.cget("text")
+    ok = (final == expected and label == f"Status: {'Muted' if expected else 'Unmuted'}"
+          and (app.overlay_state == "muted") == expected)
+    info = {"final": final, "expected": expected, "label": label, "overlay": app.overlay_state,
+            "batches": REGISTRY.counter("command_batches_total").value - batches,
+            "set_mute_calls": backend.call_counts["set_mute"] - set_mutes, "seconds": elapsed}
+    app.exit_app()
+    return ok, info
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toggles", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--fake-tk", action="store_true", help="use the recording Tk even where a display is available")
+    args = parser.parse_args()
+    os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="micmute-bench-")
+    faked = tk_fakes.install(force=args.fake_tk)
+    try:
+        import mic_state_controller_tkinter  # noqa: F401
+    except ImportError as e:
+        print(f"cannot run the tkinter consumer: {type(e).__name__}: {e}")
+        tk_fakes.stop_display()
+        sys.exit(2)
+    print(f"faked: {', '.join(faked) or 'nothing'}")
+
+    ok = True
+    try:
+        for label, run in (("queue", run_queue), ("tkinter", run_tkinter)):
+            for toggles in (args.toggles, args.toggles + 1):
+                passed, info = run(toggles, args.threads)
+                ok = ok and passed
+                details = ", ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                                    for key, value in info.items())
+                print(f"{label:>8}: {toggles} toggles from {args.threads} threads: "
+                      f"{'ok' if passed else 'FAILED'} ({details})")
+    finally:
+        tk_fakes.stop_display()
+    delay = REGISTRY.histogram("command_queue_delay_seconds").summary()
+    print(f"post-to-drain delay: p50={delay['p50_ms']:.3f} ms p99={delay['p99_ms']:.3f} ms max={delay['max_ms']:.3f} ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Benchmark config loading and check AppConfig properties over malformed files.
+
+Usage: python benchmarks/bench_config_model.py [--loads 2000] [--cases 5000] [--seed 0]
+
+The benchmark loads the same settings file --loads times with the shared
+single-pass loader (one shared StatCache) and with the old PyQt6 approach
+(exists() checks, json.load, setdefault merge, exists() per sound file), and
+reports time and stat calls per load.
+
+The property check writes --cases randomly malformed files (random bytes,
+truncated JSON, non-object JSON, wrong types, out-of-range values, unknown
+keys) and asserts for each one that loading never raises, that every field
+in the result passes its validator, and that saving and reloading the result
+is lossless and raises no issues (beyond the note that a file comes from a
+newer build). A last check loads a file with a newer config_version and
+asserts that its version and unknown keys survive a save and that loading
+it does not ask for a save. The script exits non-zero if any case fails.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_model import SCHEMA, SCHEMA_VERSION, AppConfig, ConfigError, StatCache, load_config
+
+
+class CountingStat:
+    """Counts os.path.exists calls made by the legacy loader."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def exists(self, path):
+        self.calls += 1
+        return os.path.exists(path)
+
+
+def legacy_load(config_path, bundled_path, default_config, stat):
+    """The pre-model PyQt6 load path, minus the widget updates."""
+    config = default_config
+    if stat.exists(config_path):
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+            for key, value in default_config.items():
+                config.setdefault(key, value)
+    elif stat.exists(bundled_path):
+        with open(bundled_path, 'r') as f:
+            config = json.load(f)
+            for key, value in default_config.items():
+                config.setdefault(key, value)
+    for key in ("mute_sound_file", "unmute_sound_file"):
+        if not config.get(key) or not stat.exists(config[key]):
+            config[key] = default_config[key]
+    return config
+
+
+def bench(directory, defaults, loads):
+    path = os.path.join(directory, "config.json")
+    missing = os.path.join(directory, "bundled.json")
+    with open(path, 'w') as f:
+        json.dump(defaults.to_dict(), f, indent=4)
+
+    stat_cache = StatCache()
+    started = time.perf_counter()
+    for _ in range(loads):
+        load_config((path, missing), defaults, stat_cache)
+    model_seconds = time.perf_counter() - started
+
+    default_dict = defaults.to_dict()
+    stat = CountingStat()
+    started = time.perf_counter()
+    for _ in range(loads):
+        legacy_load(path, missing, dict(default_dict), stat)
+    legacy_seconds = time.perf_counter() - started
+
+    print(f"model:  {model_seconds / loads * 1e6:.1f} us/load, {stat_cache.stat_calls / loads:.3f} stat calls/load")
+    print(f"legacy: {legacy_seconds / loads * 1e6:.1f} us/load, {stat.calls / loads:.3f} stat calls/load")
+
+
+def random_value(rng):
+    choices = (
+        lambda: rng.randint(-10 ** 6, 10 ** 6),
+        lambda: rng.uniform(-5, 200),
+        lambda: rng.choice([True, False, None]),
+        lambda: "".join(rng.choice("abcx0123456789 ,+.-") for _ in range(rng.randint(0, 12))),
+        lambda: [rng.randint(0, 9)],
+        lambda: {"nested": rng.randint(0, 9)},
+        lambda: rng.choice(["Top Mid", "Bottom Right", "48x48", "1e400", "nan", "ctrl+shift+x", "true"]),
+    )
+    return rng.choice(choices)()
+
+
+def malformed_content(rng, defaults):
+    kind = rng.randrange(5)
+    if kind == 0:
+        return bytes(rng.randrange(256) for _ in range(rng.randint(0, 64)))
+    if kind == 1:
+        text = json.dumps(defaults.to_dict())
+        return text[:rng.randint(0, len(text) - 1)].encode()
+    if kind == 2:
+        return json.dumps(random_value(rng)).encode()
+    data = defaults.to_dict()
+    for name, _, _ in SCHEMA:
+        if rng.random() < 0.5:
+            data[name] = random_value(rng)
+        elif rng.random() < 0.2:
+            del data[name]
+    if kind == 4:
+        data["config_version"] = random_value(rng)
+        data[f"unknown_{rng.randint(0, 99)}"] = random_value(rng)
+    return json.dumps(data).encode()
+
+
+def check_properties(directory, defaults, cases, seed):
+    rng = random.Random(seed)
+    stat_cache = StatCache()
+    path = os.path.join(directory, "fuzz.json")
+    failures = 0
+    for case in range(cases):
+        content = malformed_content(rng, defaults)
+        with open(path, 'wb') as f:
+            f.write(content)
+        try:
+            config, _, _ = load_config((path,), defaults, stat_cache)
+            for name, validate, _ in SCHEMA:
+                value = getattr(config, name)
+                try:
+                    validate(value, stat_cache)
+                except ConfigError as e:
+                    raise AssertionError(f"{name}={value!r} is invalid after load: {e}")
+            with open(path, 'w') as f:
+                json.dump(config.to_dict(), f)
+            reloaded, _, needs_save = load_config((path,), defaults, stat_cache)
+            assert reloaded == config, "save/reload changed the settings"
+            issues = [issue for issue in reloaded.issues if "is newer than" not in issue]
+            assert not issues and not needs_save, f"reload reported {reloaded.issues}"
+        except Exception as e:
+            failures += 1
+            if failures <= 5:
+                print(f"case {case}: {type(e).__name__}: {e} (content {content[:80]!r})")
+    print(f"property check: {cases} cases, {failures} failures")
+    return failures == 0
+
+
+def check_newer_version(directory, defaults):
+    """A file from a newer build is loaded as is and saved with its own version."""
+    path = os.path.join(directory, "newer.json")
+    data = defaults.to_dict()
+    data["config_version"] = SCHEMA_VERSION + 1
+    data["added_later"] = {"kept": True}
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    config, _, needs_save = load_config((path,), defaults)
+    saved = config.to_dict()
+    ok = (not needs_save and config.version == SCHEMA_VERSION + 1
+          and saved["config_version"] == SCHEMA_VERSION + 1 and saved["added_later"] == {"kept": True})
+    print(f"newer config_version: {'ok' if ok else 'FAILED'} (needs_save={needs_save}, "
+          f"saved config_version={saved['config_version']})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loads", type=int, default=2000)
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="micmute-config-")
+    try:
+        mute = os.path.join(directory, "mute.wav")
+        unmute = os.path.join(directory, "unmute.wav")
+        for sound in (mute, unmute):
+            open(sound, 'wb').close()
+        defaults = AppConfig(mute_sound_file=mute, unmute_sound_file=unmute)
+        bench(directory, defaults, args.loads)
+        ok = check_properties(directory, defaults, args.cases, args.seed)
+        ok = check_newer_version(directory, defaults) and ok
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
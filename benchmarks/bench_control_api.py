@@ -0,0 +1,93 @@
+"""Measure control API round-trip latency at a fixed request rate.
+
+Usage: python benchmarks/bench_control_api.py [--rate 1000] [--duration 5] [--command get-state]
+       python benchmarks/bench_control_api.py --address /path/to/MicMuteApp.sock
+
+Without --address an in-process ControlServer is started over a
+FakeAudioBackend (with --call-latency per backend call) on a temporary
+endpoint. The client sends one request at a time on a single connection,
+paced to --rate requests per second, and records each round trip. Use
+--address to measure a running app instead.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import local_ipc
+from audio_backend import FakeAudioBackend
+from audio_worker import AudioWorker
+from control_server import ControlServer
+from metrics import LatencyHistogram
+
+
+def run_client(address, rate, duration, command):
+    latency = LatencyHistogram(f"{command} round trip")
+    channel = local_ipc.connect(address)
+    errors = 0
+    interval = 1.0 / rate
+    started = time.perf_counter()
+    deadline = started + duration
+    sent = 0
+    try:
+        while True:
+            due = started + sent * interval
+            now = time.perf_counter()
+            if due >= deadline:
+                break
+            if due > now:
+                time.sleep(due - now)
+            sent_at = time.perf_counter()
+            channel.write_message({"cmd": command, "id": sent})
+            reply = channel.read_message()
+            latency.record(time.perf_counter() - sent_at)
+            sent += 1
+            if not reply or not reply.get("ok") or reply.get("id") != sent - 1:
+                errors += 1
+    finally:
+        channel.close()
+    elapsed = time.perf_counter() - started
+    return latency, sent / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=1000.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--command", default="get-state", choices=["get-state", "toggle", "mute", "unmute"])
+    parser.add_argument("--call-latency", type=float, default=0.0, help="seconds per fake backend call")
+    parser.add_argument("--address", help="endpoint of a running app")
+    args = parser.parse_args()
+
+    server = worker = backend = temp_dir = None
+    address = args.address
+    if address is None:
+        temp_dir = tempfile.mkdtemp(prefix="micmute-bench-")
+        address = local_ipc.default_address(f"MicMuteBench{os.getpid()}", temp_dir)
+        backend = FakeAudioBackend(call_latency=args.call_latency)
+        worker = AudioWorker(backend, retry_delay=0)
+        server = ControlServer(address, worker)
+        server.start()
+        worker.start()
+    try:
+        latency, achieved_rate, errors = run_client(address, args.rate, args.duration, args.command)
+    finally:
+        if server is not None:
+            server.stop()
+            worker.stop()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    stats = latency.summary()
+    print(f"requests={stats['count']} target_rate={args.rate:.0f}/s achieved_rate={achieved_rate:.0f}/s errors={errors}")
+    print(f"round_trip_mean_ms={stats['mean_ms']:.3f} p50_ms={stats['p50_ms']:.3f} "
+          f"p99_ms={stats['p99_ms']:.3f} max_ms={stats['max_ms']:.3f}")
+    if backend is not None:
+        print(f"backend_calls={dict(backend.call_counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compare blind auto-refresh against endpoint-id checks and hot-plug notifications.
+
+Usage: python benchmarks/bench_device_hotplug.py [--ticks 100] [--call-latency 0.002]
+
+An AudioWorker runs over a FakeAudioBackend with --call-latency per backend
+call. --ticks auto-refresh ticks are issued with the old behaviour
+(request_refresh: re-bind every time) and with the backstop check
+(request_device_check: compare the default endpoint id, re-bind on change).
+Then hot-plug events are simulated: a second microphone is plugged in without
+becoming the default (no re-bind expected), becomes the default (one re-bind),
+and is unplugged again (one re-bind back to the first microphone).
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import AudioDevice, FakeAudioBackend
+from audio_worker import AudioWorker
+
+HEADSET = AudioDevice("fake-headset", "Fake Headset")
+WEBCAM = AudioDevice("fake-webcam", "Fake Webcam")
+
+
+def wait_idle(worker, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while worker.is_busy() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def run_ticks(mode, ticks, call_latency):
+    backend = FakeAudioBackend(devices=[HEADSET], call_latency=call_latency)
+    worker = AudioWorker(backend, retry_delay=0)
+    worker.start()
+    wait_idle(worker)
+    backend.call_counts.clear()
+    started = time.perf_counter()
+    for _ in range(ticks):
+        if mode == "refresh":
+            worker.request_refresh()
+        else:
+            worker.request_device_check()
+        wait_idle(worker)
+    elapsed = time.perf_counter() - started
+    worker.stop()
+    return elapsed, dict(backend.call_counts)
+
+
+def run_hotplug(call_latency):
+    backend = FakeAudioBackend(devices=[HEADSET], call_latency=call_latency)
+    devices_seen = []
+    bound = threading.Event()
+
+    def on_device(active, push_active):
+        devices_seen.append(backend.bound_device_id)
+        bound.set()
+
+    worker = AudioWorker(backend, retry_delay=0, on_device=on_device)
+    worker.start()
+    bound.wait(5)
+    wait_idle(worker)
+    print(f"endpoint notifications active: {worker.device_watch_active}")
+    steps = (
+        ("webcam plugged in, not default", [HEADSET, WEBCAM], 0),
+        ("webcam becomes default", [WEBCAM, HEADSET], 1),
+        ("webcam unplugged", [HEADSET], 1),
+    )
+    ok = True
+    for label, devices, expected in steps:
+        rebinds = worker.rebind_count
+        backend.simulate_device_change(devices)
+        time.sleep(0.01)
+        wait_idle(worker)
+        rebinds = worker.rebind_count - rebinds
+        status = "ok" if rebinds == expected else "UNEXPECTED"
+        ok = ok and rebinds == expected and backend.bound_device_id == devices[0].id
+        print(f"{label}: rebinds={rebinds} bound={backend.bound_device_id} {status}")
+    worker.stop()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--call-latency", type=float, default=0.002, help="seconds per fake backend call")
+    args = parser.parse_args()
+
+    for mode in ("refresh", "check"):
+        elapsed, calls = run_ticks(mode, args.ticks, args.call_latency)
+        print(f"{mode:8} {elapsed / args.ticks * 1000:.2f} ms/tick, calls={calls}")
+    ok = run_hotplug(args.call_latency)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare batched multi-device mute against re-initializing each device.
+
+Usage: python benchmarks/bench_device_manager.py [--devices 3] [--call-latency 0.002] [--rounds 20]
+
+A FakeAudioBackend with --devices capture endpoints and --call-latency per
+backend call is muted and unmuted --rounds times:
+
+  naive   per device: enumerate, bind, read, write (what N calls of the old
+          initialize_audio_device + toggle would cost)
+  batched one AudioWorker.request_mute_devices() pass over the interfaces
+          DeviceManager cached when it first enumerated the devices
+
+It also checks that an external change on one device reaches the per-device
+table through its notification, without a read.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import AudioDevice, FakeAudioBackend
+from audio_worker import AudioWorker
+
+
+def make_backend(count, call_latency):
+    devices = [AudioDevice(f"fake-mic-{index}", f"Fake Microphone {index}") for index in range(count)]
+    return FakeAudioBackend(devices=devices, call_latency=call_latency)
+
+
+def run_naive(backend, rounds):
+    started = time.perf_counter()
+    for round_index in range(rounds):
+        muted = round_index % 2 == 0
+        for device in backend.devices:
+            backend.open_devices()  # Stands in for the full enumerate + activate per device
+            if backend.get_device_mute(device.id) != muted:
+                backend.set_device_mute(device.id, muted)
+        backend.close_devices()
+    return time.perf_counter() - started
+
+
+def run_batched(backend, rounds):
+    worker = AudioWorker(backend, retry_delay=0)
+    worker.start()
+    done = threading.Event()
+    try:
+        worker.request_device_refresh(lambda is_muted, error: done.set())
+        done.wait(10)
+        backend.call_counts.clear()
+        started = time.perf_counter()
+        for round_index in range(rounds):
+            done.clear()
+            worker.request_mute_devices(round_index % 2 == 0, on_done=lambda is_muted, error: done.set())
+            done.wait(10)
+        elapsed = time.perf_counter() - started
+        states = worker.device_states()
+        expected = (rounds - 1) % 2 == 0
+        assert all(device["muted"] == expected for device in states), f"unexpected table {states}"
+        backend.simulate_external_device_change(backend.devices[-1].id, not expected)
+        assert worker.device_states()[-1]["muted"] == (not expected), "notification did not update the table"
+    finally:
+        worker.stop()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=3)
+    parser.add_argument("--call-latency", type=float, default=0.002, help="seconds per fake backend call")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    backend = make_backend(args.devices, args.call_latency)
+    seconds = run_naive(backend, args.rounds)
+    print(f"naive:   {seconds / args.rounds * 1000:.2f} ms/round, calls={dict(backend.call_counts)}")
+
+    backend = make_backend(args.devices, args.call_latency)
+    seconds = run_batched(backend, args.rounds)
+    print(f"batched: {seconds / args.rounds * 1000:.2f} ms/round, calls={dict(backend.call_counts)}")
+
+
+if __name__ == "__main__":
+    main()
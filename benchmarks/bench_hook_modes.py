@@ -0,0 +1,174 @@
+"""Measure keyboard hook callback time in-process and in the hook process.
+
+Usage: python benchmarks/bench_hook_modes.py [--events 4000] [--rate 1000] [--live-objects 300000]
+
+Builds the PyQt6 app (offscreen, fake audio backend, temporary HOME) and
+feeds synthetic key events, pressing and releasing the configured hotkey:
+
+  in-process   a thread standing in for the hook thread calls the app's own
+               make_hotkey_handler() callback
+  split        HookProcess starts the real hook process with --no-hook and
+               asks it to simulate the same events on its own hook thread
+
+Each mode runs twice: with the GUI process idle, and with its main thread
+busy. The busy load allocates continuously while --live-objects objects are
+alive, so the cyclic GC keeps running full collections. Reported per run:
+
+  callback   time inside the callback
+  dispatch   from the event's due time to the callback returning, which
+             includes waiting for the GIL; this is what the OS hook timeout sees
+  forward    split mode only: key-down in the hook process to the app's
+             reader thread receiving it (this wait does not hold up the hook)
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="micmute-bench-")
+
+from metrics import REGISTRY, LatencyHistogram
+
+
+class KeyEvent:
+    __slots__ = ("scan_code", "event_type")
+
+    def __init__(self, scan_code, event_type):
+        self.scan_code = scan_code
+        self.event_type = event_type
+
+
+def busy_load(stop, live_objects):
+    """Keep this thread busy allocating while a large live set makes every full collection slow."""
+    live = [[index] for index in range(live_objects)]
+    churn = []
+    while not stop.is_set():
+        churn.append([{} for _ in range(100)])
+        if len(churn) > 1000:
+            churn.clear()
+    del live
+
+
+def with_load(busy, live_objects, run):
+    stop = threading.Event()
+    if not busy:
+        return run()
+    result, error = [None], [None]
+
+    def measured():
+        try:
+            result[0] = run()
+        except BaseException as e:
+            error[0] = e
+        finally:
+            stop.set()
+
+    thread = threading.Thread(target=measured)
+    thread.start()
+    busy_load(stop, live_objects)  # On the calling (GUI) thread, like a busy Qt event loop
+    thread.join()
+    if error[0] is not None:
+        raise error[0]
+    return result[0]
+
+
+def run_in_process(handler, codes, events, rate):
+    callback_time, dispatch_time = LatencyHistogram(), LatencyHistogram()
+    interval = 1.0 / rate
+    clock = time.perf_counter
+    start = clock()
+    for index in range(events):
+        due = start + index * interval
+        delay = due - clock()
+        if delay > 0:
+            time.sleep(delay)
+        step = index % (2 * len(codes))
+        event = KeyEvent(codes[step % len(codes)], 'down' if step < len(codes) else 'up')
+        started = clock()
+        handler(event)
+        finished = clock()
+        callback_time.record(finished - started)
+        dispatch_time.record(finished - due)
+    return callback_time.summary(), dispatch_time.summary(), None
+
+
+def run_split(process, events, rate):
+    forward = REGISTRY.histogram("hook_forward_seconds")
+    forward.reset()
+    process.stats = {}
+    process.simulate(events, rate)
+    deadline = time.monotonic() + events / rate + 10
+    while not process.stats.get("dispatch") or process.stats["dispatch"]["count"] < events:
+        if time.monotonic() > deadline:
+            raise RuntimeError("hook process did not report")
+        time.sleep(0.05)
+    stats, process.stats = process.stats, {}
+    return stats["callback"], stats["dispatch"], forward.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=4000)
+    parser.add_argument("--rate", type=float, default=1000.0, help="events per second")
+    parser.add_argument("--live-objects", type=int, default=300000)
+    args = parser.parse_args()
+
+    from PyQt6.QtCore import qInstallMessageHandler
+    from PyQt6.QtWidgets import QApplication
+    from audio_backend import FakeAudioBackend
+    from hook_process import HookProcess
+    from sound_bank import NullSoundSink
+    import mic_state_controller_pyqt as module
+
+    qInstallMessageHandler(lambda *args: None)
+    qt_app = QApplication(sys.argv[:1])
+    app = module.MicMuteApp(FakeAudioBackend(), sound_sink=NullSoundSink())
+    if app.hotkey_engine.binding("toggle_mute") is None:
+        # The keyboard library could not resolve key names (e.g. not root on Linux): use set-1 scan codes
+        app.hotkey_engine.add_binding("toggle_mute", "ctrl+alt+m", groups=((29,), (56,), (50,)))
+    hotkey, groups = app.hotkey_engine.binding("toggle_mute")
+    codes = [group[0] for group in groups]
+    handler = app.make_hotkey_handler()
+
+    process = HookProcess(lambda name, pressed_at: None, hook=False)
+    process.bind("toggle_mute", hotkey, groups)
+    process.start()
+    if not process.wait_ready(10):
+        print("hook process did not start")
+        sys.exit(1)
+
+    print(f"{args.events} events at {args.rate:.0f}/s, hotkey {hotkey}; times in ms (p50 / p99 / max)")
+    status = 0
+    try:
+        for mode in ("in-process", "split"):
+            for busy in (False, True):
+                if mode == "in-process":
+                    run = lambda: run_in_process(handler, codes, args.events, args.rate)
+                else:
+                    run = lambda: run_split(process, args.events, args.rate)
+                gc.collect()
+                callback, dispatch, forward = with_load(busy, args.live_objects, run)
+                line = f"{mode:>10} {'busy' if busy else 'idle':>4}:"
+                for label, stats in (("callback", callback), ("dispatch", dispatch), ("forward", forward)):
+                    if stats:
+                        line += f"  {label} {stats['p50_ms']:.3f} / {stats['p99_ms']:.3f} / {stats['max_ms']:.3f}"
+                print(line, flush=True)
+    except Exception as e:
+        print(f"failed: {type(e).__name__}: {e}")
+        status = 1
+    finally:
+        process.stop()
+        app.exit_app()
+        qt_app.processEvents()
+    os._exit(status)  # Skip interpreter teardown of Qt objects
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Check the hook watchdog and measure where garbage collections land.
+
+Usage: python benchmarks/bench_hook_watchdog.py [--events 5000] [--rate 1000] [--live-objects 300000]
+
+  observe    cost of HookWatchdog.observe() per hook callback
+  watchdog   scripted scenarios on a fake clock and a fake key probe: slow
+             callbacks are logged, a callback over the hook timeout and key
+             presses the hook did not see ask for a re-install, mouse-only use
+             and typing with a live hook do not, repeated re-installs back
+             off, and hosts without a key probe never report a stall. Fails
+             if any scenario does not hold.
+  gc         a thread standing in for the hook thread handles --events key
+             events at --rate while the main thread churns allocations with
+             --live-objects alive. It runs once with the default collector and
+             once with GcPolicy applied, with the main thread calling collect()
+             as the app's timer does. Reports the collections that ran on the
+             hook thread, the longest pause, and hook dispatch times (due time
+             to callback return).
+"""
+import argparse
+import gc
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gc_policy import GcPolicy
+from hook_watchdog import HookWatchdog
+from metrics import LatencyHistogram
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ListLog:
+    def __init__(self):
+        self.lines = []
+
+    def warning(self, message):
+        self.lines.append(message)
+
+
+def bench_observe(count):
+    watchdog = HookWatchdog(lambda reason: None, timeout=0.3, key_probe=lambda: None)
+    clock = time.perf_counter
+    started = clock()
+    for _ in range(count):
+        watchdog.observe(0.00002, started)
+    return (clock() - started) / count
+
+
+def scenarios():
+    results = []
+
+    def make(probe=False):
+        clock, log, reasons = FakeClock(), ListLog(), []
+        keys = [probe]  # What the next key probe reports: True (a key went down), False, or None (unknown)
+        watchdog = HookWatchdog(reasons.append, log=log, timeout=0.3, stall_after=30.0, clock=clock,
+                                key_probe=lambda: keys[0])
+        return watchdog, clock, log, reasons, keys
+
+    def advance(watchdog, clock, seconds, step=5):
+        for _ in range(int(seconds / step)):
+            clock.now += step
+            watchdog.check()
+
+    watchdog, clock, log, reasons, keys = make()
+    watchdog.observe(0.1, clock())
+    watchdog.check()
+    results.append(("slow callback is logged, no re-install", len(log.lines) == 1 and not reasons))
+
+    watchdog.observe(0.4, clock())
+    watchdog.check()
+    results.append(("callback over the hook timeout re-installs", len(reasons) == 1))
+
+    watchdog, clock, log, reasons, keys = make(probe=False)
+    watchdog.observe(0.00002, clock())
+    advance(watchdog, clock, 600)
+    results.append(("one key, then mouse only for 10 minutes: no re-install", not reasons))
+
+    watchdog, clock, log, reasons, keys = make(probe=True)
+    for _ in range(120):  # Typing for 10 minutes with a live hook
+        clock.now += 2.5
+        watchdog.observe(0.00002, clock())
+        clock.now += 2.5
+        watchdog.check()
+    results.append(("typing with a live hook: no re-install", not reasons))
+
+    watchdog, clock, log, reasons, keys = make(probe=True)
+    advance(watchdog, clock, 30)
+    results.append(("keys without hook events, shorter than stall_after", not reasons))
+    advance(watchdog, clock, 5)
+    results.append(("keys without hook events re-install", len(reasons) == 1))
+    advance(watchdog, clock, 60)
+    results.append(("repeated silence backs off", len(reasons) == 1 and watchdog.stall_after == 60.0))
+    advance(watchdog, clock, 5)
+    results.append(("and re-installs after the longer wait", len(reasons) == 2))
+    clock.now += 1
+    watchdog.observe(0.00002, clock())
+    advance(watchdog, clock, 5)
+    results.append(("key events reset the backoff", watchdog.stall_after == 30.0))
+
+    watchdog, clock, log, reasons, keys = make(probe=None)
+    advance(watchdog, clock, 3600)
+    results.append(("no key probe, no stall", not reasons))
+    return results
+
+
+class KeyEvent:
+    __slots__ = ("scan_code", "event_type")
+
+    def __init__(self, scan_code, event_type):
+        self.scan_code = scan_code
+        self.event_type = event_type
+
+
+def run_gc(events, rate, live_objects, policy):
+    hook_threads = policy.hook_threads if policy else set()
+    counts = {"hook": 0}
+    started = [0.0]
+    pauses, dispatch = LatencyHistogram(), LatencyHistogram()
+
+    def on_gc(phase, info):
+        if phase == "start":
+            started[0] = time.perf_counter()
+            return
+        pauses.record(time.perf_counter() - started[0])
+        if threading.get_ident() in hook_threads:
+            counts["hook"] += 1
+
+    gc.collect()
+    done = threading.Event()
+    pressed = {}
+
+    def hook_thread():
+        hook_threads.add(threading.get_ident())
+        interval = 1.0 / rate
+        clock = time.perf_counter
+        start = clock()
+        for index in range(events):
+            due = start + index * interval
+            delay = due - clock()
+            if delay > 0:
+                time.sleep(delay)
+            event = KeyEvent(30 + index % 4, 'down' if index % 2 == 0 else 'up')
+            # Roughly what a hook callback allocates: the event, a state update, a queued message
+            pressed[event.scan_code] = {"event": "activity", "t": due, "down": event.event_type == 'down'}
+            dispatch.record(clock() - due)
+        done.set()
+
+    live = [[index] for index in range(live_objects)]
+    if policy:
+        policy.apply()  # Freeze the live set, as the app does once startup has settled
+    gc.callbacks.append(on_gc)
+    thread = threading.Thread(target=hook_thread)
+    thread.start()
+    churn = []
+    last_tick = time.perf_counter()
+    while not done.is_set():
+        churn.append([{} for _ in range(100)])
+        if len(churn) > 1000:
+            churn.clear()
+        if policy and time.perf_counter() - last_tick >= 0.5:
+            last_tick = time.perf_counter()
+            policy.collect()
+    thread.join()
+    gc.callbacks.remove(on_gc)
+    if policy:
+        policy.remove()
+    del live, churn
+    return counts["hook"], dispatch.summary(), pauses.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=1000.0, help="events per second")
+    parser.add_argument("--live-objects", type=int, default=300000)
+    args = parser.parse_args()
+
+    print(f"observe: {bench_observe(200000) * 1e9:.0f} ns per callback")
+    ok = True
+    for label, passed in scenarios():
+        ok = ok and passed
+        print(f"watchdog: {label}: {'ok' if passed else 'FAILED'}")
+
+    print(f"gc: {args.events} events at {args.rate:.0f}/s, {args.live_objects} live objects; dispatch in ms (p50 / p99 / max)")
+    for label, policy in (("default", None), ("GcPolicy", GcPolicy())):
+        in_hook, dispatch, pauses = run_gc(args.events, args.rate, args.live_objects, policy)
+        line = (f"{label:>9}: collections on the hook thread {in_hook:>4}, dispatch "
+                f"{dispatch['p50_ms']:.3f} / {dispatch['p99_ms']:.3f} / {dispatch['max_ms']:.3f}")
+        if pauses["count"]:
+            line += f", {pauses['count']} collections, longest pause {pauses['max_ms']:.2f} ms"
+        print(line)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
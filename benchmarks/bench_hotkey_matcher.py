@@ -0,0 +1,92 @@
+"""Replay a synthetic key-event stream through the old and new hotkey matchers.
+
+Usage: python benchmarks/bench_hotkey_matcher.py [--events 1000000] [--hotkey ctrl+alt+m]
+
+Runs headless: scan codes come from a fixed US layout table instead of the
+keyboard library, and "is_pressed" for the legacy matcher is answered from the
+same pressed-key set the replay maintains.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hotkey_engine import HotkeyEngine
+
+SCAN_CODES = {
+    "ctrl": (29, 3613), "alt": (56, 3640), "shift": (42, 54), "space": (57,), "enter": (28,),
+    "backspace": (14,),
+}
+for offset, row in ((16, "qwertyuiop"), (30, "asdfghjkl"), (44, "zxcvbnm")):
+    for index, letter in enumerate(row):
+        SCAN_CODES[letter] = (offset + index,)
+
+
+def resolve(name):
+    return SCAN_CODES[name]
+
+
+def generate_events(count, seed=1234):
+    """Typing-like stream of (scan_code, is_down) with an occasional ctrl+alt+m chord."""
+    rng = random.Random(seed)
+    typing_keys = [codes[0] for name, codes in SCAN_CODES.items() if name not in ("ctrl", "alt")]
+    events = []
+    while len(events) < count:
+        if rng.random() < 0.001:
+            events.extend(((29, True), (56, True), (50, True), (50, False), (56, False), (29, False)))
+        else:
+            code = rng.choice(typing_keys)
+            events.append((code, True))
+            events.append((code, False))
+    return events[:count]
+
+
+def run_legacy(events, hotkey):
+    """The original closure: split the hotkey and call is_pressed() for every key on every event."""
+    pressed = set()
+
+    def is_pressed(name):
+        return any(code in pressed for code in resolve(name))
+
+    matches = 0
+    start = time.perf_counter()
+    for scan_code, is_down in events:
+        if is_down:
+            pressed.add(scan_code)
+        else:
+            pressed.discard(scan_code)
+        keys = hotkey.split('+')
+        if all(is_pressed(key.strip()) for key in keys):
+            matches += 1
+    return time.perf_counter() - start, matches
+
+
+def run_engine(events, hotkey):
+    engine = HotkeyEngine(resolver=resolve)
+    engine.add_binding("toggle_mute", hotkey)
+    feed = engine.feed
+    matches = 0
+    start = time.perf_counter()
+    for scan_code, is_down in events:
+        if feed(scan_code, is_down) is not None:
+            matches += 1
+    return time.perf_counter() - start, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--hotkey", default="ctrl+alt+m")
+    args = parser.parse_args()
+
+    events = generate_events(args.events)
+    for label, runner in (("legacy", run_legacy), ("engine", run_engine)):
+        elapsed, matches = runner(events, args.hotkey)
+        print(f"{label:>7}: {elapsed:.3f} s total, {elapsed / len(events) * 1e9:7.1f} ns/event, {matches} matches")
+
+
+if __name__ == "__main__":
+    main()
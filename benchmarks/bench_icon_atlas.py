@@ -0,0 +1,91 @@
+"""Measure the overlay icon atlas: first-run rendering against later starts.
+
+Usage: python benchmarks/bench_icon_atlas.py [--rounds 20]
+
+Uses a temporary cache directory. Reports:
+
+  cold render   rasterizing every atlas size and saving the file, as on the
+                very first start (cairosvg when available, else the built-in
+                rasterizer; both are timed per size when cairosvg is present)
+  warm load     reading the saved atlas, as on every later start
+  first icon    warm load plus tinting and PNG-encoding one state, which is
+                what the Tkinter overlay needs before it can show
+  size change   PNG for a size not used yet (the atlas mask is already loaded)
+
+Exits non-zero if a warm load rasterizes anything.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import icon_atlas
+from icon_atlas import ATLAS_SIZES, MUTED_OVERLAY_SVG, IconAtlas
+
+
+def best_ms(function, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    cache_dir = tempfile.mkdtemp(prefix="micmute-atlas-")
+
+    try:
+        icon_atlas._rasterize_cairo(MUTED_OVERLAY_SVG, 16)
+        cairo = True
+    except (ImportError, OSError):
+        cairo = False
+    print("per size (ms):  size  python" + ("   cairo" if cairo else "  (cairosvg unavailable)"))
+    for size in ATLAS_SIZES:
+        line = f"{'':16}{size:4d} {best_ms(lambda: icon_atlas.rasterize_python(MUTED_OVERLAY_SVG, size), max(1, args.rounds // 4)):7.2f}"
+        if cairo:
+            line += f" {best_ms(lambda: icon_atlas._rasterize_cairo(MUTED_OVERLAY_SVG, size), max(1, args.rounds // 4)):7.2f}"
+        print(line)
+
+    started = time.perf_counter()
+    atlas = IconAtlas(MUTED_OVERLAY_SVG, cache_dir)
+    atlas.load()
+    atlas.prerender()
+    cold_ms = (time.perf_counter() - started) * 1000
+    renderers = sorted(set(atlas.renderers.values()))
+    print(f"cold render:  {cold_ms:8.2f} ms  ({atlas.rasterized} sizes, {', '.join(renderers)}; "
+          f"{os.path.getsize(atlas.path)} byte file)")
+
+    rasterized = []
+
+    def warm_load():
+        warm = IconAtlas(MUTED_OVERLAY_SVG, cache_dir)
+        warm.load()
+        warm.png("muted", 48)
+        rasterized.append(warm.rasterized)
+        return warm
+
+    load_ms = best_ms(lambda: IconAtlas(MUTED_OVERLAY_SVG, cache_dir).load(), args.rounds)
+    first_icon_ms = best_ms(warm_load, args.rounds)
+    warm = warm_load()
+
+    def size_change():
+        warm._pngs.clear()
+        warm.png("muted", 96)
+
+    change_ms = best_ms(size_change, args.rounds)
+    print(f"warm load:    {load_ms:8.3f} ms")
+    print(f"first icon:   {first_icon_ms:8.3f} ms")
+    print(f"size change:  {change_ms:8.3f} ms")
+    print(f"rasterizations after a warm load: {max(rasterized)}")
+    sys.exit(0 if max(rasterized) == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Measure the cost of log calls on hot paths.
+
+Usage: python benchmarks/bench_logging.py [--calls 200000]
+
+Times, per call on the calling thread:
+
+  print            the old print(f"[INFO] ...") to a file (os.devnull)
+  debug disabled   log.debug("...: %s", value) with the level at INFO
+  info enabled     log.info("...: %s", value) through the QueueHandler, with
+                   the rotating file written by the listener thread
+
+Logging goes to a temporary directory. The enabled case is a worst-case
+burst: the listener thread writes the file while the loop keeps logging, so
+both compete for the GIL.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_logging
+
+
+def per_call_ns(function, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="micmute-log-")
+    try:
+        app_logging.setup_logging(directory, level="INFO", console=False, max_bytes=4 * 1024 * 1024)
+        log = app_logging.get_logger("bench")
+        status = "Muted"
+        with open(os.devnull, "w") as devnull:
+            print_ns = per_call_ns(lambda: print(f"[INFO] Overlay shown: {status}", file=devnull), args.calls)
+        disabled_ns = per_call_ns(lambda: log.debug("Overlay shown: %s", status), args.calls)
+        enabled_ns = per_call_ns(lambda: log.info("Overlay shown: %s", status), args.calls)
+        app_logging.shutdown_logging()
+        size = os.path.getsize(os.path.join(directory, app_logging.LOG_FILE_NAME))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    print(f"print:          {print_ns:8.0f} ns/call")
+    print(f"debug disabled: {disabled_ns:8.0f} ns/call")
+    print(f"info enabled:   {enabled_ns:8.0f} ns/call (log file {size / 1024:.0f} KiB after rotation)")
+
+
+if __name__ == "__main__":
+    main()
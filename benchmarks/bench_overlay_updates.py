@@ -0,0 +1,107 @@
+"""Count overlay window creations and SVG rasterizations across settings changes.
+
+Usage: python benchmarks/bench_overlay_updates.py [--changes 1000]
+
+Replays random position/size/margin/opacity changes against the overlay with
+the Qt offscreen platform, letting the event loop paint after each change.
+"legacy" rebuilds the window and re-renders the SVG on every paint like the
+old update_overlay/paintEvent did; "cached" is the persistent OverlayWidget.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import QRectF, Qt, qInstallMessageHandler
+from PyQt6.QtGui import QPainter
+from PyQt6.QtSvg import QSvgRenderer
+from PyQt6.QtWidgets import QApplication, QWidget
+
+from icon_atlas import MUTED_OVERLAY_SVG
+from mic_state_controller_pyqt import OverlayWidget
+
+POSITIONS = ["Top Left", "Top Mid", "Top Right", "Middle Left", "Middle Right",
+             "Bottom Left", "Bottom Mid", "Bottom Right"]
+SCREEN_SIZE = (1920, 1080)
+
+
+class LegacyOverlayWidget(QWidget):
+    """The pre-cache overlay: new window per change, SVG rendered on every paint."""
+    instances_created = 0
+    rasterize_count = 0
+
+    def __init__(self, svg_code, size, opacity, position, margin):
+        super().__init__(None)
+        LegacyOverlayWidget.instances_created += 1
+        self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Tool)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.renderer = QSvgRenderer(svg_code.encode('utf-8'))
+        self.setFixedSize(size, size)
+        self.setWindowOpacity(opacity)
+        self.move(margin, margin)
+
+    def paintEvent(self, event):
+        LegacyOverlayWidget.rasterize_count += 1
+        painter = QPainter(self)
+        self.renderer.render(painter, QRectF(self.rect()))
+
+
+def generate_changes(count, seed=42):
+    rng = random.Random(seed)
+    return [(str(rng.choice((32, 48, 64))), rng.randint(10, 100) / 100.0, rng.choice(POSITIONS), rng.randint(0, 50))
+            for _ in range(count)]
+
+
+def run_legacy(app, changes):
+    overlay = None
+    start = time.perf_counter()
+    for size, opacity, position, margin in changes:
+        if overlay:
+            overlay.close()
+            overlay.deleteLater()
+        overlay = LegacyOverlayWidget(MUTED_OVERLAY_SVG, int(size), opacity, position, margin)
+        overlay.show()
+        overlay.repaint()
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    overlay.close()
+    return elapsed, LegacyOverlayWidget.instances_created, LegacyOverlayWidget.rasterize_count
+
+
+def run_cached(app, changes):
+    overlay = None
+    start = time.perf_counter()
+    for size, opacity, position, margin in changes:
+        if overlay is None:
+            overlay = OverlayWidget(MUTED_OVERLAY_SVG, size, opacity, position, margin, SCREEN_SIZE)
+            overlay.show()
+        else:
+            overlay.apply_settings(size, opacity, position, margin, SCREEN_SIZE)
+        overlay.repaint()
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    overlay.close()
+    return elapsed, OverlayWidget.instances_created, overlay.rasterize_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--changes", type=int, default=1000)
+    args = parser.parse_args()
+
+    # The offscreen platform warns about every opacity/size-hint call; keep the report readable
+    qInstallMessageHandler(lambda mode, context, message: None)
+    app = QApplication.instance() or QApplication(sys.argv)
+    changes = generate_changes(args.changes)
+    for label, runner in (("legacy", run_legacy), ("cached", run_cached)):
+        elapsed, windows, rasterizations = runner(app, changes)
+        print(f"{label:>6}: {elapsed * 1000 / len(changes):.3f} ms/change, "
+              f"{windows} window creations, {rasterizations} rasterizations")
+
+
+if __name__ == "__main__":
+    main()
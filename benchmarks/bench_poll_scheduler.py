@@ -0,0 +1,117 @@
+"""Compare fixed-rate polling with PollScheduler on a simulated day.
+
+Usage: python benchmarks/bench_poll_scheduler.py [--hours 8] [--toggles-per-hour 20]
+                                                 [--external-per-hour 6] [--key-fraction 0.5]
+                                                 [--locked-fraction 0.2] [--seed 0]
+
+Runs on a simulated clock, so it finishes in well under a second. Over
+--hours, the user toggles at random times, external mutes (e.g. the keyboard
+mute key) happen at random times, and for --locked-fraction of the time the
+session is locked. --key-fraction of the external changes come from a key
+press, which the PyQt6 keyboard hook uses to wake an idle poller
+(PollScheduler.idle). For fixed 100 ms polling and for the scheduler with
+default settings it reports polls per hour and the delay between each
+external change and the poll that saw it. Changes made while locked count
+from the unlock, since nobody could see them before.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import LatencyHistogram
+from poll_scheduler import PollScheduler
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_day(hours, toggles_per_hour, external_per_hour, key_fraction, locked_fraction, seed):
+    rng = random.Random(seed)
+    length = hours * 3600.0
+    toggles = sorted(rng.uniform(0, length) for _ in range(int(hours * toggles_per_hour)))
+    external = sorted(rng.uniform(0, length) for _ in range(int(hours * external_per_hour)))
+    key_presses = [changed_at for changed_at in external if rng.random() < key_fraction]
+    # One locked stretch per hour, covering locked_fraction of it
+    locks = []
+    for hour in range(int(hours)):
+        start = hour * 3600.0 + rng.uniform(0, 3600.0 * (1 - locked_fraction))
+        locks.append((start, start + 3600.0 * locked_fraction))
+    return length, toggles, external, key_presses, locks
+
+
+def simulate(length, toggles, external, key_presses, locks, scheduler=None, fixed_ms=100):
+    """Returns (polls, detection delays)."""
+    clock = scheduler.clock if scheduler else SimulatedClock()
+    delays = LatencyHistogram()
+    polls = 0
+    pending = list(external)
+    toggle_index = 0
+    lock_index = 0
+    while clock.now < length:
+        locked = lock_index < len(locks) and locks[lock_index][0] <= clock.now < locks[lock_index][1]
+        if lock_index < len(locks) and clock.now >= locks[lock_index][1]:
+            lock_index += 1
+        if scheduler:
+            scheduler.set_paused(locked)
+            while toggle_index < len(toggles) and toggles[toggle_index] <= clock.now:
+                toggle_index += 1
+                scheduler.note_activity()
+        if scheduler and locked:
+            clock.now = locks[lock_index][1]  # Resumes on the unlock notification
+            continue
+        polls += 1
+        if scheduler:
+            scheduler.poll_started()
+        seen = False
+        while pending and pending[0] <= clock.now:
+            changed_at = pending.pop(0)
+            visible_from = max([changed_at] + [end for start, end in locks if start <= changed_at < end])
+            delays.record(max(0.0, clock.now - visible_from))
+            seen = True
+        if scheduler:
+            if seen:
+                scheduler.external_change()
+            next_poll = clock.now + scheduler.next_interval() / 1000.0
+            for pressed_at in key_presses:
+                if clock.now < pressed_at < next_poll and scheduler.idle:
+                    # The hook posts a wake-up; the poll is brought forward to the fast interval
+                    scheduler.note_activity()
+                    next_poll = min(next_poll, pressed_at + scheduler.fast_interval / 1000.0)
+                    break
+            clock.now = next_poll
+        else:
+            clock.now += fixed_ms / 1000.0
+    return polls, delays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=8.0)
+    parser.add_argument("--toggles-per-hour", type=float, default=20.0)
+    parser.add_argument("--external-per-hour", type=float, default=6.0)
+    parser.add_argument("--key-fraction", type=float, default=0.5)
+    parser.add_argument("--locked-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    day = make_day(args.hours, args.toggles_per_hour, args.external_per_hour, args.key_fraction,
+                   args.locked_fraction, args.seed)
+    runs = (("fixed 100 ms", None), ("adaptive", PollScheduler(clock=SimulatedClock())))
+    for label, scheduler in runs:
+        polls, delays = simulate(*day, scheduler=scheduler)
+        stats = delays.summary()
+        print(f"{label:>12}: {polls / args.hours:8.0f} polls/hour, detection delay "
+              f"p50={stats['p50_ms']:.0f} ms p99={stats['p99_ms']:.0f} ms max={stats['max_ms']:.0f} ms "
+              f"({stats['count']} external changes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Check that a Tkinter mute/unmute is a pure overlay show/hide.
+
+Usage: python benchmarks/bench_tk_mute_path.py [--toggles 2000] [--budget-ms 2] [--fake-tk]
+
+Starts the Tkinter front end on a fake audio backend with a temporary HOME
+and flips the mute state --toggles times, alternating between toggle_mute()
+(drained at once with process_commands()) and polled external changes
+(update_status()). Fails when any toggle:
+
+  wrote the config    ConfigWriter.write_count moved, a save is pending, or
+                      config.json's mtime changed
+  moved the overlay   overlay.geometry() was called with a geometry
+  pumped the loop     overlay.update() or root.update() was called re-entrantly
+  was slow            p99 time per toggle above --budget-ms
+
+Each toggle is followed by update_idletasks() so the show/hide is really
+applied; that cost is included in the timing.
+
+pystray and PIL are replaced by recording fakes when they are not installed,
+and Tk is too when it cannot open a display (on Linux, Xvfb is tried first)
+or with --fake-tk; see tk_fakes.py. On fake Tk the timing only covers the
+app's own code. The script exits non-zero if the check cannot run.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tk_fakes
+
+
+def count_calls(obj, name, counts, writes_only=False):
+    """Count obj.name() calls in counts[name]; with writes_only, only calls that pass arguments."""
+    original = getattr(obj, name)
+
+    def counted(*args, **kwargs):
+        if args or kwargs or not writes_only:
+            counts[name] = counts.get(name, 0) + 1
+        return original(*args, **kwargs)
+    setattr(obj, name, counted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toggles", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=2.0)
+    parser.add_argument("--fake-tk", action="store_true", help="use the recording Tk even where a display is available")
+    args = parser.parse_args()
+
+    os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="micmute-bench-")
+    faked = tk_fakes.install(force=args.fake_tk)
+    try:
+        import tkinter as tk
+        import mic_state_controller_tkinter as module
+    except ImportError as e:
+        print(f"cannot run: {type(e).__name__}: {e}")
+        tk_fakes.stop_display()
+        sys.exit(2)
+    from audio_backend import FakeAudioBackend
+    from metrics import LatencyHistogram
+    from sound_bank import NullSoundSink
+
+    print(f"faked: {', '.join(faked) or 'nothing'}")
+    try:
+        root = tk.Tk()
+        backend = FakeAudioBackend()
+        app = module.MicMuteApp(root, audio_backend=backend, sound_sink=NullSoundSink())
+        root.update()
+        app.config_writer.flush()
+        config_path = app.get_resource_path("config.json", writable=True)
+        mtime = os.stat(config_path).st_mtime_ns if os.path.exists(config_path) else None
+        writes = app.config_writer.write_count
+        pumps, moves = {}, {}
+        count_calls(app.overlay, "update", pumps)
+        count_calls(root, "update", pumps)
+        count_calls(app.overlay, "geometry", moves, writes_only=True)
+
+        latency = LatencyHistogram()
+        for index in range(args.toggles):
+            started = time.perf_counter()
+            if index % 2:
+                app.toggle_mute()
+                app.process_commands()  # What the posted <<MicMuteCommand>> event runs
+            else:
+                backend.muted = not backend.muted  # An external change, seen by the next poll
+                app.update_status()
+            root.update_idletasks()
+            latency.record(time.perf_counter() - started)
+        app.config_writer.flush()
+
+        written = app.config_writer.write_count - writes
+        touched = os.path.exists(config_path) and os.stat(config_path).st_mtime_ns != mtime
+        stats = latency.summary()
+        ok = not written and not touched and not moves and not pumps and stats["p99_ms"] <= args.budget_ms
+        print(f"toggles: {stats['count']}, p50={stats['p50_ms']:.3f} ms p99={stats['p99_ms']:.3f} ms "
+              f"max={stats['max_ms']:.3f} ms (budget {args.budget_ms} ms at p99)")
+        print(f"config writes: {written}, config.json touched: {touched}, "
+              f"overlay geometry writes: {sum(moves.values())}, re-entrant update() calls: {sum(pumps.values())}")
+        app.exit_app()
+    finally:
+        tk_fakes.stop_display()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+"""Headless benchmark suite for the toggle pipeline of both front ends.
+
+Usage:
+  python benchmarks/suite.py [--only pyqt.toggle_latency,...] [--quick]
+                             [--output results.json] [--baseline baseline.json]
+                             [--threshold 0.25] [--save-baseline baseline.json]
+
+Every benchmark runs in its own child process with a temporary home
+directory, the Qt offscreen platform, FakeAudioBackend and NullSoundSink, so
+no settings, microphone or speakers are touched. For each front end
+(pyqt.*, tkinter.*) it measures:
+
+  hotkey_dispatch   cost of the keyboard hook callback per key event
+  toggle_latency    hotkey-to-overlay and hotkey-to-SetMute latency
+  poll_overhead     CPU time per second spent polling the mute state
+  overlay_update    cost of showing/hiding the overlay on a state change
+  config_save_load  queueing a save, writing the file, loading it back
+  cold_start        launch to first mute state, in a fresh process
+
+Benchmarks that cannot run on this host (no display for Tk, a missing
+optional package) are reported as skipped. Results are written as JSON. With
+--baseline, every metric is compared with the saved run and the script exits
+non-zero when one got slower by more than --threshold (25% by default).
+Metrics are durations, so lower is better; "info" values are reported but
+never compared.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+TYPING_SCAN_CODES = list(range(16, 26)) + list(range(30, 39)) + list(range(44, 50))
+CHORD = ((29, True), (56, True), (50, True), (50, False), (56, False), (29, False))  # ctrl+alt+m
+SCAN_CODES = {"ctrl": (29, 3613), "alt": (56, 3640), "m": (50,)}
+
+
+class Skip(Exception):
+    """Raised by a benchmark that cannot run on this host."""
+
+
+class KeyEvent:
+    __slots__ = ("scan_code", "event_type")
+
+    def __init__(self, scan_code, is_down):
+        self.scan_code = scan_code
+        self.event_type = "down" if is_down else "up"
+
+
+def histogram_ms(histogram, prefix):
+    stats = histogram.summary()
+    return {f"{prefix}_p50_ms": stats["p50_ms"], f"{prefix}_p99_ms": stats["p99_ms"]}
+
+
+def wait_until(condition, timeout, pump):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise RuntimeError("timed out")
+        pump()
+
+
+# PyQt6 front end
+
+def pyqt_app(notifications=True):
+    try:
+        from PyQt6.QtCore import qInstallMessageHandler
+        from PyQt6.QtWidgets import QApplication
+        import mic_state_controller_pyqt as module
+    except ImportError as e:
+        raise Skip(f"{type(e).__name__}: {e}")
+    from audio_backend import FakeAudioBackend
+    from sound_bank import NullSoundSink
+    qInstallMessageHandler(lambda mode, context, message: None)
+    qt_app = QApplication.instance() or QApplication([])
+    backend = FakeAudioBackend(notifications=notifications)
+    app = module.MicMuteApp(audio_backend=backend, sound_sink=NullSoundSink())
+    wait_until(lambda: app.last_mute_state is not None, 5.0, qt_app.processEvents)
+    app.finish_startup()
+    qt_app.processEvents()
+    return qt_app, app, backend
+
+
+def pyqt_hotkey_dispatch(scale):
+    from hotkey_engine import HotkeyEngine
+    qt_app, app, _ = pyqt_app()
+    app.hotkey_engine = HotkeyEngine(resolver=SCAN_CODES.__getitem__)
+    app.hotkey_engine.add_binding("toggle_mute", "ctrl+alt+m")
+    handler = app.make_hotkey_handler()
+    typing = [KeyEvent(code, is_down) for code in TYPING_SCAN_CODES for is_down in (True, False)]
+    rounds = int(20000 * scale)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for event in typing:
+            handler(event)
+    typing_ns = (time.perf_counter() - started) / (rounds * len(typing)) * 1e9
+    chord = [KeyEvent(code, is_down) for code, is_down in CHORD]
+    chords = int(2000 * scale)
+    started = time.perf_counter()
+    for _ in range(chords):
+        for event in chord:
+            handler(event)
+    chord_ns = (time.perf_counter() - started) / chords * 1e9
+    app.exit_app()
+    return {"typing_event_ns": typing_ns, "hotkey_chord_ns": chord_ns}, {"chords": chords}
+
+
+def pyqt_toggle_latency(scale):
+    from metrics import LatencyHistogram
+    qt_app, app, _ = pyqt_app()
+    app.debounce_interval = 0
+    committed = threading.Event()
+    commit_latency = LatencyHistogram()
+    pressed = [0.0]
+
+    def on_state(is_muted, source):
+        if source == "command":
+            commit_latency.record(time.perf_counter() - pressed[0])
+            committed.set()
+
+    app.audio_worker.add_state_listener(on_state)
+    app.toggle_latency.reset()
+    for _ in range(int(200 * scale)):
+        committed.clear()
+        pressed[0] = time.perf_counter()
+        app.trigger_toggle_mute.emit(pressed[0])
+        wait_until(lambda: committed.is_set() and not app.debounce_timer.isActive(), 5.0, qt_app.processEvents)
+    metrics = histogram_ms(app.toggle_latency, "overlay")
+    metrics.update(histogram_ms(commit_latency, "set_mute"))
+    app.exit_app()
+    return metrics, {"toggles": commit_latency.count}
+
+
+def pyqt_poll_overhead(scale):
+    from PyQt6.QtCore import QTimer
+    from metrics import REGISTRY
+    qt_app, app, _ = pyqt_app(notifications=False)
+    seconds = 3.0 * scale
+    ticks = REGISTRY.counter("poll_ticks_total")
+    ticks_before = ticks.value
+    cpu_before = time.process_time()
+    QTimer.singleShot(int(seconds * 1000), qt_app.quit)
+    qt_app.exec()
+    cpu = time.process_time() - cpu_before
+    polls = ticks.value - ticks_before
+    app.exit_app()
+    return {"cpu_ms_per_s": cpu * 1000 / seconds}, {"polls_per_s": polls / seconds}
+
+
+def pyqt_overlay_update(scale):
+    qt_app, app, _ = pyqt_app()
+    changes = int(500 * scale)
+    started = time.perf_counter()
+    for index in range(changes):
+        app.update_status(index % 2 == 0)
+        qt_app.processEvents()
+    toggle_us = (time.perf_counter() - started) / changes * 1e6
+    positions = ("Top Left", "Top Mid", "Bottom Right", "Middle Left")
+    started = time.perf_counter()
+    for index in range(changes):
+        app.config.overlay_position = positions[index % len(positions)]
+        app.config.overlay_size = 32 + 16 * (index % 3)
+        app.update_overlay()
+        qt_app.processEvents()
+    settings_us = (time.perf_counter() - started) / changes * 1e6
+    app.exit_app()
+    return {"state_change_us": toggle_us, "settings_change_us": settings_us}, {"changes": changes}
+
+
+def pyqt_config_save_load(scale):
+    qt_app, app, _ = pyqt_app()
+    return config_save_load(app, scale)
+
+
+def pyqt_cold_start(scale):
+    started = time.perf_counter()
+    try:
+        from PyQt6.QtWidgets import QApplication
+        import mic_state_controller_pyqt  # noqa: F401 (import time is part of the start)
+    except ImportError as e:
+        raise Skip(f"{type(e).__name__}: {e}")
+    imported = time.perf_counter()
+    qt_app, app, _ = pyqt_app()
+    ready = time.perf_counter()
+    app.exit_app()
+    return {"import_ms": (imported - started) * 1000, "ready_ms": (ready - started) * 1000}, {}
+
+
+# Tkinter front end
+
+def tk_app(notifications=True):
+    try:
+        import tkinter as tk
+        import mic_state_controller_tkinter as module
+    except ImportError as e:
+        raise Skip(f"{type(e).__name__}: {e}")
+    from audio_backend import FakeAudioBackend
+    from sound_bank import NullSoundSink
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise Skip(f"no display for Tk: {e}")
+    backend = FakeAudioBackend(notifications=notifications)
+    app = module.MicMuteApp(root, audio_backend=backend, sound_sink=NullSoundSink())
+    root.update()
+    return root, app, backend
+
+
+def tk_hotkey_dispatch(scale):
+    raise Skip("the Tkinter app registers keyboard.add_hotkey; matching happens inside the keyboard library")
+
+
+def tk_toggle_latency(scale):
+    from metrics import LatencyHistogram
+    root, app, _ = tk_app()
+    latency = LatencyHistogram()
+    for _ in range(int(200 * scale)):
+        expected = not app.last_mute_state
+        started = time.perf_counter()
+        app.toggle_mute()
+        # toggle_mute only posts; the wake thread's <<MicMuteCommand>> reaches the loop asynchronously
+        while app.last_mute_state != expected:
+            if time.perf_counter() - started > 1.0:
+                app.exit_app()
+                raise RuntimeError("a toggle was not applied within 1 s")
+            root.update()
+        latency.record(time.perf_counter() - started)
+    app.exit_app()
+    # The command batch calls SetMute and redraws in one pass, so both latencies end at the same point
+    return histogram_ms(latency, "overlay"), {"toggles": latency.count}
+
+
+def tk_poll_overhead(scale):
+    root, app, backend = tk_app(notifications=False)
+    seconds = 3.0 * scale
+    reads_before = backend.call_counts["get_mute"]
+    cpu_before = time.process_time()
+    root.after(int(seconds * 1000), root.quit)
+    root.mainloop()
+    cpu = time.process_time() - cpu_before
+    polls = backend.call_counts["get_mute"] - reads_before
+    app.exit_app()
+    return {"cpu_ms_per_s": cpu * 1000 / seconds}, {"polls_per_s": polls / seconds}
+
+
+def tk_overlay_update(scale):
+    root, app, backend = tk_app()
+    changes = int(500 * scale)
+    started = time.perf_counter()
+    for index in range(changes):
+        backend.muted = index % 2 == 0
+        app.update_status()
+        root.update()
+    toggle_us = (time.perf_counter() - started) / changes * 1e6
+    positions = ("Top Left", "Top Mid", "Bottom Right", "Middle Left")
+    started = time.perf_counter()
+    for index in range(changes):
+        app.position_var.set(positions[index % len(positions)])
+        app.update_overlay_position(app.position_var.get())
+        root.update()
+    settings_us = (time.perf_counter() - started) / changes * 1e6
+    app.exit_app()
+    return {"state_change_us": toggle_us, "settings_change_us": settings_us}, {"changes": changes}
+
+
+def tk_config_save_load(scale):
+    root, app, _ = tk_app()
+    return config_save_load(app, scale)
+
+
+def tk_cold_start(scale):
+    started = time.perf_counter()
+    try:
+        import tkinter  # noqa: F401
+        import mic_state_controller_tkinter  # noqa: F401
+    except ImportError as e:
+        raise Skip(f"{type(e).__name__}: {e}")
+    imported = time.perf_counter()
+    root, app, _ = tk_app()
+    ready = time.perf_counter()  # The Tk constructor reads the mute state synchronously
+    app.exit_app()
+    return {"import_ms": (imported - started) * 1000, "ready_ms": (ready - started) * 1000}, {}
+
+
+def config_save_load(app, scale):
+    """Shared by both front ends: save_config() on the UI thread, the write, and load_config()."""
+    rounds = int(200 * scale)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        app.save_config()
+    save_us = (time.perf_counter() - started) / rounds * 1e6
+    writes = app.config_writer.write_count
+    started = time.perf_counter()
+    for index in range(rounds):
+        snapshot = app.config.to_dict()
+        snapshot["overlay_margin"] = index % 50  # Unchanged content would be skipped, not written
+        app.config_writer.save(snapshot)
+        app.config_writer.flush()
+    write_ms = (time.perf_counter() - started) / rounds * 1000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        app.load_config()
+    load_us = (time.perf_counter() - started) / rounds * 1e6
+    info = {"files_written": app.config_writer.write_count - writes}
+    app.exit_app()
+    return {"save_call_us": save_us, "write_ms": write_ms, "load_us": load_us}, info
+
+
+BENCHMARKS = {
+    "pyqt.hotkey_dispatch": pyqt_hotkey_dispatch,
+    "pyqt.toggle_latency": pyqt_toggle_latency,
+    "pyqt.poll_overhead": pyqt_poll_overhead,
+    "pyqt.overlay_update": pyqt_overlay_update,
+    "pyqt.config_save_load": pyqt_config_save_load,
+    "pyqt.cold_start": pyqt_cold_start,
+    "tkinter.hotkey_dispatch": tk_hotkey_dispatch,
+    "tkinter.toggle_latency": tk_toggle_latency,
+    "tkinter.poll_overhead": tk_poll_overhead,
+    "tkinter.overlay_update": tk_overlay_update,
+    "tkinter.config_save_load": tk_config_save_load,
+    "tkinter.cold_start": tk_cold_start,
+}
+
+
+def run_child(name, scale):
+    """Run one benchmark in this process and print its result as the last stdout line."""
+    try:
+        metrics, info = BENCHMARKS[name](scale)
+        result = {"status": "ok", "metrics": metrics, "info": info}
+    except Skip as e:
+        result = {"status": "skipped", "reason": str(e)}
+    except Exception as e:
+        result = {"status": "error", "reason": f"{type(e).__name__}: {e}"}
+    sys.stdout.write("\n" + json.dumps(result) + "\n")
+    sys.stdout.flush()
+    os._exit(0)  # Skip interpreter teardown of Qt/Tk objects; it is not part of any benchmark
+
+
+def run_benchmark(name, scale, home):
+    env = dict(os.environ, HOME=home, USERPROFILE=home, QT_QPA_PLATFORM="offscreen", SDL_AUDIODRIVER="dummy")
+    started = time.perf_counter()
+    try:
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, "--scale", str(scale)],
+                                   env=env, capture_output=True, text=True, timeout=300)
+    except subprocess.TimeoutExpired:
+        return {"status": "error", "reason": "timed out"}
+    wall_ms = (time.perf_counter() - started) * 1000
+    lines = completed.stdout.strip().splitlines()
+    try:
+        result = json.loads(lines[-1])
+    except (IndexError, ValueError):
+        tail = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+        return {"status": "error", "reason": f"exit code {completed.returncode}: {tail}"}
+    if result["status"] == "ok" and name.endswith(".cold_start"):
+        result["metrics"]["process_ms"] = wall_ms
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Return (rows, regressions) comparing every metric present in both runs."""
+    rows, regressions = [], []
+    for name, result in results["benchmarks"].items():
+        old = baseline.get("benchmarks", {}).get(name, {})
+        for metric, value in result.get("metrics", {}).items():
+            previous = old.get("metrics", {}).get(metric)
+            if previous is None or value is None:
+                continue
+            change = (value - previous) / previous if previous else 0.0
+            regressed = change > threshold
+            rows.append((f"{name}.{metric}", previous, value, change, regressed))
+            if regressed:
+                regressions.append(f"{name}.{metric}")
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", help="comma-separated benchmark names or prefixes (e.g. pyqt)")
+    parser.add_argument("--quick", action="store_true", help="run each benchmark at a fifth of its size")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before a metric is flagged")
+    parser.add_argument("--save-baseline", help="also write the results to this path")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--scale", type=float, default=1.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.scale)
+
+    names = list(BENCHMARKS)
+    if args.only:
+        wanted = [item.strip() for item in args.only.split(",") if item.strip()]
+        names = [name for name in names if any(name == item or name.startswith(item + ".") for item in wanted)]
+    scale = 0.2 if args.quick else 1.0
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "benchmarks": {},
+    }
+    home = tempfile.mkdtemp(prefix="micmute-bench-")
+    try:
+        for name in names:
+            result = run_benchmark(name, scale, home)
+            results["benchmarks"][name] = result
+            if result["status"] != "ok":
+                print(f"{name:<26} {result['status']}: {result['reason']}")
+                continue
+            values = ", ".join(f"{metric}={value:.3f}" for metric, value in result["metrics"].items())
+            info = ", ".join(f"{key}={value:g}" for key, value in result["info"].items())
+            print(f"{name:<26} {values}" + (f"  ({info})" if info else ""))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != scale:
+            print(f"Warning: baseline was run with scale {baseline.get('scale')}, this run with {scale}")
+        rows, regressions = compare(results, baseline, args.threshold)
+        print(f"\nCompared with {args.baseline} (threshold +{args.threshold:.0%}):")
+        for metric, previous, value, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"  {metric:<48} {previous:10.3f} -> {value:10.3f} ({change:+.0%}){flag}")
+        if regressions:
+            print(f"{len(regressions)} regression(s)")
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""Recording stand-ins for Tk, pystray and PIL so the Tkinter benchmarks run on any host.
+
+install() puts a fake into sys.modules for every package the Tkinter front end
+cannot use here: pystray and PIL when they are not installed, and tkinter
+(with ttk, messagebox and filedialog) when Tk cannot open a display, even
+after trying Xvfb. Call it before importing mic_state_controller_tkinter;
+install(force=True) fakes tkinter even where a display is available.
+
+The fakes keep what the benchmarks check:
+
+  widgets     every method call is appended to widget.calls as (name, args,
+              kwargs); options given to the constructor, config() and
+              configure() are returned by cget()
+  Tk          after(), after_idle() and after_cancel() are run by update(),
+              update_idletasks() and mainloop(); event_generate() may be
+              called from any thread and runs the handler bound to the
+              sequence on the loop, as Tk does
+  pystray     Icon.run() blocks until stop(); update_menu() calls are counted
+  PIL         images record their drawing operations
+"""
+import heapq
+import importlib
+import itertools
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import types
+
+SCREEN_SIZE = (1920, 1080)
+
+_display_server = None
+
+
+def start_display():
+    """Start Xvfb on Linux when there is no display. Returns the process, or None."""
+    global _display_server
+    if sys.platform == "win32" or os.environ.get("DISPLAY") or not shutil.which("Xvfb"):
+        return None
+    display = ":97"
+    _display_server = subprocess.Popen(["Xvfb", display, "-screen", "0", "1920x1080x24"],
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    time.sleep(0.5)
+    return _display_server
+
+
+def stop_display():
+    global _display_server
+    if _display_server is not None:
+        _display_server.terminate()
+        _display_server = None
+
+
+def install(force=False):
+    """Fake what this host lacks; returns the names of the faked packages."""
+    faked = []
+    for name, build in (("pystray", _pystray_module), ("PIL", _pil_modules)):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            sys.modules.update(build())
+            faked.append(name)
+    if force or not _tk_usable():
+        sys.modules.update(_tkinter_modules())
+        faked.append("tkinter")
+    return faked
+
+
+def _tk_usable():
+    try:
+        import tkinter
+    except ImportError:
+        return False
+    start_display()
+    try:
+        tkinter.Tk().destroy()
+    except tkinter.TclError:
+        stop_display()
+        return False
+    return True
+
+
+# --- tkinter ---------------------------------------------------------------
+
+class TclError(Exception):
+    pass
+
+
+class Event:
+    def __init__(self, widget):
+        self.widget = widget
+
+
+class Loop:
+    """The event loop behind a fake Tk root: timers, idle callbacks and cross-thread events."""
+
+    def __init__(self):
+        self.lock = threading.Condition()
+        self.timers = []  # heap of (due, after id)
+        self.callbacks = {}  # after id -> (func, args)
+        self.idle = []
+        self.events = []
+        self.bindings = {}
+        self.ids = itertools.count(1)
+        self.running = False
+
+    def after(self, ms, func, args):
+        with self.lock:
+            after_id = f"after#{next(self.ids)}"
+            self.callbacks[after_id] = (func, args)
+            heapq.heappush(self.timers, (time.monotonic() + ms / 1000.0, after_id))
+            self.lock.notify()
+            return after_id
+
+    def after_idle(self, func, args):
+        with self.lock:
+            after_id = f"after#{next(self.ids)}"
+            self.callbacks[after_id] = (func, args)
+            self.idle.append(after_id)
+            self.lock.notify()
+            return after_id
+
+    def after_cancel(self, after_id):
+        with self.lock:
+            self.callbacks.pop(after_id, None)
+
+    def post(self, widget, sequence):
+        with self.lock:
+            self.events.append((widget, sequence))
+            self.lock.notify()
+
+    def run_idle(self):
+        with self.lock:
+            ready, self.idle = self.idle, []
+            calls = [self.callbacks.pop(after_id) for after_id in ready if after_id in self.callbacks]
+        for func, args in calls:
+            self._call(func, *args)
+
+    def run_ready(self):
+        """Everything pending now: posted events, due timers, then idle callbacks."""
+        with self.lock:
+            events, self.events = self.events, []
+            now, calls = time.monotonic(), []
+            while self.timers and self.timers[0][0] <= now:
+                _, after_id = heapq.heappop(self.timers)
+                if after_id in self.callbacks:
+                    calls.append(self.callbacks.pop(after_id))
+        for widget, sequence in events:
+            handler = self.bindings.get((widget, sequence))
+            if handler is not None:
+                self._call(handler, Event(widget))
+        for func, args in calls:
+            self._call(func, *args)
+        self.run_idle()
+
+    def wait(self):
+        with self.lock:
+            if self.events or self.idle or not self.running:
+                return
+            timeout = max(0.0, self.timers[0][0] - time.monotonic()) if self.timers else None
+            self.lock.wait(timeout)
+
+    def mainloop(self):
+        self.running = True
+        while self.running:
+            self.run_ready()
+            self.wait()
+
+    def quit(self):
+        with self.lock:
+            self.running = False
+            self.lock.notify()
+
+    def _call(self, func, *args):
+        try:
+            func(*args)
+        except Exception:
+            traceback.print_exc()  # Tk reports callback errors and keeps the loop running
+
+
+class Widget:
+    """A recording widget: known methods do what the benchmarks need, others are recorded only."""
+
+    def __init__(self, master=None, **options):
+        self.master = master if master is not None else _default_root
+        self.loop = self.master.loop if self.master is not None else Loop()
+        self.options = dict(options)
+        self.calls = []
+
+    def _record(self, name, args, kwargs):
+        self.calls.append((name, args, kwargs))
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            self._record(name, args, kwargs)
+        return method
+
+    def configure(self, cnf=None, **options):
+        self._record("configure", (cnf,) if cnf else (), options)
+        self.options.update(cnf or {}, **options)
+        return None if cnf or options else dict(self.options)
+
+    config = configure
+
+    def cget(self, key):
+        return self.options.get(key, "")
+
+    def bind(self, sequence, func=None, add=None):
+        self._record("bind", (sequence, func), {})
+        self.loop.bindings[(self, sequence)] = func
+
+    def event_generate(self, sequence, **kwargs):
+        self.loop.post(self, sequence)
+
+    def after(self, ms, func=None, *args):
+        if func is None:
+            time.sleep(ms / 1000.0)
+            return None
+        return self.loop.after(ms, func, args)
+
+    def after_idle(self, func, *args):
+        return self.loop.after_idle(func, args)
+
+    def after_cancel(self, after_id):
+        self.loop.after_cancel(after_id)
+
+    def update(self):
+        self._record("update", (), {})
+        self.loop.run_ready()
+
+    def update_idletasks(self):
+        self._record("update_idletasks", (), {})
+        self.loop.run_idle()
+
+    def winfo_screenwidth(self):
+        return SCREEN_SIZE[0]
+
+    def winfo_screenheight(self):
+        return SCREEN_SIZE[1]
+
+    def mainloop(self, n=0):
+        self.loop.mainloop()
+
+    def quit(self):
+        self.loop.quit()
+
+    def destroy(self):
+        self._record("destroy", (), {})
+
+
+_default_root = None
+
+
+class Tk(Widget):
+    def __init__(self, *args, **kwargs):
+        global _default_root
+        super().__init__()
+        self.master = None
+        self.loop = Loop()
+        if _default_root is None:
+            _default_root = self
+
+    def destroy(self):
+        global _default_root
+        super().destroy()
+        self.loop.quit()
+        if _default_root is self:
+            _default_root = None
+
+
+class Style(Widget):
+    """ttk.Style: configure() and map() take a style name first, so they are only recorded."""
+
+    def configure(self, style=None, **options):
+        self._record("configure", (style,), options)
+
+    def map(self, style=None, **options):
+        self._record("map", (style,), options)
+
+
+class Variable:
+    cast = str
+
+    def __init__(self, master=None, value=None, name=None):
+        self.value = self.cast() if value is None else value
+
+    def get(self):
+        return self.cast(self.value)
+
+    def set(self, value):
+        self.value = value
+
+
+class StringVar(Variable):
+    cast = str
+
+
+class IntVar(Variable):
+    cast = int
+
+
+class DoubleVar(Variable):
+    cast = float
+
+
+class BooleanVar(Variable):
+    cast = bool
+
+
+class PhotoImage:
+    def __init__(self, name=None, cnf=None, master=None, **options):
+        self.options = options
+
+    def width(self):
+        return self.options.get("width", 0)
+
+    def height(self):
+        return self.options.get("height", 0)
+
+
+def _recording_dialogs(name, results):
+    """A module of dialog functions that record their calls and return results[function] at once."""
+    module = types.ModuleType(name)
+    module.calls = []
+    for function, result in results.items():
+        def dialog(*args, _name=function, _result=result, **kwargs):
+            module.calls.append((_name, args, kwargs))
+            return _result
+        setattr(module, function, dialog)
+    return module
+
+
+def _tkinter_modules():
+    tk = types.ModuleType("tkinter")
+    tk.__doc__ = "Recording fake of tkinter, see benchmarks/tk_fakes.py."
+    for name in ("TclError", "Event", "Widget", "Tk", "Variable", "StringVar", "IntVar", "DoubleVar",
+                 "BooleanVar", "PhotoImage"):
+        setattr(tk, name, globals()[name])
+    for name in ("Toplevel", "Frame", "Label", "Button", "Canvas", "Entry", "Checkbutton", "Menu"):
+        setattr(tk, name, type(name, (Widget,), {}))
+    ttk = types.ModuleType("tkinter.ttk")
+    ttk.Style = Style
+    for name in ("Frame", "Label", "Button", "LabelFrame", "Combobox", "Entry", "Scale",
+                 "Checkbutton", "Radiobutton", "Notebook"):
+        setattr(ttk, name, type(name, (Widget,), {}))
+    messagebox = _recording_dialogs("tkinter.messagebox", {"showinfo": "ok", "showwarning": "ok", "showerror": "ok",
+                                                           "askyesno": False, "askokcancel": False})
+    filedialog = _recording_dialogs("tkinter.filedialog", {"askopenfilename": "", "asksaveasfilename": ""})
+    tk.ttk, tk.messagebox, tk.filedialog = ttk, messagebox, filedialog
+    return {"tkinter": tk, "tkinter.ttk": ttk, "tkinter.messagebox": messagebox, "tkinter.filedialog": filedialog}
+
+
+# --- pystray ---------------------------------------------------------------
+
+class MenuItem:
+    def __init__(self, text, action, checked=None, radio=False, default=False, visible=True, enabled=True):
+        self.text = text
+        self.action = action
+        self.checked = checked
+        self.radio = radio
+        self.default = default
+        self.visible = visible
+        self.enabled = enabled
+
+
+class Menu:
+    SEPARATOR = None
+
+    def __init__(self, *items):
+        self.items = items
+
+
+class Icon:
+    def __init__(self, name, icon=None, title=None, menu=None):
+        self.name = name
+        self.icon = icon
+        self.title = title
+        self.menu = menu
+        self.menu_updates = 0
+        self.visible = False
+        self._stopped = threading.Event()
+
+    def run(self, setup=None):
+        self.visible = True
+        self._stopped.wait()
+        self.visible = False
+
+    def stop(self):
+        self._stopped.set()
+
+    def update_menu(self):
+        self.menu_updates += 1
+
+
+def _pystray_module():
+    module = types.ModuleType("pystray")
+    module.Icon, module.Menu, module.MenuItem = Icon, Menu, MenuItem
+    return {"pystray": module}
+
+
+# --- PIL -------------------------------------------------------------------
+
+class Image:
+    def __init__(self, mode, size, color=0):
+        self.mode = mode
+        self.size = size
+        self.color = color
+        self.operations = []
+
+
+class Draw:
+    def __init__(self, image, mode=None):
+        self.image = image
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def operation(*args, **kwargs):
+            self.image.operations.append((name, args, kwargs))
+        return operation
+
+
+def _tk_photo(image=None, size=None, **kwargs):
+    """ImageTk.PhotoImage: a blank Tk image of the same size, so it works with real or fake Tk."""
+    import tkinter
+    width, height = image.size if image is not None else size
+    return tkinter.PhotoImage(width=width, height=height)
+
+
+def _pil_modules():
+    pil = types.ModuleType("PIL")
+    image = types.ModuleType("PIL.Image")
+    image.Image = Image
+    image.new = Image
+    draw = types.ModuleType("PIL.ImageDraw")
+    draw.Draw = Draw
+    image_tk = types.ModuleType("PIL.ImageTk")
+    image_tk.PhotoImage = _tk_photo
+    pil.Image, pil.ImageDraw, pil.ImageTk = image, draw, image_tk
+    return {"PIL": pil, "PIL.Image": image, "PIL.ImageDraw": draw, "PIL.ImageTk": image_tk}
@@ -67,7 +67,6 @@ if "%BUILD_TYPE%"=="tkinter" (
       --hidden-import=pycaw.constants ^
       --hidden-import=PyQt6.QtSvg ^
       --hidden-import=pygame ^
-      --hidden-import=psutil ^
       --add-binary "resource\libcairo-2.dll;resource" ^
       --add-data "resource\_mute.wav;resource" ^
       --add-data "resource\_unmute.wav;resource" ^
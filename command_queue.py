@@ -0,0 +1,144 @@
+"""Commands from other threads, run in batches on the UI thread.
+
+The keyboard hook and the tray menu call into the app on their own threads,
+and Tk widgets must only be touched from the thread running the Tk loop.
+Those threads post() a named command instead. post() appends to a deque,
+which is atomic under the GIL, so it never takes a lock. Only the first post
+after a drain calls wake(), which schedules drain() on the UI thread.
+Everything posted until then is handled as one batch. wake() runs on the
+posting thread, so post() is only as non-blocking as wake(). tkinter's
+event_generate from another thread waits until the Tk loop services it, so
+the Tk app wakes through a WakeThread, whose set() only sets an Event. If a
+wake raises, returns False or is reported with wake_failed(), the next post
+wakes again. Items posted before such a failure wait for the next post or
+for the UI thread's own periodic drain.
+
+coalesce() folds each run of mute commands in a batch into one
+("mute", (target, flip)) step, so a burst of toggles costs one SetMute and
+one redraw, and only its final state is shown.
+"""
+import collections
+import threading
+import time
+
+from metrics import REGISTRY
+
+TOGGLE = "toggle"
+SET_MUTE = "set_mute"
+MUTE = "mute"
+
+_posted = REGISTRY.counter("commands_posted_total", "Commands posted to the UI thread")
+_batches = REGISTRY.counter("command_batches_total", "Batches of posted commands drained by the UI thread")
+_coalesced = REGISTRY.counter("commands_coalesced_total", "Mute commands folded into another one in the same batch")
+_queue_delay = REGISTRY.histogram("command_queue_delay_seconds", "Time from post() to the UI thread draining the command")
+
+
+class CommandQueue:
+    """Multi-producer, single-consumer queue; wake() must be safe to call from any thread."""
+
+    def __init__(self, wake):
+        self._wake = wake
+        self._items = collections.deque()
+        self._wake_pending = False
+
+    def post(self, name, *args):
+        self._items.append((name, args, time.perf_counter()))
+        _posted.inc()
+        if not self._wake_pending:
+            self._wake_pending = True
+            try:
+                woken = self._wake()
+            except BaseException:
+                self._wake_pending = False
+                raise
+            if woken is False:
+                self._wake_pending = False
+
+    def wake_failed(self):
+        """A wake was accepted but could not be delivered; let the next post wake again."""
+        self._wake_pending = False
+
+    def drain(self):
+        """On the UI thread: remove and return everything posted so far as [(name, args)]."""
+        # Cleared before popping, so a post racing with this drain either lands in it or wakes again
+        self._wake_pending = False
+        items = self._items
+        batch = []
+        now = time.perf_counter()
+        while True:
+            try:
+                name, args, posted_at = items.popleft()
+            except IndexError:
+                break
+            _queue_delay.record(now - posted_at)
+            batch.append((name, args))
+        if batch:
+            _batches.inc()
+        return batch
+
+    def __len__(self):
+        return len(self._items)
+
+
+class WakeThread:
+    """Calls wake() on its own daemon thread after set(); set() never blocks.
+
+    For wake functions that may wait on the UI loop, such as tkinter's
+    cross-thread event_generate. Sets that arrive while wake() runs are
+    folded into one more call.
+    """
+
+    def __init__(self, wake, name="CommandWake"):
+        self._wake = wake
+        self._event = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def set(self):
+        self._event.set()
+
+    def stop(self):
+        self._stopped = True
+        self._event.set()
+
+    def _run(self):
+        while True:
+            self._event.wait()
+            self._event.clear()
+            if self._stopped:
+                return
+            self._wake()
+
+
+def coalesce(batch):
+    """Fold runs of TOGGLE and SET_MUTE into one MUTE step, keeping the order of other commands.
+
+    A MUTE step's args are (target, flip). Start from target, or from the
+    current state when target is None, then invert the result if flip is set.
+    """
+    commands = []
+    target, flip, run = None, False, 0
+    for name, args in batch:
+        if name == TOGGLE:
+            flip = not flip
+            run += 1
+        elif name == SET_MUTE:
+            target, flip = bool(args[0]), False
+            run += 1
+        else:
+            if run:
+                commands.append((MUTE, (target, flip)))
+                _coalesced.inc(run - 1)
+                target, flip, run = None, False, 0
+            commands.append((name, args))
+    if run:
+        commands.append((MUTE, (target, flip)))
+        _coalesced.inc(run - 1)
+    return commands
+
+
+def resolve_mute(current, target, flip):
+    """The state a MUTE step leaves the microphone in."""
+    state = current if target is None else target
+    return not state if flip else state
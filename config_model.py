@@ -0,0 +1,266 @@
+"""Settings model shared by both front ends.
+
+AppConfig is a plain __slots__ object with one attribute per setting. The
+schema below lists every field with its default and a validator that coerces
+or rejects a raw JSON value; loading walks it once, so each key is read,
+validated and defaulted in a single pass. Files written before the schema was
+versioned (no "config_version") are migrated on load, e.g. the Tkinter
+front end's "48x48" overlay sizes. Keys the schema does not know are kept and
+written back, so an older build does not drop settings added by a newer one.
+A file from a newer build keeps its config_version and is never rewritten
+just because it was loaded.
+
+Nothing here imports a GUI toolkit.
+"""
+import json
+import os
+
+from app_logging import LEVEL_NAMES
+
+SCHEMA_VERSION = 1
+
+OVERLAY_POSITIONS = ("Top Left", "Top Mid", "Top Right", "Middle Left", "Middle Right",
+                     "Bottom Left", "Bottom Mid", "Bottom Right")
+
+
+class ConfigError(ValueError):
+    """Raised by a validator when a value cannot be used."""
+
+
+class StatCache:
+    """Caches os.path.isfile results so repeated loads do not stat the same sound files again."""
+
+    def __init__(self):
+        self._results = {}
+        self.stat_calls = 0
+
+    def isfile(self, path):
+        result = self._results.get(path)
+        if result is None:
+            self.stat_calls += 1
+            result = self._results[path] = os.path.isfile(path)
+        return result
+
+    def clear(self):
+        self._results.clear()
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    raise ConfigError(f"expected a boolean, got {value!r}")
+
+
+def _as_int(value, low, high):
+    if isinstance(value, bool):
+        raise ConfigError(f"expected a number, got {value!r}")
+    if isinstance(value, str):
+        # Tkinter builds stored sizes as "48x48"
+        value = value.strip().split('x')[0]
+    try:
+        number = int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        raise ConfigError(f"expected a number, got {value!r}")
+    if not low <= number <= high:
+        raise ConfigError(f"{number} is outside {low}-{high}")
+    return number
+
+
+def _as_float(value, low, high):
+    if isinstance(value, bool):
+        raise ConfigError(f"expected a number, got {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ConfigError(f"expected a number, got {value!r}")
+    if not low <= number <= high:
+        raise ConfigError(f"{number} is outside {low}-{high}")
+    return number
+
+
+def _as_position(value):
+    if value not in OVERLAY_POSITIONS:
+        raise ConfigError(f"unknown overlay position {value!r}")
+    return value
+
+
+def _as_hotkey(value):
+    if not isinstance(value, str) or not value.strip() or ',' in value:
+        raise ConfigError(f"invalid hotkey {value!r}")
+    return value.strip()
+
+
+def _as_device_groups(value):
+    if not isinstance(value, dict):
+        raise ConfigError(f"expected an object of device groups, got {value!r}")
+    groups = {}
+    for name, members in value.items():
+        if not name.strip() or not isinstance(members, list) or not members:
+            raise ConfigError(f"invalid device group {name!r}")
+        if not all(isinstance(member, str) and member.strip() for member in members):
+            raise ConfigError(f"device group {name!r} must list device ids or names")
+        groups[name] = list(members)
+    return groups
+
+
+def _as_log_level(value):
+    if not isinstance(value, str) or value.upper() not in LEVEL_NAMES:
+        raise ConfigError(f"log level must be one of {', '.join(LEVEL_NAMES)}, got {value!r}")
+    return value.upper()
+
+
+def _as_sound_path(value, stat_cache):
+    if not isinstance(value, str) or not value or not stat_cache.isfile(value):
+        raise ConfigError(f"sound file {value!r} not found")
+    return value
+
+
+# (name, validator, default); validators take (value, stat_cache). Sound defaults come from the front end.
+SCHEMA = (
+    ("overlay_position", lambda v, s: _as_position(v), "Top Mid"),
+    ("overlay_size", lambda v, s: _as_int(v, 16, 128), 48),
+    ("overlay_margin", lambda v, s: _as_int(v, 0, 50), 10),
+    ("overlay_opacity", lambda v, s: _as_float(v, 0.1, 1.0), 0.7),
+    ("mute_sound_file", _as_sound_path, ""),
+    ("unmute_sound_file", _as_sound_path, ""),
+    ("mute_sound_enabled", lambda v, s: _as_bool(v), True),
+    ("unmute_sound_enabled", lambda v, s: _as_bool(v), True),
+    ("start_minimized", lambda v, s: _as_bool(v), False),
+    ("start_with_windows", lambda v, s: _as_bool(v), False),
+    ("hotkey", lambda v, s: _as_hotkey(v), "ctrl+alt+m"),
+    # Run the keyboard hook in a separate lightweight process (PyQt6)
+    ("hotkey_hook_process", lambda v, s: _as_bool(v), False),
+    # Let the hook watchdog re-install a lost in-process hook in the hook process for the session (PyQt6)
+    ("hotkey_hook_watchdog_fallback", lambda v, s: _as_bool(v), True),
+    ("auto_refresh_enabled", lambda v, s: _as_bool(v), False),
+    ("auto_refresh_interval", lambda v, s: _as_int(v, 1, 60), 5),
+    ("fallback_poll_enabled", lambda v, s: _as_bool(v), True),
+    ("fallback_poll_interval", lambda v, s: _as_int(v, 1000, 3600000), 5000),
+    # Adaptive polling without push notifications: fast after activity, slowing to the idle interval
+    ("poll_fast_interval", lambda v, s: _as_int(v, 20, 5000), 100),
+    ("poll_idle_interval", lambda v, s: _as_int(v, 100, 60000), 2000),
+    ("poll_fast_period", lambda v, s: _as_int(v, 0, 600000), 3000),
+    ("poll_pause_when_locked", lambda v, s: _as_bool(v), True),
+    # Named sets of capture devices (ids or friendly names) for "mute group"
+    ("device_groups", lambda v, s: _as_device_groups(v), {}),
+    ("log_level", lambda v, s: _as_log_level(v), "INFO"),
+)
+FIELD_NAMES = tuple(name for name, _, _ in SCHEMA)
+
+
+class AppConfig:
+    """Validated application settings. issues lists what loading had to fix."""
+    __slots__ = FIELD_NAMES + ("version", "extra", "issues")
+
+    def __init__(self, mute_sound_file="", unmute_sound_file="", **values):
+        for name, _, default in SCHEMA:
+            setattr(self, name, default)
+        self.mute_sound_file = mute_sound_file
+        self.unmute_sound_file = unmute_sound_file
+        self.version = SCHEMA_VERSION
+        self.extra = {}
+        self.issues = []
+        for name, value in values.items():
+            if name not in FIELD_NAMES:
+                raise TypeError(f"unknown setting {name!r}")
+            setattr(self, name, value)
+
+    @classmethod
+    def from_dict(cls, data, defaults, stat_cache=None):
+        """Build a config from raw JSON data in one pass, replacing invalid values with defaults."""
+        stat_cache = stat_cache if stat_cache is not None else StatCache()
+        config = cls.__new__(cls)
+        config.issues = []
+        if not isinstance(data, dict):
+            config.issues.append(f"expected a JSON object, got {type(data).__name__}")
+            data = {}
+        version = data.get("config_version", 0)
+        if not isinstance(version, int) or isinstance(version, bool) or version < 0:
+            config.issues.append(f"invalid config_version {version!r}")
+            version = 0
+        elif version > SCHEMA_VERSION:
+            config.issues.append(f"config_version {version} is newer than {SCHEMA_VERSION}; unknown keys are kept")
+        config.version = max(version, SCHEMA_VERSION)
+        for name, validate, _ in SCHEMA:
+            default = getattr(defaults, name)
+            if name not in data:
+                setattr(config, name, default)
+                continue
+            try:
+                setattr(config, name, validate(data[name], stat_cache))
+            except ConfigError as e:
+                config.issues.append(f"{name}: {str(e)}, using default")
+                setattr(config, name, default)
+        config.extra = {key: value for key, value in data.items()
+                        if key not in FIELD_NAMES and key != "config_version"}
+        return config
+
+    def to_dict(self):
+        data = dict(self.extra)
+        for name in FIELD_NAMES:
+            data[name] = getattr(self, name)
+        data["config_version"] = self.version
+        return data
+
+    def changed_fields(self, other):
+        """Names of the settings that differ from other (all of them when other is None)."""
+        if other is None:
+            return set(FIELD_NAMES)
+        return {name for name in FIELD_NAMES if getattr(self, name) != getattr(other, name)}
+
+    def copy(self):
+        other = AppConfig.__new__(AppConfig)
+        for name in AppConfig.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.extra = dict(self.extra)
+        other.issues = list(self.issues)
+        return other
+
+    def __eq__(self, other):
+        if not isinstance(other, AppConfig):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in FIELD_NAMES) and self.extra == other.extra
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in FIELD_NAMES)
+        return f"AppConfig({values})"
+
+
+def load_config(paths, defaults, stat_cache=None):
+    """Load the first readable file in paths.
+
+    Returns (config, source_path, needs_save). needs_save is True when the
+    settings did not come from paths[0] (the user's file) or had to be fixed,
+    i.e. when writing them back would change the user's file. It is False for
+    a file written by a newer build, which this one must not downgrade.
+    Unreadable or malformed files fall back to the next path and finally to
+    defaults.
+    """
+    issues = []
+    for index, path in enumerate(paths):
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            issues.append(f"{path}: {str(e)}")
+            continue
+        try:
+            data = json.loads(raw.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            issues.append(f"{path}: not valid JSON ({str(e)})")
+            continue
+        config = AppConfig.from_dict(data, defaults, stat_cache)
+        config.issues = issues + config.issues
+        if config.version > SCHEMA_VERSION:
+            return config, path, False
+        migrated = isinstance(data, dict) and data.get("config_version") != SCHEMA_VERSION
+        return config, path, index != 0 or bool(config.issues) or migrated
+    config = defaults.copy()
+    config.issues = issues
+    return config, None, True
@@ -0,0 +1,152 @@
+"""Debounced, atomic writer for the settings file.
+
+Front ends call save() as often as they like (e.g. on every opacity slider
+tick); the latest snapshot is kept in memory and written on a background
+thread once no save() has arrived for quiet_period seconds. Writes go to a
+temporary file in the same directory which is fsynced and renamed over the
+config file, so a crash never leaves a truncated file, and a snapshot that
+serializes to what is already on disk is not written at all.
+
+ConfigFileMonitor notices edits made by other programs with one os.stat()
+per check; front ends call it from a file-system notification where they
+have one and from a slow timer as the fallback.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("config")
+
+
+class ConfigWriter:
+    """Coalesces config saves into atomic background writes.
+
+    write_count counts files actually written; skipped_count counts flushes
+    whose content matched the file on disk.
+    """
+
+    def __init__(self, path, quiet_period=0.5, indent=None):
+        self.path = path
+        self.quiet_period = quiet_period
+        self.indent = indent
+        self.write_count = 0
+        self.skipped_count = 0
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending = None
+        self._due = None
+        self._last_content = self._read_existing()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="ConfigWriter", daemon=True)
+        self._thread.start()
+
+    def _read_existing(self):
+        try:
+            with open(self.path, 'r') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def save(self, config):
+        """Queue a snapshot of config; it is written after the quiet period unless superseded."""
+        snapshot = dict(config)
+        with self._condition:
+            self._pending = snapshot
+            self._due = time.monotonic() + self.quiet_period
+            self._condition.notify()
+
+    def has_pending(self):
+        with self._condition:
+            return self._pending is not None
+
+    def flush(self):
+        """Write the pending snapshot now, on the calling thread."""
+        with self._condition:
+            snapshot, self._pending = self._pending, None
+            self._due = None
+        if snapshot is not None:
+            self._write(snapshot)
+
+    def close(self):
+        """Flush anything pending and stop the background thread."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join(2.0)
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and (self._due is None or time.monotonic() < self._due):
+                    timeout = None if self._due is None else max(0.0, self._due - time.monotonic())
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                snapshot, self._pending = self._pending, None
+                self._due = None
+            if snapshot is not None:
+                self._write(snapshot)
+
+    def _write(self, snapshot):
+        with self._write_lock:
+            self._write_locked(snapshot)
+
+    def _write_locked(self, snapshot):
+        try:
+            content = json.dumps(snapshot, indent=self.indent)
+        except (TypeError, ValueError) as e:
+            log.error(f"Config is not serializable: {str(e)}")
+            return
+        if content == self._last_content:
+            self.skipped_count += 1
+            return
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            log.error(f"Error saving config: {str(e)}")
+            return
+        self._last_content = content
+        self.write_count += 1
+        log.info(f"Saved config to {self.path}")
+
+
+class ConfigFileMonitor:
+    """Detects changes to a file by comparing its (mtime, size, inode) signature."""
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def changed(self):
+        """True once per change since the previous call (or since construction)."""
+        signature = self._stat()
+        if signature == self.signature:
+            return False
+        self.signature = signature
+        return True
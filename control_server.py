@@ -0,0 +1,166 @@
+"""Local control API for scripts and automation.
+
+Clients connect to the instance endpoint (see local_ipc) and send one JSON
+object per line:
+
+    {"cmd": "toggle"}  {"cmd": "mute"}  {"cmd": "unmute"}  {"cmd": "get-state"}
+    {"cmd": "subscribe"}  {"cmd": "unsubscribe"}  {"cmd": "show"}
+    {"cmd": "list-devices"}  {"cmd": "mute-all"}  {"cmd": "unmute-all"}
+    {"cmd": "mute-group", "group": "..."}  {"cmd": "unmute-group", "group": "..."}
+    {"cmd": "mute-devices", "devices": [...]}  {"cmd": "unmute-devices", "devices": [...]}
+    {"cmd": "metrics"}
+
+An optional "id" is echoed in the reply. Replies are {"ok": true, "muted": ...}
+or {"ok": false, "error": ...}. Subscribed connections also receive
+{"event": "state", "muted": ..., "source": ...} for every change. Device
+commands reply with {"ok": true, "devices": [{"id", "name", "muted"}, ...]};
+"devices" entries are device ids or friendly names, groups come from the
+device_groups setting. "metrics" replies with {"ok": true, "metrics": ...},
+the metrics.REGISTRY snapshot.
+
+Mute commands go straight to the AudioWorker, so the GUI thread is never
+involved; only "show" is handed to the front end. The worker only hands the
+result to a PendingReply: the connection's own thread writes it, so a client
+that stops reading cannot block the worker, and on Windows the write does not
+wait behind the connection's pending pipe read. A connection's requests are
+therefore answered one at a time, in order.
+"""
+import queue
+import threading
+
+from local_ipc import LocalServer, PendingReply
+from metrics import REGISTRY
+
+_MUTE_COMMANDS = ("toggle", "mute", "unmute", "get-state")
+_DEVICE_COMMANDS = ("list-devices", "mute-all", "unmute-all", "mute-group", "unmute-group",
+                    "mute-devices", "unmute-devices")
+
+_requests = REGISTRY.counter("control_requests_total", "Control API requests received")
+
+
+class ControlServer:
+    """Serves the control protocol for an AudioWorker on a local endpoint."""
+
+    def __init__(self, address, worker, on_show=None, get_groups=None):
+        self.address = address
+        self.worker = worker
+        self.on_show = on_show
+        self.get_groups = get_groups
+        self.server = LocalServer(address, self.handle_message)
+        self.requests_served = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._events = queue.Queue()
+        self._dispatcher = None
+
+    def start(self):
+        """Bind the endpoint and start serving. Raises OSError if it cannot be bound."""
+        self.server.start()
+        self.worker.add_state_listener(self._on_state)
+        self._dispatcher = threading.Thread(target=self._dispatch_events, name="ControlEvents", daemon=True)
+        self._dispatcher.start()
+
+    def stop(self):
+        self.worker.remove_state_listener(self._on_state)
+        if self._dispatcher is not None:
+            self._events.put(None)
+            self._dispatcher.join(1.0)
+            self._dispatcher = None
+        self.server.stop()
+        with self._lock:
+            self._subscribers.clear()
+
+    def handle_message(self, message, channel):
+        """Runs on a connection thread; mute and device commands return a PendingReply the audio worker completes."""
+        command = message.get("cmd")
+        request_id = message.get("id")
+
+        def reply(**fields):
+            if request_id is not None:
+                fields["id"] = request_id
+            return fields
+
+        with self._lock:
+            self.requests_served += 1
+        _requests.inc()
+        if command in _MUTE_COMMANDS:
+            pending = PendingReply(reply(ok=False, error="Timed out waiting for the audio device"))
+
+            def on_done(is_muted, error):
+                pending.set(reply(ok=False, error=error) if error else reply(ok=True, muted=is_muted))
+
+            if command == "toggle":
+                self.worker.request_toggle(on_done)
+            elif command == "get-state":
+                self.worker.request_read(on_done)
+            else:
+                self.worker.request_mute(command == "mute", on_done)
+            return pending
+        if command in _DEVICE_COMMANDS:
+            return self._handle_device_command(command, message, channel, reply)
+        if command == "subscribe":
+            with self._lock:
+                self._subscribers.add(channel)
+            return reply(ok=True, muted=self.worker.last_state)
+        if command == "unsubscribe":
+            with self._lock:
+                self._subscribers.discard(channel)
+            return reply(ok=True)
+        if command == "metrics":
+            return reply(ok=True, metrics=REGISTRY.snapshot())
+        if command == "show" and self.on_show is not None:
+            self.on_show()
+            return reply(ok=True)
+        return reply(ok=False, error=f"Unknown command: {command}")
+
+    def _handle_device_command(self, command, message, channel, reply):
+        selectors = None
+        if command.endswith("-group"):
+            groups = self.get_groups() if self.get_groups else {}
+            selectors = groups.get(message.get("group"))
+            if selectors is None:
+                return reply(ok=False, error=f"Unknown device group: {message.get('group')}")
+        elif command.endswith("-devices") and command != "list-devices":
+            selectors = message.get("devices")
+            if not isinstance(selectors, list) or not selectors:
+                return reply(ok=False, error="devices must be a non-empty list")
+
+        pending = PendingReply(reply(ok=False, error="Timed out waiting for the audio devices"))
+
+        def on_done(is_muted, error):
+            if error:
+                pending.set(reply(ok=False, error=error, devices=self.worker.device_states()))
+            else:
+                pending.set(reply(ok=True, devices=self.worker.device_states()))
+
+        if command == "list-devices":
+            if self.worker.device_manager.is_open:
+                return reply(ok=True, devices=self.worker.device_states())
+            self.worker.request_device_refresh(on_done)
+        else:
+            self.worker.request_mute_devices(command.startswith("mute"), selectors, on_done)
+        return pending
+
+    def _on_state(self, is_muted, source):
+        # Called on the audio worker thread: never write to sockets here, a slow client would stall it
+        if self._subscribers:
+            self._events.put({"event": "state", "muted": is_muted, "source": source})
+
+    def _dispatch_events(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for channel in subscribers:
+                if channel.closed:
+                    with self._lock:
+                        self._subscribers.discard(channel)
+                    continue
+                try:
+                    channel.write_message(event)
+                except OSError:  # Including a write that timed out; the line may be cut, so drop the client
+                    with self._lock:
+                        self._subscribers.discard(channel)
+                    channel.close()
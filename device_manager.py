@@ -0,0 +1,140 @@
+"""Per-device mute control for every capture endpoint.
+
+The default-microphone path (AudioEndpointBackend.activate) only ever sees one
+endpoint. DeviceManager enumerates all active capture endpoints once, keeps the
+backend's bound interfaces for each of them, and tracks a per-device mute table
+that endpoint notifications keep current. Muting a set of devices is a single
+pass over the cached interfaces: devices already in the target state (per the
+table) are skipped, nothing is re-enumerated or re-activated.
+
+All backend calls must come from the thread that owns the backend (the audio
+worker in the PyQt6 app, the Tk main loop in the Tkinter app). snapshot() and
+the notification callback may run on any thread.
+"""
+import threading
+
+from app_logging import get_logger
+
+log = get_logger("devices")
+
+
+class DeviceManager:
+    """Caches every capture endpoint and its mute state.
+
+    on_change(device_id, is_muted) is called whenever the table changes, from
+    the owning thread after a command or from a notification thread.
+    """
+
+    def __init__(self, backend, on_change=None):
+        self.backend = backend
+        self.on_change = on_change
+        self.devices = {}  # device id -> AudioDevice, in enumeration order
+        self.is_open = False
+        self._states = {}  # device id -> bool, or None while unknown
+        self._pushed = set()  # device ids with working change notifications
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Enumerate and bind all capture endpoints, then read each state once. No-op when already open."""
+        if self.is_open:
+            return
+        devices = self.backend.open_devices()
+        self.devices = {device.id: device for device in devices}
+        with self._lock:
+            self._states = dict.fromkeys(self.devices)
+        self._pushed = set()
+        self.is_open = True
+        for device_id in self.devices:
+            if self.backend.subscribe_device(device_id, self._notification_handler(device_id)):
+                self._pushed.add(device_id)
+            self._read(device_id)
+        log.info("Opened %d capture device(s), %d with change notifications", len(self.devices), len(self._pushed))
+
+    def close(self):
+        """Release every cached interface; the next open() enumerates again."""
+        if not self.is_open:
+            return
+        self.backend.close_devices()
+        self.devices = {}
+        self._pushed = set()
+        with self._lock:
+            self._states = {}
+        self.is_open = False
+
+    def reopen(self):
+        self.close()
+        self.open()
+
+    def resolve(self, selectors=None):
+        """Map device ids or friendly names (case-insensitive) to device ids; None selects every device."""
+        if selectors is None:
+            return list(self.devices)
+        names = {}
+        for device in self.devices.values():
+            names.setdefault(device.name.lower(), []).append(device.id)
+        resolved = []
+        for selector in selectors:
+            if selector in self.devices:
+                matches = [selector]
+            else:
+                matches = names.get(str(selector).lower(), [])
+                if not matches:
+                    log.warning(f"No capture device matches {selector!r}")
+            for device_id in matches:
+                if device_id not in resolved:
+                    resolved.append(device_id)
+        return resolved
+
+    def set_mute(self, targets):
+        """Apply {device_id: muted} in one pass. Returns {device_id: error message} for devices that failed."""
+        errors = {}
+        for device_id, muted in targets.items():
+            if device_id not in self.devices:
+                errors[device_id] = "Unknown device"
+                continue
+            with self._lock:
+                known = self._states.get(device_id)
+            if known is None or device_id not in self._pushed:
+                # Without notifications the table may be stale; one read is still cheaper than a blind write
+                known = self._read(device_id)
+            if known == muted:
+                continue
+            try:
+                self.backend.set_device_mute(device_id, muted)
+            except Exception as e:
+                log.error(f"Failed to {'mute' if muted else 'unmute'} {self.devices[device_id].name}: {str(e)}")
+                errors[device_id] = str(e)
+                continue
+            self._update(device_id, muted)
+        return errors
+
+    def snapshot(self):
+        """List of {"id", "name", "muted"} for every cached device, safe to call from any thread."""
+        with self._lock:
+            states = dict(self._states)
+        return [{"id": device.id, "name": device.name, "muted": states.get(device.id)}
+                for device in self.devices.values()]
+
+    def _read(self, device_id):
+        try:
+            muted = bool(self.backend.get_device_mute(device_id))
+        except Exception as e:
+            log.error(f"Failed to read mute state of {self.devices[device_id].name}: {str(e)}")
+            return None
+        self._update(device_id, muted)
+        return muted
+
+    def _update(self, device_id, muted):
+        with self._lock:
+            if device_id not in self._states:
+                return  # Notification for a device that was closed meanwhile
+            changed = self._states[device_id] != muted
+            self._states[device_id] = muted
+        if changed and self.on_change:
+            self.on_change(device_id, muted)
+
+    def _notification_handler(self, device_id):
+        def handler(is_muted):
+            # Called on a notification thread: only update the table
+            self._update(device_id, bool(is_muted))
+        return handler
@@ -0,0 +1,86 @@
+"""Garbage-collector policy that keeps collection pauses out of the keyboard hook.
+
+CPython runs the cyclic collector on whichever thread pushes the generation-0
+allocation count over its threshold. The collection holds the GIL, so a
+collection over the GUI's live objects can land inside a hook callback, or
+hold up the hook thread until it finishes. GcPolicy.apply() runs once startup
+has settled. It:
+
+  - collects, then gc.freeze()s everything still alive, so later collections
+    skip the long-lived startup objects
+  - raises the thresholds (THRESHOLDS), so automatic collections become rare
+    and are triggered by whichever thread allocates most, which is not the hook
+
+collect() is then run on a timer from the app's own thread. It does a young
+collection on every tick and a full one every FULL_EVERY ticks, which keeps
+the allocation counts below the thresholds. Because objects are frozen, these
+collections only walk what was allocated since startup. They still hold the
+GIL, which is why the split-process hook (hook_process.py) applies the same
+policy in a process that has almost nothing to collect.
+
+A gc.callbacks entry times every collection (gc_pause_seconds) and counts
+the ones that ran on a thread registered with watch_thread()
+(gc_collections_in_hook_total).
+"""
+import gc
+import threading
+import time
+
+from metrics import REGISTRY
+
+THRESHOLDS = (50000, 20, 100)
+FULL_EVERY = 60  # ticks of collect()
+
+_pauses = REGISTRY.histogram("gc_pause_seconds", "Cyclic garbage collection pauses")
+_in_hook = REGISTRY.counter("gc_collections_in_hook_total", "Garbage collections that ran on the keyboard hook thread")
+_frozen = REGISTRY.gauge("gc_frozen_objects", "Objects moved to the permanent generation by gc.freeze()")
+
+
+class GcPolicy:
+    """Freeze-after-startup, raised thresholds and scheduled collections; see the module docstring."""
+
+    def __init__(self, thresholds=THRESHOLDS, full_every=FULL_EVERY):
+        self.thresholds = thresholds
+        self.full_every = full_every
+        self.applied = False
+        self.ticks = 0
+        self.hook_threads = set()
+        self._started = None
+
+    def apply(self):
+        if self.applied:
+            return
+        self.applied = True
+        gc.collect()
+        gc.freeze()
+        _frozen.set(gc.get_freeze_count())
+        gc.set_threshold(*self.thresholds)
+        gc.callbacks.append(self._on_gc)
+
+    def remove(self):
+        """Undo apply(): default thresholds, nothing frozen, no callback."""
+        if not self.applied:
+            return
+        self.applied = False
+        gc.callbacks.remove(self._on_gc)
+        gc.set_threshold(700, 10, 10)
+        gc.unfreeze()
+        _frozen.set(0)
+
+    def collect(self):
+        """One scheduled collection; call it off the hook thread every few seconds."""
+        self.ticks += 1
+        gc.collect(2 if self.ticks % self.full_every == 0 else 0)
+
+    def watch_thread(self, ident=None):
+        """Count collections on this thread (the caller's by default) as collections inside the hook."""
+        self.hook_threads.add(ident if ident is not None else threading.get_ident())
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._started = time.perf_counter()
+        elif self._started is not None:
+            _pauses.record(time.perf_counter() - self._started)
+            self._started = None
+            if threading.get_ident() in self.hook_threads:
+                _in_hook.inc()
@@ -0,0 +1,391 @@
+"""Optional split-process keyboard hook.
+
+In the default mode the low-level keyboard hook runs inside the GUI process,
+so a garbage-collection pause, a busy Qt thread or the mixer can delay every
+keystroke system-wide. If a callback takes longer than the system's hook
+timeout, Windows drops the hook. In split mode the hook runs in a small
+child process instead. The child imports only the keyboard library, the
+matcher and the metrics module. It matches hotkeys and forwards the matches
+over its stdout pipe.
+
+Protocol: one JSON object per line.
+
+  parent -> child   {"cmd": "bind", "name", "hotkey", "groups"}  precompiled scan-code groups
+                    {"cmd": "unbind", "name"}
+                    {"cmd": "simulate", "events", "rate"}  synthetic key events (benchmarks, --no-hook);
+                                    resets the callback and dispatch stats first
+                    {"cmd": "exit"}; end of input (the parent died) also exits
+  child -> parent   {"event": "ready", "pid"}
+                    {"event": "hotkey", "name", "t"}  t is the child's perf_counter() at the key-down
+                    {"event": "activity"}  a key went down; sent at most every ACTIVITY_INTERVAL s
+                    {"event": "stats", "callback", "dispatch"}  LatencyHistogram.summary() of the callback
+                                    and, for simulated events, of due time to callback return
+                    {"event": "log", "level", "message"}
+
+The hook callback only matches and queues. A writer thread does the pipe
+writes, so a parent that stops reading cannot stall the hook. The writer also
+runs the child's GcPolicy collections and its HookWatchdog (hook_watchdog.py).
+When the watchdog finds a callback over the hook timeout, or a hook that has
+stopped seeing keys, the child exits with EXIT_REINSTALL. The new child then
+registers a fresh OS hook. --stall-after passes the watchdog's stall time in.
+
+HookProcess is the parent side. It starts the child, re-sends the bindings,
+and restarts the child with backoff when it exits. After max_failures quick
+consecutive failures it gives up and calls on_exhausted, so the app can fall
+back to the in-process hook. An EXIT_REINSTALL exit is restarted at once and
+does not count as a failure. If the child saw no keys before that exit, the
+next child's --stall-after is doubled. perf_counter() is system-wide on Windows
+(QueryPerformanceCounter) and on Linux (CLOCK_MONOTONIC), so the child's "t"
+can be compared with the parent's clock.
+"""
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+from gc_policy import GcPolicy
+from hook_watchdog import MAX_STALL_AFTER, HookWatchdog, keyboard_input_seen
+from hotkey_engine import HotkeyEngine
+from metrics import REGISTRY, LatencyHistogram
+
+ACTIVITY_INTERVAL = 0.25  # s
+STATS_INTERVAL = 10.0  # s
+CHECK_INTERVAL = 5.0  # s, watchdog check and scheduled collection in the child
+STALL_AFTER = 30.0  # s
+EXIT_REINSTALL = 3
+HOOK_PROCESS_FLAG = "--hook-process"
+
+
+# Child
+
+class _SimulatedEvent:
+    __slots__ = ("scan_code", "event_type")
+
+    def __init__(self, scan_code, event_type):
+        self.scan_code = scan_code
+        self.event_type = event_type
+
+
+def child_main(argv=None, stdin=None, stdout=None):
+    """Entry point of the hook process. Returns the exit status.
+
+    With --no-hook no keyboard hook is installed; events then only come from
+    "simulate" (benchmarks, and hosts where hooking needs privileges), and
+    the watchdog does not look for stalls.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    hook = "--no-hook" not in argv
+    stall_after = STALL_AFTER
+    if "--stall-after" in argv[:-1]:
+        try:
+            stall_after = float(argv[argv.index("--stall-after") + 1])
+        except ValueError:
+            pass
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    outbox = queue.SimpleQueue()
+    engine = HotkeyEngine(resolver=None)  # Bindings arrive precompiled
+    callback_time = LatencyHistogram("hook_callback_seconds")
+    dispatch_time = LatencyHistogram("hook_dispatch_seconds")  # Simulated events: due time to callback return
+    bindings = {}
+    last_activity = [0.0]
+    feed = engine.feed
+    put = outbox.put
+    clock = time.perf_counter
+    gc_policy = GcPolicy()
+
+    def send(message):
+        if message["event"] == "stats":
+            message["callback"] = callback_time.summary()
+            if dispatch_time.count:
+                message["dispatch"] = dispatch_time.summary()
+        stdout.write(json.dumps(message) + "\n")
+        stdout.flush()
+
+    class PipeLog:
+        # The watchdog logs from check(), which runs on the writer thread
+        def __getattr__(self, level):
+            return lambda message: send({"event": "log", "level": level, "message": message})
+
+    def reinstall(reason):
+        os._exit(EXIT_REINSTALL)  # The parent starts a new child, which registers a new hook
+
+    watchdog = HookWatchdog(reinstall, log=PipeLog(), stall_after=stall_after,
+                            key_probe=keyboard_input_seen if hook else lambda: None)
+    observe = watchdog.observe
+    hook_threads = gc_policy.hook_threads
+    get_ident = threading.get_ident
+
+    def on_event(event):
+        started = clock()
+        if get_ident() not in hook_threads:
+            hook_threads.add(get_ident())  # keyboard's handler thread, or a simulate() thread
+        is_down = event.event_type == 'down'
+        name = feed(event.scan_code, is_down)
+        if name is not None:
+            put({"event": "hotkey", "name": name, "t": started})
+        elif is_down and started - last_activity[0] > ACTIVITY_INTERVAL:
+            last_activity[0] = started
+            put({"event": "activity"})
+        finished = clock()
+        callback_time.record(finished - started)
+        observe(finished - started, finished)
+
+    def writer():
+        reported = 0
+        last_check = last_stats = clock()
+        while True:
+            try:
+                message = outbox.get(timeout=CHECK_INTERVAL)
+            except queue.Empty:
+                message = None
+            try:
+                if message is not None:
+                    if message["event"] == "stats":
+                        reported, last_stats = callback_time.count, clock()
+                    send(message)
+                now = clock()
+                if now - last_check >= CHECK_INTERVAL:
+                    last_check = now
+                    if gc_policy.applied:
+                        gc_policy.collect()
+                    watchdog.check()
+                    if now - last_stats >= STATS_INTERVAL and callback_time.count != reported:
+                        reported, last_stats = callback_time.count, now
+                        send({"event": "stats"})
+            except (OSError, ValueError):
+                return  # The parent is gone; the stdin loop ends too
+
+    def simulate(events, rate):
+        # Stands in for the keyboard library's hook thread: presses every key of one binding, then releases them
+        groups = next(iter(bindings.values()), ())
+        codes = [group[0] for group in groups] or [30]
+        interval = 1.0 / rate if rate else 0.0
+        callback_time.reset()  # Each run's stats cover that run only
+        dispatch_time.reset()
+        try:
+            start = clock()
+            for index in range(events):
+                due = start + index * interval
+                delay = due - clock()
+                if delay > 0:
+                    time.sleep(delay)
+                step = index % (2 * len(codes))
+                on_event(_SimulatedEvent(codes[step % len(codes)], 'down' if step < len(codes) else 'up'))
+                if interval:
+                    dispatch_time.record(clock() - due)
+        except Exception as e:
+            put({"event": "log", "level": "error", "message": f"Simulated events failed: {type(e).__name__}: {str(e)}"})
+        put({"event": "stats"})
+
+    threading.Thread(target=writer, name="hook-writer", daemon=True).start()
+    if hook:
+        try:
+            import keyboard
+            keyboard.hook(on_event, suppress=False)
+        except Exception as e:
+            put({"event": "log", "level": "error", "message": f"Keyboard hook failed: {type(e).__name__}: {str(e)}"})
+            time.sleep(0.1)
+            return 1
+    gc_policy.apply()
+    put({"event": "ready", "pid": os.getpid()})
+    for line in stdin:
+        try:
+            command = json.loads(line)
+        except ValueError:
+            continue
+        cmd = command.get("cmd")
+        if cmd == "bind":
+            groups = tuple(tuple(group) for group in command["groups"])
+            engine.add_binding(command["name"], command["hotkey"], groups=groups)
+            bindings[command["name"]] = groups
+        elif cmd == "unbind":
+            engine.remove_binding(command["name"])
+            bindings.pop(command["name"], None)
+        elif cmd == "simulate":
+            threading.Thread(target=simulate, args=(command["events"], command.get("rate", 0)), daemon=True).start()
+        elif cmd == "exit":
+            break
+    put({"event": "stats"})
+    time.sleep(0.05)  # Let the writer send the last stats
+    return 0
+
+
+# Parent
+
+_restarts = REGISTRY.counter("hook_process_restarts_total", "Times the hook process exited and was restarted")
+_forward_time = REGISTRY.histogram("hook_forward_seconds", "Key-down in the hook process to the app receiving it")
+
+
+def hook_command():
+    """Command line that starts the hook process."""
+    if getattr(sys, "frozen", False):
+        return [sys.executable, HOOK_PROCESS_FLAG]
+    return [sys.executable, os.path.abspath(__file__)]
+
+
+class HookProcess:
+    """Supervises the hook child. on_hotkey(name, pressed_at) and on_activity() run on the reader thread."""
+
+    def __init__(self, on_hotkey, on_activity=None, on_exhausted=None, log=None, command=None,
+                 max_failures=5, stable_after=30.0, hook=True):
+        self.on_hotkey = on_hotkey
+        self.on_activity = on_activity
+        self.on_exhausted = on_exhausted
+        self.log = log
+        self.command = (command or hook_command()) + ([] if hook else ["--no-hook"])
+        self.max_failures = max_failures
+        self.stable_after = stable_after
+        self.stall_after = STALL_AFTER
+        self.restarts = 0
+        self.stats = {}
+        self.process = None
+        self._bindings = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+        self._keys_seen = False
+        self._thread = None
+        REGISTRY.gauge("hook_process_alive", "1 while the split-process keyboard hook is running",
+                       function=lambda: int(self.alive))
+        REGISTRY.gauge("hook_process_callback_p99_us", "p99 hook callback time reported by the hook process",
+                       function=lambda: self.stats["callback"]["p99_ms"] * 1000 if self.stats else None)
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._supervise, name="hook-supervisor", daemon=True)
+        self._thread.start()
+
+    def wait_ready(self, timeout=5.0):
+        return self._ready.wait(timeout)
+
+    def bind(self, name, hotkey, groups):
+        """Set a binding; it is sent now if the child is running and again after every restart."""
+        with self._lock:
+            self._bindings[name] = (hotkey, groups)
+            self._send({"cmd": "bind", "name": name, "hotkey": hotkey, "groups": groups})
+
+    def unbind(self, name):
+        with self._lock:
+            if self._bindings.pop(name, None) is not None:
+                self._send({"cmd": "unbind", "name": name})
+
+    def simulate(self, events, rate=0):
+        with self._lock:
+            self._send({"cmd": "simulate", "events": events, "rate": rate})
+
+    def stop(self, timeout=2.0):
+        self._stopping.set()
+        process = self.process
+        if process is not None:
+            with self._lock:
+                self._send({"cmd": "exit"})
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _send(self, message):
+        process = self.process
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.stdin.write(json.dumps(message) + "\n")
+            process.stdin.flush()
+        except (OSError, ValueError):
+            pass  # The reader thread notices the exit and restarts it
+
+    def _spawn(self):
+        flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        self._keys_seen = False
+        process = subprocess.Popen(self.command + ["--stall-after", str(self.stall_after)], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True, bufsize=1, creationflags=flags)
+        with self._lock:
+            self.process = process
+            for name, (hotkey, groups) in self._bindings.items():
+                self._send({"cmd": "bind", "name": name, "hotkey": hotkey, "groups": groups})
+        return process
+
+    def _supervise(self):
+        failures = 0
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            try:
+                process = self._spawn()
+            except OSError as e:
+                self._log("error", f"Failed to start the hook process: {str(e)}")
+                process = None
+            if process is not None:
+                self._read(process)
+                process.wait()
+            if self._stopping.is_set():
+                break
+            self._ready.clear()
+            code = process.returncode if process is not None else None
+            if code == EXIT_REINSTALL:
+                # The child's watchdog asked for a fresh hook; keep backing off while no keys arrive
+                self.stall_after = STALL_AFTER if self._keys_seen else min(MAX_STALL_AFTER, self.stall_after * 2)
+                _restarts.inc()
+                self.restarts += 1
+                self._log("info", "Hook process exited to re-install the keyboard hook; restarting")
+                self._stopping.wait(0.2)
+                continue
+            failures = 0 if time.monotonic() - started > self.stable_after else failures + 1
+            if failures >= self.max_failures:
+                self._log("error", f"Hook process failed {failures} times in a row; giving up")
+                if self.on_exhausted:
+                    self.on_exhausted()
+                break
+            _restarts.inc()
+            self.restarts += 1
+            delay = min(5.0, 0.2 * 2 ** failures)
+            self._log("warning", f"Hook process exited (code {code}); restarting in {delay:.1f}s")
+            self._stopping.wait(delay)
+
+    def _read(self, process):
+        on_hotkey, on_activity = self.on_hotkey, self.on_activity
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            event = message.get("event")
+            if event == "hotkey":
+                now = time.perf_counter()
+                pressed_at = min(message.get("t", now), now)
+                _forward_time.record(now - pressed_at)
+                self._keys_seen = True
+                on_hotkey(message["name"], pressed_at)
+            elif event == "activity":
+                self._keys_seen = True
+                if on_activity:
+                    on_activity()
+            elif event == "stats":
+                self.stats = message
+            elif event == "ready":
+                self._log("info", f"Hook process {message.get('pid')} ready")
+                self._ready.set()
+            elif event == "log":
+                self._log(message.get("level", "info"), message.get("message", ""))
+
+    def _log(self, level, message):
+        if self.log is not None:
+            getattr(self.log, level, self.log.info)(message)
+
+
+if __name__ == "__main__":
+    sys.exit(child_main())
@@ -0,0 +1,141 @@
+"""Keyboard hook health: callback timing, slow callbacks and silent hook loss.
+
+Windows removes a low-level keyboard hook whose callback runs longer than
+LowLevelHooksTimeout (HKCU\\Control Panel\\Desktop), and it does so without
+telling the process. HookWatchdog.observe() is called at the end of every
+hook callback. It records the duration in a rolling window and remembers
+callbacks slower than a fraction of the timeout, which is all it does on the
+hook thread. check() runs periodically on another thread. It publishes the
+last window, logs slow callbacks, and asks for a re-install when:
+
+  - a callback took longer than the hook timeout, so Windows may already have
+    dropped the hook, or
+  - a key went down more than stall_after after the hook's last event.
+    keyboard_input_seen() probes GetAsyncKeyState's "pressed since the last
+    call" bit for every non-mouse virtual key, so mouse input never counts.
+    The bit can be consumed by another process calling GetAsyncKeyState. A
+    probe can therefore miss presses, but it never reports a key that was not
+    pressed, so a miss only delays detection. Each re-install that brings no
+    key events back doubles the wait before the next one.
+
+Stall detection needs GetAsyncKeyState, so it only runs on Windows.
+"""
+import ctypes
+import sys
+import time
+
+from metrics import REGISTRY, LatencyHistogram
+
+DEFAULT_HOOK_TIMEOUT = 0.3  # s, assumed when the registry value is absent; Windows 10 caps the setting at 1 s
+MAX_STALL_AFTER = 1800.0  # s
+
+_slow_callbacks = REGISTRY.counter("hook_slow_callbacks_total", "Hook callbacks slower than the watchdog threshold")
+_reinstalls = REGISTRY.counter("hook_reinstalls_total", "Keyboard hook re-installs requested by the watchdog")
+
+
+def hook_timeout():
+    """The system's low-level hook timeout in seconds."""
+    if sys.platform != "win32":
+        return DEFAULT_HOOK_TIMEOUT
+    try:
+        import winreg
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Control Panel\Desktop") as key:
+            value, _ = winreg.QueryValueEx(key, "LowLevelHooksTimeout")
+        return min(1.0, int(value) / 1000.0)
+    except (OSError, ValueError):
+        return DEFAULT_HOOK_TIMEOUT
+
+
+_KEYBOARD_VKS = range(0x08, 0xFF)  # Below 0x08 are the mouse buttons
+
+
+def keyboard_input_seen():
+    """True if a key went down since the previous call, False if not, None where unknown."""
+    if sys.platform != "win32":
+        return None
+    get_async_key_state = ctypes.windll.user32.GetAsyncKeyState
+    seen = False
+    for vk in _KEYBOARD_VKS:
+        if get_async_key_state(vk) & 1:
+            seen = True  # Keep probing: every call clears that key's bit for the next probe
+    return seen
+
+
+class HookWatchdog:
+    """Rolling hook-callback statistics plus slow-callback and stall detection.
+
+    reinstall(reason) is called from check(); clock must be the one the
+    callers pass to observe() (time.perf_counter by default).
+    """
+
+    def __init__(self, reinstall, log=None, timeout=None, slow_fraction=0.25, stall_after=30.0, window=60.0,
+                 clock=time.perf_counter, key_probe=keyboard_input_seen):
+        self.reinstall = reinstall
+        self.log = log
+        self.timeout = timeout or hook_timeout()
+        self.slow_threshold = self.timeout * slow_fraction
+        self.base_stall_after = stall_after
+        self.stall_after = stall_after
+        self.window_seconds = window
+        self.clock = clock
+        self.key_probe = key_probe
+        now = clock()
+        self.window = LatencyHistogram("hook_callback_window_seconds")
+        self.window_started = now
+        self.last_window = None
+        self.last_event = now
+        self.key_seen_at = None
+        self.last_reinstall = None
+        self.reinstalls = 0
+        self._slow = []
+        REGISTRY.gauge("hook_callback_window_p99_us", "p99 hook callback time over the last full window",
+                       function=lambda: self.last_window["p99_ms"] * 1000 if self.last_window else None)
+        REGISTRY.gauge("hook_idle_seconds", "Seconds since the keyboard hook last saw an event",
+                       function=lambda: self.clock() - self.last_event)
+
+    def rearm(self):
+        """Forget earlier silence and slow callbacks, e.g. after the hook was (re)installed."""
+        self.last_event = self.clock()
+        self._slow = []
+
+    def observe(self, duration, finished):
+        """On the hook thread, at the end of each callback."""
+        self.last_event = finished
+        self.window.record(duration)
+        if duration > self.slow_threshold:
+            self._slow.append(duration)
+
+    def check(self):
+        """Off the hook thread, every few seconds. Returns the re-install reason, or None."""
+        now = self.clock()
+        if now - self.window_started >= self.window_seconds:
+            self.last_window = self.window.summary()
+            self.window = LatencyHistogram("hook_callback_window_seconds")
+            self.window_started = now
+        if self.last_reinstall is not None and self.last_event > self.last_reinstall:
+            self.stall_after = self.base_stall_after  # Events came back after the last re-install
+        slow, self._slow = self._slow, []
+        reason = None
+        if slow:
+            _slow_callbacks.inc(len(slow))
+            self._log("warning", f"{len(slow)} slow keyboard hook callback(s), worst {max(slow) * 1000:.0f} ms "
+                                 f"(hook timeout {self.timeout * 1000:.0f} ms)")
+            if max(slow) >= self.timeout:
+                reason = f"a callback took {max(slow) * 1000:.0f} ms, over the {self.timeout * 1000:.0f} ms hook timeout"
+        if self.key_probe():
+            self.key_seen_at = now
+        if reason is None and self.key_seen_at is not None and self.key_seen_at - self.last_event > self.stall_after:
+            reason = (f"no key events for {now - self.last_event:.0f}s although a key went down "
+                      f"{now - self.key_seen_at:.0f}s ago")
+            self.stall_after = min(MAX_STALL_AFTER, self.stall_after * 2)
+        if reason is not None:
+            _reinstalls.inc()
+            self.reinstalls += 1
+            self.last_reinstall = self.last_event = now
+            self._log("warning", f"Re-installing the keyboard hook: {reason}")
+            self.reinstall(reason)
+        return reason
+
+    def _log(self, level, message):
+        if self.log is not None:
+            getattr(self.log, level)(message)
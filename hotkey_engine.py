@@ -0,0 +1,118 @@
+"""Precompiled hotkey matching for the global keyboard hook.
+
+Hotkey strings such as "ctrl+alt+m" are parsed once into groups of scan codes
+(a group is satisfied when any of its scan codes is down, e.g. left or right
+ctrl). Pressed-key state is then maintained incrementally from down/up events,
+so matching costs a single dict lookup for keys that are not bound and a few
+integer updates for keys that are.
+"""
+
+
+def default_scan_code_resolver(key_name):
+    """Resolve a key name to its scan codes using the keyboard library."""
+    import keyboard
+    return keyboard.key_to_scan_codes(key_name)
+
+
+def parse_hotkey(hotkey, resolver=default_scan_code_resolver):
+    """Parse "ctrl+alt+m" into a tuple of scan-code groups, one group per key."""
+    if not hotkey or ',' in hotkey:
+        raise ValueError(f"Unsupported hotkey: {hotkey!r}")
+    groups = []
+    for name in hotkey.split('+'):
+        name = name.strip().lower()
+        if not name:
+            raise ValueError(f"Empty key in hotkey: {hotkey!r}")
+        scan_codes = tuple(resolver(name))
+        if not scan_codes:
+            raise ValueError(f"Unknown key {name!r} in hotkey {hotkey!r}")
+        groups.append(scan_codes)
+    return tuple(groups)
+
+
+class _Binding:
+    __slots__ = ("name", "counts", "satisfied", "size")
+
+    def __init__(self, name, size):
+        self.name = name
+        self.counts = [0] * size
+        self.satisfied = 0
+        self.size = size
+
+
+class HotkeyEngine:
+    """Matches key events against precompiled hotkey bindings in O(1) per event."""
+
+    def __init__(self, resolver=default_scan_code_resolver):
+        self.resolver = resolver
+        self._bindings = {}
+        self._code_slots = {}
+        self._pressed = set()
+
+    def add_binding(self, name, hotkey, groups=None):
+        """Compile hotkey and register it under name, replacing any previous binding with that name.
+
+        groups, when given, are already-compiled scan-code groups (e.g. sent by another process).
+        """
+        if groups is None:
+            groups = parse_hotkey(hotkey, self.resolver)
+        self._bindings[name] = (hotkey, tuple(tuple(group) for group in groups))
+        self._rebuild()
+
+    def binding(self, name):
+        """(hotkey, groups) registered under name, or None."""
+        return self._bindings.get(name)
+
+    def remove_binding(self, name):
+        if self._bindings.pop(name, None) is not None:
+            self._rebuild()
+
+    def has_bindings(self):
+        return bool(self._bindings)
+
+    def _rebuild(self):
+        code_slots = {}
+        for name, (hotkey, groups) in self._bindings.items():
+            binding = _Binding(name, len(groups))
+            for group_index, scan_codes in enumerate(groups):
+                for scan_code in scan_codes:
+                    code_slots.setdefault(scan_code, []).append((binding, group_index))
+        self._code_slots = {code: tuple(slots) for code, slots in code_slots.items()}
+        self._pressed = set()
+
+    def reset(self):
+        """Forget pressed-key state, e.g. after the hook was re-installed and key-ups may have been missed."""
+        self._pressed.clear()
+        for slots in self._code_slots.values():
+            for binding, group_index in slots:
+                binding.counts[group_index] = 0
+                binding.satisfied = 0
+
+    def feed(self, scan_code, is_down):
+        """Process one key event. Returns the binding name completed by this key-down, else None."""
+        slots = self._code_slots.get(scan_code)
+        if slots is None:
+            return None
+        pressed = self._pressed
+        if is_down:
+            if scan_code in pressed:
+                return None  # auto-repeat
+            pressed.add(scan_code)
+            matched = None
+            for binding, group_index in slots:
+                counts = binding.counts
+                counts[group_index] += 1
+                if counts[group_index] == 1:
+                    binding.satisfied += 1
+                    if binding.satisfied == binding.size and matched is None:
+                        matched = binding.name
+            return matched
+        if scan_code not in pressed:
+            return None
+        pressed.discard(scan_code)
+        for binding, group_index in slots:
+            counts = binding.counts
+            counts[group_index] -= 1
+            if counts[group_index] == 0:
+                binding.satisfied -= 1
+        return None
@@ -0,0 +1,422 @@
+"""Prerendered overlay icons, persisted between runs.
+
+Rasterizing the overlay SVG with cairosvg needs the cairo library and takes
+tens of milliseconds per size. IconAtlas keeps one alpha mask per size,
+rendered once, and writes them all to a single compressed file next to the
+config (~/.mic_mute_app/icon_atlas-<svg hash>.bin). Later starts read the
+masks back with no rasterization at all. Each state (muted, unmuted, error)
+is the same mask tinted with the state colour, encoded as a PNG that Tk can
+load directly.
+
+When cairosvg or the cairo library is unavailable, rasterize() falls back to
+a small pure-Python renderer. It handles the path subset the bundled icons use
+(move/line/curve/arc commands, no strokes or gradients), with 4x vertical
+supersampling and exact horizontal coverage.
+
+prerender() may run on a worker thread while the UI thread asks for masks;
+each size is rasterized once, by whichever thread gets to it first.
+"""
+import base64
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from xml.etree import ElementTree
+
+from app_logging import get_logger
+from metrics import REGISTRY
+from overlay_cache import LRUCache
+
+log = get_logger("icons")
+
+_rasterizations = REGISTRY.counter("icon_rasterizations_total", "Overlay icon sizes rasterized from SVG")
+_rasterize_time = REGISTRY.histogram("icon_rasterize_seconds", "Time to rasterize one overlay icon size")
+
+MUTED_OVERLAY_SVG = """
+<svg fill="red" width="64" height="64" viewBox="-0.24 0 1.52 1.52" xmlns="http://www.w3.org/2000/svg" class="cf-icon-svg"><path d="M0.933 0.633v0.105a0.421 0.421 0 0 1 -0.121 0.296 0.416 0.416 0 0 1 -0.131 0.090 0.4 0.4 0 0 1 -0.116 0.031v0.152h0.185a0.044 0.044 0 0 1 0 0.089H0.291a0.044 0.044 0 0 1 0 -0.089h0.185v-0.152a0.4 0.4 0 0 1 -0.116 -0.031 0.416 0.416 0 0 1 -0.131 -0.090 0.421 0.421 0 0 1 -0.121 -0.296v-0.105a0.044 0.044 0 1 1 0.089 0v0.105a0.33 0.33 0 0 0 0.096 0.233 0.319 0.319 0 0 0 0.458 0 0.33 0.33 0 0 0 0.096 -0.233v-0.105a0.044 0.044 0 1 1 0.089 0zM0.302 0.83a0.232 0.232 0 0 1 -0.019 -0.092V0.379A0.232 0.232 0 0 1 0.302 0.286a0.24 0.24 0 0 1 0.127 -0.127 0.232 0.232 0 0 1 0.093 -0.019 0.232 0.232 0 0 1 0.092 0.019 0.238 0.238 0 0 1 0.143 0.22l-0.001 0.359a0.237 0.237 0 0 1 -0.068 0.167 0.24 0.24 0 0 1 -0.075 0.051 0.232 0.232 0 0 1 -0.092 0.019 0.232 0.232 0 0 1 -0.093 -0.019A0.237 0.237 0 0 1 0.302 0.83"/></svg>
+"""
+
+ATLAS_SIZES = (16, 24, 32, 48, 64, 96, 128)
+STATE_COLOURS = {"muted": (255, 0, 0), "unmuted": (0, 160, 0), "error": (255, 152, 0)}
+
+_MAGIC = b"MMIA1\n"
+_SUBSAMPLES = 4
+_TOKEN = re.compile(r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_cairo_unavailable = False
+
+
+# Rasterizing
+
+def rasterize(svg_source, size):
+    """Render svg_source to a size x size alpha mask. Returns (mask bytes, renderer name)."""
+    global _cairo_unavailable
+    started = time.perf_counter()
+    mask, renderer = None, "python"
+    if not _cairo_unavailable:
+        try:
+            mask, renderer = _rasterize_cairo(svg_source, size), "cairo"
+        except (ImportError, OSError) as e:
+            _cairo_unavailable = True
+            log.info(f"cairosvg unavailable, using the built-in rasterizer: {str(e)}")
+    if mask is None:
+        mask = rasterize_python(svg_source, size)
+    _rasterizations.inc()
+    _rasterize_time.record(time.perf_counter() - started)
+    return mask, renderer
+
+
+def _rasterize_cairo(svg_source, size):
+    import cairosvg
+    from PIL import Image
+    png = cairosvg.svg2png(bytestring=svg_source.encode('utf-8'), output_width=size, output_height=size,
+                           background_color='transparent')
+    return Image.open(io.BytesIO(png)).convert('RGBA').getchannel('A').tobytes()
+
+
+def rasterize_python(svg_source, size):
+    """Fill every <path> of svg_source (nonzero rule) into a size x size alpha mask."""
+    root = ElementTree.fromstring(svg_source.strip())
+    view_box = root.get("viewBox")
+    if view_box:
+        min_x, min_y, width, height = (float(v) for v in view_box.replace(",", " ").split())
+    else:
+        min_x, min_y = 0.0, 0.0
+        width, height = float(root.get("width", size)), float(root.get("height", size))
+    # preserveAspectRatio="xMidYMid meet", the SVG default
+    scale = min(size / width, size / height)
+    offset_x = (size - width * scale) / 2 - min_x * scale
+    offset_y = (size - height * scale) / 2 - min_y * scale
+    polygons = []
+    for element in root.iter():
+        if element.tag.rsplit("}", 1)[-1] == "path" and element.get("d"):
+            for polygon in flatten_path(element.get("d"), scale):
+                polygons.append([(x * scale + offset_x, y * scale + offset_y) for x, y in polygon])
+    return fill_polygons(polygons, size)
+
+
+def _segments(length):
+    """Line segments for a curve about length pixels long."""
+    return max(2, min(64, int(length / 1.5) + 1))
+
+
+def flatten_path(d, scale=1.0):
+    """Turn SVG path data into closed polygons of user-space points; curves become line segments."""
+    tokens = _TOKEN.findall(d)
+    polygons, current = [], []
+    x = y = start_x = start_y = 0.0
+    control = None  # Reflected control point for S/T
+    index, command = 0, None
+
+    def number():
+        nonlocal index
+        value = float(tokens[index])
+        index += 1
+        return value
+
+    def flag():
+        # Arc flags may be written without separators ("011"): consume one digit at a time
+        nonlocal index
+        token = tokens[index]
+        if token[0] in "01" and len(token) > 1:
+            tokens[index] = token[1:]
+            return int(token[0])
+        index += 1
+        return int(float(token))
+
+    while index < len(tokens):
+        if tokens[index].isalpha():
+            command = tokens[index]
+            index += 1
+        elif command is None:
+            raise ValueError("path data must start with a command")
+        relative = command.islower()
+        base_x, base_y = (x, y) if relative else (0.0, 0.0)
+        kind = command.upper()
+        previous_control, control = control, None
+        if kind == "Z":
+            if current:
+                polygons.append(current)
+            current = []
+            x, y = start_x, start_y
+            command = None
+            continue
+        if kind == "M":
+            if len(current) > 1:
+                polygons.append(current)
+            x, y = base_x + number(), base_y + number()
+            start_x, start_y = x, y
+            current = [(x, y)]
+            command = "l" if relative else "L"  # Further pairs are implicit line-tos
+            continue
+        if not current:
+            current = [(x, y)]
+        if kind == "L":
+            x, y = base_x + number(), base_y + number()
+            current.append((x, y))
+        elif kind == "H":
+            x = base_x + number()
+            current.append((x, y))
+        elif kind == "V":
+            y = base_y + number()
+            current.append((x, y))
+        elif kind in "CS":
+            if kind == "C":
+                x1, y1 = base_x + number(), base_y + number()
+            else:
+                x1, y1 = _reflect(x, y, previous_control, "CS")
+            x2, y2 = base_x + number(), base_y + number()
+            x3, y3 = base_x + number(), base_y + number()
+            length = (math.hypot(x1 - x, y1 - y) + math.hypot(x2 - x1, y2 - y1) + math.hypot(x3 - x2, y3 - y2)) * scale
+            steps = _segments(length)
+            for step in range(1, steps + 1):
+                t = step / steps
+                u = 1 - t
+                current.append((u * u * u * x + 3 * u * u * t * x1 + 3 * u * t * t * x2 + t * t * t * x3,
+                                u * u * u * y + 3 * u * u * t * y1 + 3 * u * t * t * y2 + t * t * t * y3))
+            x, y, control = x3, y3, (kind, x2, y2)
+        elif kind in "QT":
+            if kind == "Q":
+                x1, y1 = base_x + number(), base_y + number()
+            else:
+                x1, y1 = _reflect(x, y, previous_control, "QT")
+            x2, y2 = base_x + number(), base_y + number()
+            steps = _segments((math.hypot(x1 - x, y1 - y) + math.hypot(x2 - x1, y2 - y1)) * scale)
+            for step in range(1, steps + 1):
+                t = step / steps
+                u = 1 - t
+                current.append((u * u * x + 2 * u * t * x1 + t * t * x2, u * u * y + 2 * u * t * y1 + t * t * y2))
+            x, y, control = x2, y2, (kind, x1, y1)
+        elif kind == "A":
+            rx, ry, rotation = abs(number()), abs(number()), number()
+            large_arc, sweep = flag(), flag()
+            end_x, end_y = base_x + number(), base_y + number()
+            current.extend(_arc_points(x, y, rx, ry, rotation, large_arc, sweep, end_x, end_y, scale))
+            x, y = end_x, end_y
+        else:
+            raise ValueError(f"unsupported path command {command!r}")
+    if len(current) > 1:
+        polygons.append(current)
+    return polygons
+
+
+def _reflect(x, y, control, kinds):
+    """First control point of a smooth curve: the previous one mirrored, if it came from one of kinds."""
+    if control and control[0] in kinds:
+        return 2 * x - control[1], 2 * y - control[2]
+    return x, y
+
+
+def _arc_points(x1, y1, rx, ry, rotation, large_arc, sweep, x2, y2, scale):
+    """Points along an SVG elliptical arc (endpoint parameterization), excluding the start."""
+    if (x1, y1) == (x2, y2):
+        return []
+    if rx == 0 or ry == 0:
+        return [(x2, y2)]
+    phi = math.radians(rotation)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p = cos_phi * dx + sin_phi * dy
+    y1p = -sin_phi * dx + cos_phi * dy
+    radii_check = x1p * x1p / (rx * rx) + y1p * y1p / (ry * ry)
+    if radii_check > 1:
+        rx, ry = rx * math.sqrt(radii_check), ry * math.sqrt(radii_check)
+    numerator = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    denominator = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    coefficient = math.sqrt(max(0.0, numerator / denominator))
+    if large_arc == sweep:
+        coefficient = -coefficient
+    cxp, cyp = coefficient * rx * y1p / ry, -coefficient * ry * x1p / rx
+    cx = cos_phi * cxp - sin_phi * cyp + (x1 + x2) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (y1 + y2) / 2
+    theta = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    delta = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx) - theta
+    if not sweep and delta > 0:
+        delta -= 2 * math.pi
+    elif sweep and delta < 0:
+        delta += 2 * math.pi
+    steps = _segments(abs(delta) * max(rx, ry) * scale)
+    points = []
+    for step in range(1, steps + 1):
+        angle = theta + delta * step / steps
+        ex, ey = rx * math.cos(angle), ry * math.sin(angle)
+        points.append((cx + cos_phi * ex - sin_phi * ey, cy + sin_phi * ex + cos_phi * ey))
+    points[-1] = (x2, y2)
+    return points
+
+
+def fill_polygons(polygons, size):
+    """Scanline-fill closed polygons (pixel coordinates, nonzero rule) into an alpha mask."""
+    edges = []
+    for polygon in polygons:
+        for (xa, ya), (xb, yb) in zip(polygon, polygon[1:] + polygon[:1]):
+            if ya == yb:
+                continue
+            direction = 1 if yb > ya else -1
+            if ya > yb:
+                xa, ya, xb, yb = xb, yb, xa, ya
+            edges.append((ya, yb, xa, (xb - xa) / (yb - ya), direction))
+    coverage = [0.0] * (size * size)
+    weight = 1.0 / _SUBSAMPLES
+    for row in range(size):
+        row_edges = [edge for edge in edges if edge[0] < row + 1 and edge[1] > row]
+        if not row_edges:
+            continue
+        base = row * size
+        for sub in range(_SUBSAMPLES):
+            sample_y = row + (sub + 0.5) / _SUBSAMPLES
+            crossings = sorted((x0 + (sample_y - y0) * slope, direction)
+                               for y0, y1, x0, slope, direction in row_edges if y0 <= sample_y < y1)
+            winding, span_start = 0, 0.0
+            for crossing, direction in crossings:
+                was_inside = winding != 0
+                winding += direction
+                if not was_inside and winding:
+                    span_start = crossing
+                elif was_inside and not winding:
+                    left, right = max(0.0, span_start), min(float(size), crossing)
+                    if right <= left:
+                        continue
+                    first, last = int(left), int(right)
+                    if first == last:
+                        coverage[base + first] += (right - left) * weight
+                        continue
+                    coverage[base + first] += (first + 1 - left) * weight
+                    for column in range(first + 1, last):
+                        coverage[base + column] += weight
+                    if last < size:
+                        coverage[base + last] += (right - last) * weight
+    return bytes(min(255, int(value * 255 + 0.5)) for value in coverage)
+
+
+# Tinting and encoding
+
+def tint(mask, colour):
+    """RGBA bytes: colour everywhere, with mask as alpha."""
+    pixels = len(mask)
+    rgba = bytearray(pixels * 4)
+    rgba[0::4] = bytes((colour[0],)) * pixels
+    rgba[1::4] = bytes((colour[1],)) * pixels
+    rgba[2::4] = bytes((colour[2],)) * pixels
+    rgba[3::4] = mask
+    return bytes(rgba)
+
+
+def encode_png(width, height, rgba):
+    """Minimal 8-bit RGBA PNG; Tk 8.6 and PIL both read it."""
+    stride = width * 4
+    raw = b"".join(b"\x00" + rgba[row * stride:(row + 1) * stride] for row in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+
+class IconAtlas:
+    """Alpha masks of one SVG at several sizes, tinted per state on demand and persisted between runs."""
+
+    def __init__(self, svg_source, cache_dir=None, sizes=ATLAS_SIZES, colours=STATE_COLOURS):
+        self.svg_source = svg_source
+        self.sizes = tuple(sizes)
+        self.colours = dict(colours)
+        self.key = hashlib.sha256(svg_source.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, f"icon_atlas-{self.key}.bin") if cache_dir else None
+        self.masks = {}
+        self.renderers = {}
+        self.rasterized = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._pngs = LRUCache(capacity=max(1, len(self.sizes) * len(self.colours)))
+
+    def load(self):
+        """Read the persisted masks. Returns the number of sizes loaded; a bad or missing file loads none."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            if not data.startswith(_MAGIC):
+                raise ValueError("not an icon atlas")
+            header_end = data.index(b"\n", len(_MAGIC))
+            header = json.loads(data[len(_MAGIC):header_end])
+            if header.get("svg") != self.key:
+                raise ValueError("atlas was built from a different SVG")
+            pixels = zlib.decompress(data[header_end + 1:])
+            offset, masks = 0, {}
+            for size, renderer in header["sizes"]:
+                masks[size] = pixels[offset:offset + size * size]
+                self.renderers[size] = renderer
+                offset += size * size
+            if offset != len(pixels):
+                raise ValueError("atlas size does not match its header")
+        except (OSError, ValueError, KeyError, TypeError, zlib.error) as e:
+            log.warning(f"Ignoring icon atlas {self.path}: {str(e)}")
+            return 0
+        self.masks.update(masks)
+        log.debug("Loaded %d icon sizes from %s", len(masks), self.path)
+        return len(masks)
+
+    def save(self):
+        """Persist every mask in one file (atomic replace). Returns False on failure."""
+        if not self.path:
+            return False
+        sizes = sorted(self.masks)
+        header = json.dumps({"svg": self.key, "sizes": [[size, self.renderers.get(size, "python")] for size in sizes]})
+        blob = zlib.compress(b"".join(self.masks[size] for size in sizes), 9)
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".icon_atlas-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(_MAGIC + header.encode('utf-8') + b"\n" + blob)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            log.error(f"Error saving icon atlas: {str(e)}")
+            return False
+        self.dirty = False
+        log.info(f"Saved {len(sizes)} icon sizes to {self.path}")
+        return True
+
+    def prerender(self):
+        """Rasterize every atlas size that is not loaded yet and persist the result."""
+        for size in self.sizes:
+            self.mask(size)
+        if self.dirty:
+            self.save()
+
+    def mask(self, size):
+        mask = self.masks.get(size)
+        if mask is None:
+            with self._lock:
+                mask = self.masks.get(size)
+                if mask is None:
+                    mask, self.renderers[size] = rasterize(self.svg_source, size)
+                    self.masks[size] = mask
+                    self.rasterized += 1
+                    self.dirty = True
+        return mask
+
+    def rgba(self, state, size):
+        return tint(self.mask(size), self.colours[state])
+
+    def png(self, state, size):
+        """PNG bytes for state at size, cached."""
+        return self._pngs.get_or_create((state, size), lambda: encode_png(size, size, self.rgba(state, size)))
+
+    def png_base64(self, state, size):
+        """The PNG as base64 text, the form tk.PhotoImage(data=...) accepts."""
+        return base64.b64encode(self.png(state, size)).decode('ascii')
@@ -0,0 +1,447 @@
+"""Line-delimited JSON over a local endpoint.
+
+Each message is one JSON object on one line. On POSIX the endpoint is a
+Unix-domain socket; on Windows it is a byte-mode named pipe. Both are reduced
+to a Channel with read_message()/write_message(), so the server and clients do
+not care which one they run on. Server-side pipes are opened overlapped, so a
+write from another thread (e.g. a subscription event) does not queue behind
+the connection thread's pending read. On both, a server-side write to a
+client that stops reading gives up after WRITE_TIMEOUT.
+
+Access is limited to the current user:
+
+  POSIX    the socket is bound under umask 077 in the per-user settings
+           directory, so it is never accessible to other users, even briefly
+  Windows  the pipe name includes the user name and the logon session id
+           (like the single-instance mutex in the Local\ namespace). Every
+           instance is created with a DACL that grants access only to the
+           current user's SID and with PIPE_REJECT_REMOTE_CLIENTS. The first
+           instance also uses FILE_FLAG_FIRST_PIPE_INSTANCE, so LocalServer.start()
+           fails instead of sharing a name another process created first. The
+           server creates the next instance before handing a connected one
+           off, so the name stays held while it accepts clients.
+
+A client cannot tell whether the process that owns a pipe is the app. A
+squatting process would make the app's start() fail, which is logged, but
+clients started before the app would talk to the squatter.
+"""
+import json
+import os
+import select
+import socket
+import sys
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("ipc")
+
+_IS_WINDOWS = sys.platform == "win32"
+
+# Named pipe constants not exported by _winapi
+_PIPE_TYPE_BYTE = 0x0
+_PIPE_READMODE_BYTE = 0x0
+_ERROR_PIPE_CONNECTED = 535
+_ERROR_PIPE_BUSY = 231
+_ERROR_BROKEN_PIPE = 109
+_ERROR_MORE_DATA = 234
+_ERROR_OPERATION_ABORTED = 995
+_PIPE_REJECT_REMOTE_CLIENTS = 0x8
+_FILE_FLAG_FIRST_PIPE_INSTANCE = 0x00080000
+
+REPLY_TIMEOUT = 30.0  # s, longest a connection waits for a PendingReply
+WRITE_TIMEOUT = 5.0  # s, server-side writes
+
+
+def default_address(name, directory):
+    """Endpoint address for name: a socket path in directory, or a per-user pipe name on Windows."""
+    if _IS_WINDOWS:
+        import ctypes
+        user = os.environ.get("USERNAME", "user")
+        session = ctypes.c_ulong(0)
+        ctypes.windll.kernel32.ProcessIdToSessionId(os.getpid(), ctypes.byref(session))
+        return rf"\\.\pipe\{name}-{user}-{session.value}"
+    return os.path.join(directory, f"{name}.sock")
+
+
+def _owner_only_security_attributes():
+    """SECURITY_ATTRIBUTES whose DACL grants access to the current user's SID only (Windows)."""
+    import ctypes
+    from ctypes import wintypes
+    advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    token = wintypes.HANDLE()
+    if not advapi32.OpenProcessToken(kernel32.GetCurrentProcess(), 0x0008, ctypes.byref(token)):  # TOKEN_QUERY
+        raise ctypes.WinError(ctypes.get_last_error())
+    try:
+        size = wintypes.DWORD(0)
+        advapi32.GetTokenInformation(token, 1, None, 0, ctypes.byref(size))  # TokenUser
+        buffer = ctypes.create_string_buffer(size.value)
+        if not advapi32.GetTokenInformation(token, 1, buffer, size, ctypes.byref(size)):
+            raise ctypes.WinError(ctypes.get_last_error())
+    finally:
+        kernel32.CloseHandle(token)
+    sid = ctypes.cast(buffer, ctypes.POINTER(ctypes.c_void_p))[0]  # TOKEN_USER.User.Sid
+    sid_string = wintypes.LPWSTR()
+    if not advapi32.ConvertSidToStringSidW(ctypes.c_void_p(sid), ctypes.byref(sid_string)):
+        raise ctypes.WinError(ctypes.get_last_error())
+    sddl = f"D:P(A;;GA;;;{sid_string.value})"
+    kernel32.LocalFree(sid_string)
+    descriptor = ctypes.c_void_p()
+    if not advapi32.ConvertStringSecurityDescriptorToSecurityDescriptorW(sddl, 1, ctypes.byref(descriptor), None):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+    class SECURITY_ATTRIBUTES(ctypes.Structure):
+        _fields_ = [("nLength", wintypes.DWORD), ("lpSecurityDescriptor", ctypes.c_void_p),
+                    ("bInheritHandle", wintypes.BOOL)]
+
+    # Lives as long as the server; the descriptor is never freed
+    return SECURITY_ATTRIBUTES(ctypes.sizeof(SECURITY_ATTRIBUTES), descriptor, False)
+
+
+class Channel:
+    """Buffered, line-oriented duplex connection; writes are safe from several threads."""
+
+    def __init__(self, recv, send, close):
+        self._recv = recv
+        self._send = send
+        self._close = close
+        self._buffer = b""
+        self._send_lock = threading.Lock()
+        self.closed = False
+
+    def read_line(self):
+        """Return the next line without its newline, or None once the peer has closed."""
+        while b"\n" not in self._buffer:
+            try:
+                data = self._recv(4096)
+            except OSError:
+                data = b""
+            if not data:
+                return None
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line.decode("utf-8").rstrip("\r")
+
+    def write_line(self, text):
+        data = text.encode("utf-8") + b"\n"
+        with self._send_lock:
+            self._send(data)
+
+    def read_message(self):
+        """Return the next decoded message, or None at end of stream. Raises ValueError on bad JSON."""
+        line = self.read_line()
+        while line is not None and not line.strip():
+            line = self.read_line()
+        if line is None:
+            return None
+        message = json.loads(line)
+        if not isinstance(message, dict):
+            raise ValueError("message must be a JSON object")
+        return message
+
+    def write_message(self, message):
+        self.write_line(json.dumps(message, separators=(",", ":")))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._close()
+        except OSError:
+            pass
+
+
+def _socket_channel(sock, write_timeout=None):
+    def send(data):
+        # Non-blocking sends, so the timeout does not apply to the connection thread's blocking reads
+        if write_timeout is None:
+            sock.sendall(data)
+            return
+        deadline = time.monotonic() + write_timeout
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[sock.send(view, socket.MSG_DONTWAIT):]
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([], [sock], [], remaining)[1]:
+                    raise TimeoutError(f"client did not read for {write_timeout:.0f}s")
+
+    def close():
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+    return Channel(sock.recv, send, close)
+
+
+def _pipe_channel(handle, disconnect=False, overlapped=False):
+    import _winapi
+
+    def recv(size):
+        try:
+            if not overlapped:
+                data, error = _winapi.ReadFile(handle, size)
+            else:
+                ov, error = _winapi.ReadFile(handle, size, overlapped=True)
+                try:
+                    if error == _winapi.ERROR_IO_PENDING:
+                        _winapi.WaitForMultipleObjects([ov.event], False, _winapi.INFINITE)
+                except BaseException:
+                    ov.cancel()
+                    raise
+                finally:
+                    _, error = ov.GetOverlappedResult(True)
+                data = ov.getbuffer()
+        except OSError as e:
+            if e.winerror == _ERROR_BROKEN_PIPE:
+                return b""
+            raise
+        if error not in (0, _ERROR_MORE_DATA):
+            return b""
+        return data
+
+    def send(data):
+        while data:
+            if not overlapped:
+                written, _ = _winapi.WriteFile(handle, data)
+            else:
+                ov, error = _winapi.WriteFile(handle, data, overlapped=True)
+                try:
+                    if error == _winapi.ERROR_IO_PENDING and _winapi.WaitForMultipleObjects(
+                            [ov.event], False, int(WRITE_TIMEOUT * 1000)) == _winapi.WAIT_TIMEOUT:
+                        ov.cancel()
+                finally:
+                    written, error = ov.GetOverlappedResult(True)
+                if error == _ERROR_OPERATION_ABORTED:
+                    raise TimeoutError("Client is not reading from the pipe")
+            data = data[written:]
+
+    def close():
+        if disconnect:
+            # Server-side instance: let the client see EOF before the handle goes away
+            import ctypes
+            ctypes.windll.kernel32.DisconnectNamedPipe(handle)
+        _winapi.CloseHandle(handle)
+    return Channel(recv, send, close)
+
+
+def connect(address, timeout=2.0):
+    """Open a Channel to the server at address, retrying until timeout while it starts up."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return _connect_once(address)
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.02)
+
+
+def _connect_once(address):
+    if _IS_WINDOWS:
+        import _winapi
+        try:
+            handle = _winapi.CreateFile(address, _winapi.GENERIC_READ | _winapi.GENERIC_WRITE,
+                                        0, _winapi.NULL, _winapi.OPEN_EXISTING, 0, _winapi.NULL)
+        except OSError as e:
+            if e.winerror == _ERROR_PIPE_BUSY:
+                _winapi.WaitNamedPipe(address, 100)
+            raise
+        return _pipe_channel(handle)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return _socket_channel(sock)
+
+
+def request(address, message, timeout=2.0):
+    """Send one message and return the reply; raises OSError if no server answers."""
+    channel = connect(address, timeout)
+    try:
+        channel.write_message(message)
+        reply = channel.read_message()
+    finally:
+        channel.close()
+    if reply is None:
+        raise ConnectionError("Server closed the connection without replying")
+    return reply
+
+
+class PendingReply:
+    """A reply that another thread completes and the connection's own thread writes.
+
+    set() does no I/O, so it is safe from threads that must never block (the
+    audio worker). If nothing is set within REPLY_TIMEOUT, default is sent.
+    """
+
+    def __init__(self, default=None):
+        self.default = default
+        self.reply = None
+        self._done = threading.Event()
+
+    def set(self, reply):
+        self.reply = reply
+        self._done.set()
+
+    def wait(self, timeout=REPLY_TIMEOUT):
+        return self.reply if self._done.wait(timeout) else self.default
+
+
+class LocalServer:
+    """Accepts local connections and serves each on its own thread.
+
+    handler(message, channel) is called for every message and returns the
+    reply dict, a PendingReply when the answer comes from another thread (the
+    connection waits for it before reading the next message), or None to send
+    nothing.
+    """
+
+    def __init__(self, address, handler):
+        self.address = address
+        self.handler = handler
+        self._running = False
+        self._thread = None
+        self._listener = None
+        self._security = None
+        self._next_pipe = None
+        self._channels = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Bind the endpoint and start accepting. Raises OSError if it cannot be bound."""
+        if self._thread is not None:
+            return
+        if not _IS_WINDOWS:
+            # Only the lock holder starts a server, so a leftover socket file is stale
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            umask = os.umask(0o077)  # The socket file is created owner-only, with no window before a chmod
+            try:
+                listener.bind(self.address)
+            finally:
+                os.umask(umask)
+            os.chmod(self.address, 0o600)
+            listener.listen(16)
+            self._listener = listener
+        else:
+            self._security = _owner_only_security_attributes()
+            self._next_pipe = self._create_pipe(first=True)
+        self._running = True
+        self._thread = threading.Thread(target=self._accept_loop, name="LocalServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is None:
+            return
+        self._running = False
+        if _IS_WINDOWS:
+            # Wake the blocked ConnectNamedPipe with a throwaway client
+            try:
+                _connect_once(self.address).close()
+            except OSError:
+                pass
+        else:
+            try:
+                self._listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._listener.close()
+        thread.join(1.0)
+        if self._next_pipe is not None:
+            import _winapi
+            _winapi.CloseHandle(self._next_pipe)
+            self._next_pipe = None
+        self._thread = None
+        with self._lock:
+            channels = list(self._channels)
+        for channel in channels:
+            channel.close()
+        if not _IS_WINDOWS and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                channel = self._accept()
+            except OSError as e:
+                if self._running:
+                    log.error(f"Local server accept failed: {str(e)}")
+                    time.sleep(0.1)
+                continue
+            if not self._running:
+                channel.close()
+                break
+            with self._lock:
+                self._channels.add(channel)
+            threading.Thread(target=self._serve, args=(channel,), name="LocalServerClient", daemon=True).start()
+
+    def _accept(self):
+        if not _IS_WINDOWS:
+            sock, _ = self._listener.accept()
+            return _socket_channel(sock, WRITE_TIMEOUT)
+        import _winapi
+        handle, self._next_pipe = self._next_pipe or self._create_pipe(), None
+        try:
+            ov = _winapi.ConnectNamedPipe(handle, overlapped=True)  # Signals at once if a client beat us to it
+            try:
+                _winapi.WaitForMultipleObjects([ov.event], False, _winapi.INFINITE)
+            except BaseException:
+                ov.cancel()
+                raise
+            finally:
+                ov.GetOverlappedResult(True)
+        except OSError:
+            _winapi.CloseHandle(handle)
+            raise
+        # Create the next instance before handing this one off, so the name stays held while clients come and go
+        try:
+            self._next_pipe = self._create_pipe()
+        except OSError as e:
+            log.error(f"Local server could not create the next pipe instance: {str(e)}")
+        return _pipe_channel(handle, disconnect=True, overlapped=True)
+
+    def _create_pipe(self, first=False):
+        import ctypes
+        import _winapi
+        return _winapi.CreateNamedPipe(
+            self.address,
+            _winapi.PIPE_ACCESS_DUPLEX | _winapi.FILE_FLAG_OVERLAPPED | (_FILE_FLAG_FIRST_PIPE_INSTANCE if first else 0),
+            _PIPE_TYPE_BYTE | _PIPE_READMODE_BYTE | _winapi.PIPE_WAIT | _PIPE_REJECT_REMOTE_CLIENTS,
+            _winapi.PIPE_UNLIMITED_INSTANCES, 4096, 4096, 0, ctypes.addressof(self._security))
+
+    def _serve(self, channel):
+        try:
+            while self._running:
+                try:
+                    message = channel.read_message()
+                except ValueError as e:
+                    channel.write_message({"ok": False, "error": f"Invalid message: {str(e)}"})
+                    continue
+                if message is None:
+                    break
+                try:
+                    reply = self.handler(message, channel)
+                except Exception as e:
+                    log.error(f"Local server handler failed: {str(e)}")
+                    reply = {"ok": False, "error": str(e)}
+                if isinstance(reply, PendingReply):
+                    reply = reply.wait()
+                if reply is not None:
+                    channel.write_message(reply)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._channels.discard(channel)
+            channel.close()
@@ -0,0 +1,289 @@
+"""Lightweight metrics for hot paths.
+
+LatencyHistogram uses log-linear buckets (8 sub-buckets per power of two of
+microseconds, about 12% relative error) so recording is a couple of integer
+operations and percentiles need no stored samples.
+
+MetricsRegistry names counters, gauges and histograms so they can be shown in
+the Diagnostics tab and exported as JSON or Prometheus text. Recording never
+takes a lock: samples are plain attribute updates, which the GIL keeps
+consistent enough for diagnostics (a sample racing another thread's sample on
+the same metric can at worst be lost). REGISTRY is the process-wide instance
+the app modules record into.
+"""
+import json
+import math
+import threading
+import time
+
+_SUB_BUCKET_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+_LINEAR_LIMIT = _SUB_BUCKETS * 2
+_BUCKET_COUNT = 320
+_SUMMARY_QUANTILES = (50, 90, 99)
+
+
+def _bucket_index(micros):
+    if micros < _LINEAR_LIMIT:
+        return micros if micros > 0 else 0
+    shift = micros.bit_length() - (_SUB_BUCKET_BITS + 1)
+    index = (shift + 1) * _SUB_BUCKETS + ((micros >> shift) & (_SUB_BUCKETS - 1))
+    return index if index < _BUCKET_COUNT else _BUCKET_COUNT - 1
+
+
+def _bucket_value(index):
+    """Midpoint of a bucket, in microseconds."""
+    if index < _LINEAR_LIMIT:
+        return float(index)
+    shift = index // _SUB_BUCKETS - 1
+    sub_bucket = index % _SUB_BUCKETS
+    lower = (_SUB_BUCKETS + sub_bucket) << shift
+    return lower + ((1 << shift) - 1) / 2.0
+
+
+class LatencyHistogram:
+    """Fixed-size histogram of durations recorded in seconds."""
+
+    def __init__(self, name="", help=""):
+        self.name = name
+        self.help = help
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self._min = math.inf
+        self._max = 0.0
+
+    @property
+    def min(self):
+        return self._min if self.count else None
+
+    @property
+    def max(self):
+        return self._max if self.count else None
+
+    def record(self, seconds):
+        # _bucket_index inlined: this runs for every backend call and toggle
+        micros = int(seconds * 1e6)
+        if micros < _LINEAR_LIMIT:
+            index = micros if micros > 0 else 0
+        else:
+            shift = micros.bit_length() - 4
+            index = (shift + 1) * 8 + ((micros >> shift) & 7)
+            if index >= _BUCKET_COUNT:
+                index = _BUCKET_COUNT - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self._max:
+            self._max = seconds
+        if seconds < self._min:
+            self._min = seconds
+
+    def time(self):
+        """Context manager that records the duration of its block."""
+        return _Timer(self)
+
+    def percentile(self, percent):
+        """Approximate percentile in seconds, or None when nothing was recorded."""
+        if not self.count:
+            return None
+        threshold = max(1, math.ceil(self.count * percent / 100.0))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= threshold:
+                return min(max(_bucket_value(index) / 1e6, self._min), self._max)
+        return self._max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self):
+        """Return count, mean, p50, p99 and max in milliseconds."""
+        def ms(value):
+            return None if value is None else value * 1000.0
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.mean()),
+            "p50_ms": ms(self.percentile(50)),
+            "p99_ms": ms(self.percentile(99)),
+            "max_ms": ms(self.max),
+        }
+
+    def format_summary(self):
+        if not self.count:
+            return f"{self.name or 'latency'}: no samples"
+        stats = self.summary()
+        return (f"{self.name or 'latency'}: n={stats['count']} p50={stats['p50_ms']:.2f} ms "
+                f"p99={stats['p99_ms']:.2f} ms max={stats['max_ms']:.2f} ms")
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.record(time.perf_counter() - self.started)
+        return False
+
+
+class Counter:
+    """Monotonic count; inc() is a single attribute update."""
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def reset(self):
+        self.value = 0
+
+
+class Gauge:
+    """Current value, either set() by the owner or read from function() at snapshot time."""
+
+    def __init__(self, name, help="", function=None):
+        self.name = name
+        self.help = help
+        self.function = function
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def read(self):
+        if self.function is None:
+            return self.value
+        try:
+            return self.function()
+        except Exception:
+            return None
+
+    def reset(self):
+        pass  # Gauges describe current state; there is nothing to clear
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms with JSON and Prometheus export.
+
+    counter(), gauge() and histogram() return the existing metric when the
+    name is already registered, so modules can look metrics up independently.
+    """
+
+    def __init__(self, prefix="micmute"):
+        self.prefix = prefix
+        self.started = time.time()
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            elif not isinstance(metric, cls):
+                raise TypeError(f"metric {name!r} is already registered as a {type(metric).__name__}")
+            return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help="", function=None):
+        gauge = self._get(Gauge, name, help)
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name, help=""):
+        return self._get(LatencyHistogram, name, help)
+
+    def metrics(self):
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def reset(self):
+        """Clear counters and histograms (e.g. before a measurement)."""
+        for metric in self.metrics():
+            metric.reset()
+
+    def snapshot(self):
+        """Plain dict of every metric; histograms in milliseconds."""
+        counters, gauges, histograms = {}, {}, {}
+        for metric in self.metrics():
+            if isinstance(metric, Counter):
+                counters[metric.name] = metric.value
+            elif isinstance(metric, Gauge):
+                gauges[metric.name] = metric.read()
+            else:
+                histograms[metric.name] = metric.summary()
+        return {"uptime_s": time.time() - self.started, "counters": counters,
+                "gauges": gauges, "histograms": histograms}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format; histograms are exported as summaries in seconds."""
+        lines = []
+        for metric in self.metrics():
+            name = f"{self.prefix}_{metric.name}"
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            if isinstance(metric, Counter):
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {metric.value}")
+            elif isinstance(metric, Gauge):
+                value = metric.read()
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {'NaN' if value is None else float(value)}")
+            else:
+                lines.append(f"# TYPE {name} summary")
+                for quantile in _SUMMARY_QUANTILES:
+                    value = metric.percentile(quantile)
+                    lines.append(f'{name}{{quantile="{quantile / 100}"}} {"NaN" if value is None else value}')
+                lines.append(f"{name}_sum {metric.total}")
+                lines.append(f"{name}_count {metric.count}")
+        return "\n".join(lines) + "\n"
+
+    def format_table(self):
+        """Fixed-width text for the Diagnostics tab."""
+        lines = []
+        for metric in self.metrics():
+            if isinstance(metric, Counter):
+                lines.append(f"{metric.name:<36} {metric.value:>12}")
+            elif isinstance(metric, Gauge):
+                value = metric.read()
+                lines.append(f"{metric.name:<36} {'-' if value is None else value:>12}")
+        histograms = [metric for metric in self.metrics() if isinstance(metric, LatencyHistogram)]
+        if histograms:
+            lines.append("")
+            lines.append(f"{'latency (ms)':<36} {'count':>8} {'p50':>8} {'p99':>8} {'max':>8}")
+            for metric in histograms:
+                stats = metric.summary()
+                if not stats["count"]:
+                    lines.append(f"{metric.name:<36} {0:>8} {'-':>8} {'-':>8} {'-':>8}")
+                    continue
+                lines.append(f"{metric.name:<36} {stats['count']:>8} {stats['p50_ms']:>8.3f} "
+                             f"{stats['p99_ms']:>8.3f} {stats['max_ms']:>8.3f}")
+        return "\n".join(lines)
+
+    def export(self, path, format="json"):
+        """Write the current metrics to path as "json" or "prometheus"."""
+        content = self.to_prometheus() if format == "prometheus" else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+REGISTRY = MetricsRegistry()
@@ -1,22 +1,54 @@
-from PyQt6.QtCore import Qt, QTimer, QRectF, pyqtSignal, QObject, QThread, QMutex, QMutexLocker, QEvent
 import time
-import pythoncom
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-from comtypes import CLSCTX_ALL
-from ctypes import cast, POINTER
-import keyboard
-from keyboard import is_pressed
-import pygame
+_STARTUP_T0 = time.perf_counter()  # Start of the "import" phase for --startup-profile
 import sys
+if __name__ == "__main__" and "--hook-process" in sys.argv:
+    # Frozen builds start the hook process from this executable (hook_process.HOOK_PROCESS_FLAG).
+    # Dispatch before Qt, the keyboard library, pycaw and pygame are imported; the child needs none of them.
+    import hook_process
+    sys.exit(hook_process.child_main([arg for arg in sys.argv[1:] if arg != hook_process.HOOK_PROCESS_FLAG]))
+from PyQt6.QtCore import Qt, QTimer, QRectF, pyqtSignal, QObject, QThread, QEvent
+import keyboard
 import os
-import json
-import winreg
+import logging
+import threading
+try:
+    import winreg
+except ImportError:  # Non-Windows hosts (headless benchmarks with a fake backend)
+    winreg = None
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QComboBox, QSlider, QLineEdit, QPushButton, QSystemTrayIcon, 
-                             QMenu, QFileDialog, QMessageBox, QCheckBox)
-from PyQt6.QtGui import QIcon, QPainter, QImage, QPixmap
-from PyQt6.QtSvg import QSvgRenderer
-import psutil
+                             QMenu, QFileDialog, QMessageBox, QCheckBox, QTabWidget, QPlainTextEdit)
+from PyQt6.QtGui import QIcon, QPainter, QImage, QPixmap, QColor, QActionGroup, QFontDatabase
+# QtSvg, pycaw/comtypes and pygame are imported on first use to keep time-to-tray short
+from audio_backend import PycawAudioBackend
+from audio_worker import AudioWorker
+from metrics import REGISTRY
+from overlay_cache import LRUCache
+from poll_scheduler import PollScheduler
+from session_monitor import SessionMonitor
+from sound_bank import PygameSoundSink, SoundBank
+from gc_policy import GcPolicy
+from hook_process import HookProcess
+from hook_watchdog import HookWatchdog
+from hotkey_engine import HotkeyEngine
+from icon_atlas import MUTED_OVERLAY_SVG
+from startup_profile import StartupProfiler
+from control_server import ControlServer
+from config_store import ConfigWriter, ConfigFileMonitor
+from config_model import AppConfig, StatCache, load_config as load_app_config
+from single_instance import SingleInstance
+import app_logging
+
+log = app_logging.get_logger("app")
+
+_poll_ticks = REGISTRY.counter("poll_ticks_total", "Mute-state poll timer ticks")
+_polls_skipped = REGISTRY.counter("polls_skipped_total", "Polls skipped because an audio command was in progress")
+_toggles = REGISTRY.counter("toggles_total", "Toggle requests (hotkey, button, tray)")
+_toggles_dropped = REGISTRY.counter("toggles_dropped_total", "Toggle requests dropped by the debounce window")
+_hook_callback_time = REGISTRY.histogram("hook_callback_seconds", "In-process keyboard hook callback time")
+
+# Settings that only affect the overlay window
+OVERLAY_SETTINGS = {"overlay_position", "overlay_size", "overlay_margin", "overlay_opacity"}
 
 class HotkeyWorker(QObject):
     hotkey_captured = pyqtSignal(str)
@@ -27,339 +59,598 @@ class HotkeyWorker(QObject):
             if new_hotkey:
                 self.hotkey_captured.emit(new_hotkey)
         except Exception as e:
-            print(f"[HotkeyWorker] Error: {e}")
+            log.error(f"Hotkey capture failed: {e}")
+
+class AudioSignals(QObject):
+    """Carries audio worker results and COM notifications into the Qt event loop."""
+    mute_state = pyqtSignal(bool, str)
+    audio_error = pyqtSignal(str)
+    device_state = pyqtSignal(bool, bool)
+    device_table = pyqtSignal(list)
+    breaker_state = pyqtSignal(str, str)
 
 class OverlayWidget(QWidget):
-    def __init__(self, svg_code, size, opacity, position, margin, screen_size):
+    """Persistent overlay window; settings changes move/resize it in place and paints blit a cached pixmap."""
+    instances_created = 0
+
+    def __init__(self, svg_code, size, opacity, position, margin, screen_size, colour=None):
         super().__init__(None)
+        OverlayWidget.instances_created += 1
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Tool)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        from PyQt6.QtSvg import QSvgRenderer
         self.renderer = QSvgRenderer(svg_code.encode('utf-8'))
-        self.size = int(size.split('x')[0])
-        self.setFixedSize(self.size, self.size)
-        self.setWindowOpacity(opacity)
+        self.pixmap_cache = LRUCache(capacity=16)
+        self.rasterize_count = 0
+        self.icon_size = 0
+        self.colour = colour
+        self.apply_settings(size, opacity, position, margin, screen_size)
+
+    def apply_settings(self, size, opacity, position, margin, screen_size):
+        """Resize, fade and move the existing window without recreating it."""
+        icon_size = int(str(size).split('x')[0])
+        if icon_size != self.icon_size:
+            self.icon_size = icon_size
+            self.setFixedSize(icon_size, icon_size)
+            self.update()
+        if abs(self.windowOpacity() - opacity) > 1e-6:
+            self.setWindowOpacity(opacity)
         self.update_position(position, margin, screen_size)
 
+    def set_colour(self, colour):
+        """Tint the icon with colour (None keeps the SVG's own colours)."""
+        if colour != self.colour:
+            self.colour = colour
+            self.update()
+
+    def current_pixmap(self):
+        dpr = self.devicePixelRatioF()
+        key = (self.icon_size, dpr, self.colour)
+        return self.pixmap_cache.get_or_create(key, lambda: self.rasterize(self.icon_size, dpr, self.colour))
+
+    def rasterize(self, icon_size, dpr, colour):
+        """Render the SVG once for a given size, device-pixel-ratio and tint."""
+        self.rasterize_count += 1
+        pixels = max(1, round(icon_size * dpr))
+        image = QImage(pixels, pixels, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        self.renderer.render(painter, QRectF(0, 0, pixels, pixels))
+        if colour is not None:
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
+            painter.fillRect(image.rect(), QColor(colour))
+        painter.end()
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(dpr)
+        return pixmap
+
     def paintEvent(self, event):
         painter = QPainter(self)
-        self.renderer.render(painter, QRectF(self.rect()))
+        painter.drawPixmap(0, 0, self.current_pixmap())
 
     def update_position(self, position, margin, screen_size):
         screen_width, screen_height = screen_size
+        size = self.icon_size
         if position == "Top Left":
             x, y = margin, margin
         elif position == "Top Mid":
-            x, y = (screen_width - self.size) // 2, margin
+            x, y = (screen_width - size) // 2, margin
         elif position == "Top Right":
-            x, y = screen_width - self.size - margin, margin
+            x, y = screen_width - size - margin, margin
         elif position == "Middle Left":
-            x, y = margin, (screen_height - self.size) // 2
+            x, y = margin, (screen_height - size) // 2
         elif position == "Middle Right":
-            x, y = screen_width - self.size - margin, (screen_height - self.size) // 2
+            x, y = screen_width - size - margin, (screen_height - size) // 2
         elif position == "Bottom Left":
-            x, y = margin, screen_height - self.size - margin
+            x, y = margin, screen_height - size - margin
         elif position == "Bottom Mid":
-            x, y = (screen_width - self.size) // 2, screen_height - self.size - margin
+            x, y = (screen_width - size) // 2, screen_height - size - margin
         elif position == "Bottom Right":
-            x, y = screen_width - self.size - margin, screen_height - self.size - margin
+            x, y = screen_width - size - margin, screen_height - size - margin
         else:
-            x, y = (screen_width - self.size) // 2, margin
-        self.move(x, y)
+            x, y = (screen_width - size) // 2, margin
+        if (x, y) != (self.x(), self.y()):
+            self.move(x, y)
 
 class MicMuteApp(QMainWindow):
-    trigger_toggle_mute = pyqtSignal()
-    def check_and_terminate_other_instances(self):
-        """Check for other running instances of the application and terminate them."""
-        instance_mutex = QMutex()
-        with QMutexLocker(instance_mutex):
-            try:
-                current_pid = os.getpid()
-                process_name = "MicCTRL.exe" if hasattr(sys, '_MEIPASS') else os.path.basename(__file__)
-                for proc in psutil.process_iter(['pid', 'name']):
-                    try:
-                        if proc.name() == process_name and proc.pid != current_pid:
-                            proc.terminate()
-                            proc.wait(timeout=3)  # Wait up to 3 seconds for termination
-                            print(f"[INFO] Terminated existing instance with PID {proc.pid}")
-                    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.TimeoutExpired) as e:
-                        print(f"[WARNING] Failed to terminate process {proc.pid}: {str(e)}")
-            except Exception as e:
-                print(f"[ERROR] Error checking/terminating other instances: {str(e)}")
-                QMessageBox.warning(self, "Warning", f"Error checking for other instances: {str(e)}")
-    
-    def __init__(self):
+    trigger_toggle_mute = pyqtSignal(float)
+    instance_command = pyqtSignal(str)
+    poll_wake = pyqtSignal()
+    hook_process_failed = pyqtSignal()
+    def __init__(self, audio_backend=None, sound_sink=None, profiler=None, instance_guard=None):
         super().__init__()
-
-        self.check_and_terminate_other_instances()
+        # Disabled profilers still collect marks; only the report is suppressed
+        self.profiler = profiler if profiler is not None else StartupProfiler(enabled=False)
 
         icon_path = self.get_resource_path(os.path.join("resource", "icon.ico"))
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
         else:
-            print(f"[ERROR] Window icon file {icon_path} not found")
+            log.error(f"Window icon file {icon_path} not found")
 
         self.setWindowTitle("Microphone Mute Control")
         self.setFixedWidth(450)
         self.setFixedHeight(600)  # Increased height to accommodate new auto-refresh settings
 
-        # Initialize COM
-        pythoncom.CoInitialize()
-
-        self.device = None
-        self.volume = None
-        self.initialize_audio_device()
+        # Audio backend calls (COM on Windows) run on a dedicated worker thread
+        self.audio = audio_backend if audio_backend is not None else PycawAudioBackend()
+        self.audio_signals = AudioSignals()
+        self.audio_signals.mute_state.connect(self.on_mute_state, Qt.ConnectionType.QueuedConnection)
+        self.audio_signals.audio_error.connect(self.on_audio_error, Qt.ConnectionType.QueuedConnection)
+        self.audio_signals.device_state.connect(self.on_device_state, Qt.ConnectionType.QueuedConnection)
+        self.audio_signals.device_table.connect(self.on_device_table, Qt.ConnectionType.QueuedConnection)
+        self.audio_signals.breaker_state.connect(self.on_breaker_state, Qt.ConnectionType.QueuedConnection)
+        self.audio_worker = AudioWorker(
+            self.audio,
+            on_state=self.audio_signals.mute_state.emit,
+            on_error=self.audio_signals.audio_error.emit,
+            on_device=self.audio_signals.device_state.emit,
+            on_devices=self.audio_signals.device_table.emit,
+            on_breaker=self.audio_signals.breaker_state.emit
+        )
+        self.device_table = []  # Every capture device, filled on the first multi-device command
+        self.breaker_status = None  # Shown in the tray tooltip while the audio circuit breaker is not closed
+        self.audio_device_active = False
+        self.push_notifications_active = False
+        self.manual_refresh_pending = False
+        self.last_mute_state = None
+        self.poll_scheduler = PollScheduler()  # Adaptive poll timing, used when push notifications are unavailable
+        self.session_monitor = SessionMonitor()
+        self.pause_polling_when_locked = True
+        self.fallback_poll_enabled = True
+        self.fallback_poll_interval = 5000  # ms, slow safety net while push notifications are active
 
-        # Initialize mutex and toggle state
-        self.mute_lock = QMutex()
-        self.is_toggling = False
-        self.is_toggle_pending = False
+        # Initialize optimistic toggle state
+        self.pending_mute_target = None
+        self.toggle_latency = REGISTRY.histogram("toggle_latency_seconds", "Hotkey-to-overlay latency")
 
-        # Initialize debounce timer
+        # Leading-edge debounce: the first press toggles at once, repeats inside the window are dropped
         self.debounce_timer = QTimer()
         self.debounce_timer.setSingleShot(True)
-        self.debounce_timer.timeout.connect(self.process_pending_toggle)
         self.debounce_interval = 100  # ms
 
-        # Initialize auto-refresh timer
+        # Auto-refresh is a backstop for missed endpoint notifications: it compares endpoint ids
+        # on the audio worker and only re-binds when the default microphone actually changed
         self.auto_refresh_timer = QTimer()
-        self.auto_refresh_timer.timeout.connect(lambda: self.refresh_device(manual=False))
+        self.auto_refresh_timer.timeout.connect(self.check_audio_device)
         self.auto_refresh_interval = 5000  # Default 5 seconds
 
-        # Connect signals
+        # The settings window is built on first show; until then self.config is the only copy of the settings
+        self.ui_built = False
+        self.status_text = "Status: Unknown"
+        self.svg_code = MUTED_OVERLAY_SVG
+        self.overlay = None
+        self.sound_bank = SoundBank(sound_sink if sound_sink is not None else PygameSoundSink())
+        self.mixer_initialized = False
         self.trigger_toggle_mute.connect(self.queue_toggle, Qt.ConnectionType.QueuedConnection)
-        self.setup_ui()
+        self.instance_command.connect(self.on_instance_command, Qt.ConnectionType.QueuedConnection)
+        self.poll_wake.connect(self.on_input_activity, Qt.ConnectionType.QueuedConnection)
+        self.hook_process_failed.connect(self.on_hook_process_failed, Qt.ConnectionType.QueuedConnection)
+
+        # Later launches and automation scripts talk to this instance over the control endpoint
+        self.instance_guard = instance_guard
+        self.control_server = None
+        if instance_guard is not None:
+            self.start_control_server()
+
+        # Stage 1: config, then the audio worker so COM init overlaps with the tray and hotkey setup
+        # Saves are coalesced and written atomically on a background thread
+        self.config_writer = ConfigWriter(self.get_resource_path("config.json", writable=True), indent=4)
+        REGISTRY.gauge("config_writes", "Config files written since start", function=lambda: self.config_writer.write_count)
+        self.stat_cache = StatCache()
+        self.config = self.load_config()
+        self.profiler.mark("config")
+        self.audio_worker.start()
+        self.profiler.mark("audio worker start")
+
+        # Stage 2: tray icon and hotkey, the parts a user can interact with
         self.setup_tray_icon()
-        self.setup_overlay()
-
-        self.mixer_initialized = False
-        try:
-            pygame.mixer.init()
-            self.mixer_initialized = True
-            print("[INFO] Pygame mixer initialized successfully")
-        except pygame.error as e:
-            print(f"[WARNING] Failed to initialize pygame mixer: {str(e)}. Sound feedback will be disabled.")
-            self.status_label.setText("Status: No audio output device (sound disabled)")
-            QMessageBox.warning(self, "Warning", "No audio output device found. Sound feedback is disabled.")
-        
-        self.mute_sound = None
-        self.unmute_sound = None
-        self.last_mute_state = None
-
-        # Setup hotkey
         self.current_hotkey = "ctrl+alt+m"
+        self.hotkey_engine = HotkeyEngine()
+        self.hook_process = None
+        self.hook_process_exhausted = False
+        # Hook health: the watchdog times every in-process callback, the GC policy keeps collections out of it
+        self.gc_policy = GcPolicy()
+        self.hook_watchdog = HookWatchdog(self.reinstall_hotkey_hook, log=app_logging.get_logger("hook"))
+        self.hook_health_timer = QTimer()
+        self.hook_health_timer.timeout.connect(self.check_hook_health)
+        self.hook_health_interval = 5000  # ms
+        self.apply_hotkey_config()
         try:
-            def check_hotkey(event):
-                keys = self.current_hotkey.split('+')
-                all_pressed = all(is_pressed(key.strip()) for key in keys)
-                if all_pressed and not self.is_toggling:
-                    self.trigger_toggle_mute.emit()
-            
-            self.hotkey_hook = keyboard.hook(check_hotkey, suppress=False)
-            print(f"Initial hotkey hook set: {self.current_hotkey}")
+            self.install_hotkey_hook()
+            log.info(f"Initial hotkey hook set: {self.current_hotkey}")
         except Exception as e:
-            print(f"Error setting initial hotkey hook: {str(e)}")
+            log.error(f"Error setting initial hotkey hook: {str(e)}")
+        self.hook_health_timer.start(self.hook_health_interval)
+        self.profiler.mark("tray + hotkey")
 
-        self.load_config()
-        self.update_status()
+        self.apply_config()
         self.setup_polling()
+        self.config_stat_interval = 2000  # ms, fallback when file-system notifications are missed
+        self.setup_config_watch()
 
-        if not self.start_minimized_check.isChecked():
-            self.show()
+        # Stage 3: settings window only when it is about to be shown
+        if not self.config.start_minimized:
+            self.show_window()
+            self.profiler.mark("UI")
         else:
             self.hide()
-    
-    def queue_toggle(self):
-        """Queue a toggle request with debouncing."""
-        if self.is_toggling or self.debounce_timer.isActive():
-            print("[INFO] Toggle request ignored: already toggling or debouncing")
+
+        # Stage 4: mixer, sounds and overlay after the first mute read, or after a short backstop delay
+        self.startup_finished = False
+        self.gc_freeze_delay = 2000  # ms after the deferred stage, so its objects are frozen too
+        QTimer.singleShot(500, self.finish_startup)
+
+    def finish_startup(self):
+        """Deferred startup stage: open the mixer, decode sounds and pre-render the overlay."""
+        if self.startup_finished:
             return
-        self.is_toggle_pending = True
-        self.debounce_timer.start(self.debounce_interval)
-        print("[INFO] Toggle request queued")
-
-    def process_pending_toggle(self):
-        """Process a queued toggle request."""
-        if self.is_toggle_pending and not self.is_toggling:
-            self.is_toggle_pending = False
-            self.toggle_mute()
-
-    def toggle_mute(self):
-        """Toggle microphone mute state with robust error handling and retries."""
-        if self.is_toggling:
-            print("[INFO] toggle_mute skipped: already in progress")
+        self.startup_finished = True
+        self.mixer_initialized = self.sound_bank.open()
+        if not self.mixer_initialized:
+            self.set_status_text("Status: No audio output device (sound disabled)")
+            QMessageBox.warning(self, "Warning", "No audio output device found. Sound feedback is disabled.")
+        self.apply_sounds(save=False)
+        self.setup_overlay()
+        QTimer.singleShot(self.gc_freeze_delay, self.gc_policy.apply)
+        if self.profiler.enabled:
+            log.info(f"Deferred startup stage (mixer + overlay) finished at t={self.profiler.total() * 1000:.1f} ms")
+
+    def report_startup_profile(self, outcome):
+        """Close the startup profile at the first mute read (or its failure) and print it."""
+        if self.profiler.reported:
+            return
+        if self.audio_worker.thread_init_seconds is not None:
+            self.profiler.record("COM init (audio worker)", self.audio_worker.thread_init_seconds)
+        self.profiler.mark(f"first mute read ({outcome})")
+        self.profiler.report()
+        QTimer.singleShot(0, self.finish_startup)
+
+    def start_control_server(self):
+        """Serve the control API; mute commands run on the audio worker, "show" comes back here."""
+        self.control_server = ControlServer(
+            self.instance_guard.address,
+            self.audio_worker,
+            on_show=lambda: self.instance_command.emit("show"),
+            get_groups=lambda: self.config.device_groups
+        )
+        try:
+            self.control_server.start()
+            log.info(f"Control API listening on {self.instance_guard.address}")
+        except OSError as e:
+            log.error(f"Failed to start control API: {str(e)}")
+            self.control_server = None
+
+    def on_instance_command(self, command):
+        log.info(f"Instance command received: {command}")
+        if command == "show":
+            self.show_window()
+
+    def ensure_ui(self):
+        """Build the settings window on first use and fill it from self.config."""
+        if self.ui_built:
             return
+        self.setup_ui()
+        self.ui_built = True
+        self.sync_ui_from_config()
+
+    def sync_ui_from_config(self):
+        """Copy self.config into the settings widgets without triggering their change handlers."""
+        config = self.config
+        widgets = (self.position_combo, self.size_edit, self.margin_edit, self.opacity_slider,
+                   self.mute_sound_edit, self.unmute_sound_edit, self.mute_sound_check,
+                   self.unmute_sound_check, self.start_minimized_check, self.start_with_windows_check,
+                   self.auto_refresh_check, self.auto_refresh_interval_edit)
+        for widget in widgets:
+            widget.blockSignals(True)
+        try:
+            self.position_combo.setCurrentText(config.overlay_position)
+            self.size_edit.setText(str(config.overlay_size))
+            self.margin_edit.setText(str(config.overlay_margin))
+            self.opacity_slider.setValue(int(config.overlay_opacity * 100))
+            self.opacity_label.setText(f"{self.opacity_slider.value() / 100:.2f}")
+            self.mute_sound_edit.setText(config.mute_sound_file)
+            self.unmute_sound_edit.setText(config.unmute_sound_file)
+            self.mute_sound_check.setChecked(config.mute_sound_enabled)
+            self.unmute_sound_check.setChecked(config.unmute_sound_enabled)
+            self.start_minimized_check.setChecked(config.start_minimized)
+            self.start_with_windows_check.setChecked(config.start_with_windows)
+            self.auto_refresh_check.setChecked(config.auto_refresh_enabled)
+            self.auto_refresh_interval_edit.setText(str(config.auto_refresh_interval))
+        finally:
+            for widget in widgets:
+                widget.blockSignals(False)
+        self.hotkey_display.setText(self.format_hotkey(self.current_hotkey))
+        self.status_label.setText(self.status_text)
+
+    def show_window(self):
+        self.ensure_ui()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+    def set_status_text(self, text):
+        self.status_text = text
+        if self.ui_built:
+            self.status_label.setText(text)
+
+    def update_setting(self, key, value):
+        """Store a setting changed from the settings window and persist it."""
+        setattr(self.config, key, value)
+        self.save_config()
 
-        self.is_toggling = True
-        with QMutexLocker(self.mute_lock):
-            try:
-                if not self.volume:
-                    self.initialize_audio_device()
-                if self.volume:
-                    # Retry COM operation up to 3 times
-                    for attempt in range(3):
-                        try:
-                            current_mute = self.volume.GetMute()
-                            new_mute = 1 if current_mute == 0 else 0
-                            self.volume.SetMute(new_mute, None)
-                            self.update_status()
-                            print(f"[INFO] Toggled: {'Muted' if new_mute else 'Unmuted'}")
-                            break
-                        except Exception as e:
-                            print(f"[ERROR] Toggle attempt {attempt + 1} failed: {str(e)}")
-                            self.volume = None
-                            self.initialize_audio_device()
-                            if attempt == 2:
-                                print("[ERROR] All toggle attempts failed")
-                                self.status_label.setText("Status: Error (Toggle failed)")
-                else:
-                    print("[ERROR] No audio device available")
-                    self.status_label.setText("Status: Error (No audio device)")
-            except Exception as e:
-                print(f"[ERROR] Toggle failed: {str(e)}")
-                self.volume = None
-                self.status_label.setText("Status: Error")
-            finally:
-                self.is_toggling = False
+    def install_hotkey_hook(self):
+        """Install the global keyboard hook, in this process or in the hook process (hotkey_hook_process).
+
+        Hotkey changes only recompile the engine binding.
+        """
+        if self.config.hotkey_hook_process:
+            self.remove_hotkey_hook()
+            self.start_hook_process()
+        else:
+            self.stop_hook_process()
+            self.attach_hotkey_hook()
+
+    def attach_hotkey_hook(self):
+        """(Re)attach the in-process hook callback."""
+        self.remove_hotkey_hook()
+        self.hotkey_engine.reset()
+        self.hotkey_hook = keyboard.hook(self.make_hotkey_handler(), suppress=False)
+        self.hook_watchdog.rearm()
+
+    def remove_hotkey_hook(self):
+        if hasattr(self, 'hotkey_hook'):
+            keyboard.unhook(self.hotkey_hook)
+            del self.hotkey_hook
+
+    def start_hook_process(self):
+        """Forward hotkeys from the supervised hook process; its callbacks run on its reader thread."""
+        if self.hook_process is not None:
+            return
+        scheduler = self.poll_scheduler
+        wake = self.poll_wake.emit
+
+        def on_activity():
+            if scheduler.idle:
+                scheduler.idle = False
+                wake()
+
+        self.hook_process = HookProcess(lambda name, pressed_at: self.trigger_toggle_mute.emit(pressed_at),
+                                        on_activity, on_exhausted=self.hook_process_failed.emit,
+                                        log=app_logging.get_logger("hook"))
+        binding = self.hotkey_engine.binding("toggle_mute")
+        if binding is not None:
+            self.hook_process.bind("toggle_mute", *binding)
+        self.hook_process.start()
+        log.info("Keyboard hook running in a separate process")
+
+    def stop_hook_process(self):
+        if self.hook_process is not None:
+            self.hook_process.stop()
+            self.hook_process = None
+
+    def on_hook_process_failed(self):
+        log.error("Hook process keeps failing; using the in-process keyboard hook")
+        self.hook_process_exhausted = True
+        self.stop_hook_process()
+        self.attach_hotkey_hook()
+
+    def check_hook_health(self):
+        """Scheduled collection and the in-process hook watchdog; the hook process runs its own."""
+        if self.gc_policy.applied:
+            self.gc_policy.collect()
+        if hasattr(self, 'hotkey_hook'):
+            self.hook_watchdog.check()
+
+    def reinstall_hotkey_hook(self, reason):
+        """Watchdog action for the in-process hook: re-install it in a new hook process for the session.
+
+        The keyboard library registers its OS hook once per process and cannot register it again, so a
+        hook Windows has removed only comes back in a fresh process. That needs hotkey_hook_watchdog_fallback
+        (on by default) and a hook process that has not already failed for good.
+        """
+        if not self.config.hotkey_hook_watchdog_fallback or self.hook_process_exhausted:
+            log.error(f"The keyboard hook cannot be re-installed in this process ({reason}); "
+                      "restart the app if the hotkey stops working")
+            return
+        log.warning("Moving the keyboard hook to a separate process for this session")
+        self.remove_hotkey_hook()
+        self.start_hook_process()
+
+    def make_hotkey_handler(self):
+        """The keyboard hook callback: match the event and post a toggle to the GUI thread, nothing else.
+
+        A key press while the poller is idle also posts one wake-up, so a keyboard mute key is seen quickly.
+        """
+        feed = self.hotkey_engine.feed
+        emit = self.trigger_toggle_mute.emit
+        scheduler = self.poll_scheduler
+        wake = self.poll_wake.emit
+
+        clock = time.perf_counter
+        record = _hook_callback_time.record
+        observe = self.hook_watchdog.observe
+        hook_threads = self.gc_policy.hook_threads
+        get_ident = threading.get_ident
+
+        def check_hotkey(event):
+            started = clock()
+            if get_ident() not in hook_threads:
+                hook_threads.add(get_ident())  # Count garbage collections on the hook thread
+            if scheduler.idle:
+                scheduler.idle = False
+                wake()
+            if feed(event.scan_code, event.event_type == 'down') is not None:
+                emit(started)
+            finished = clock()
+            record(finished - started)
+            observe(finished - started, finished)
+
+        return check_hotkey
+
+    def set_hotkey(self, hotkey):
+        """Compile hotkey into the matcher. Raises ValueError for unknown keys and keeps the old binding."""
+        self.hotkey_engine.add_binding("toggle_mute", hotkey)
+        self.current_hotkey = hotkey
+        if self.hook_process is not None:
+            self.hook_process.bind("toggle_mute", *self.hotkey_engine.binding("toggle_mute"))
+        self.config.hotkey = hotkey
+        if self.ui_built:
+            self.hotkey_display.setText(self.format_hotkey(hotkey))
+
+    @staticmethod
+    def format_hotkey(hotkey):
+        """Format hotkey for display (e.g., "ctrl+alt+m" -> "Ctrl + Alt + M")."""
+        return " + ".join(key.strip().capitalize() for key in hotkey.split('+'))
+
+    def queue_toggle(self, pressed_at=None):
+        """Toggle at once on the leading edge and ignore repeats within the debounce window."""
+        _toggles.inc()
+        if self.debounce_timer.isActive():
+            _toggles_dropped.inc()
+            log.debug("Toggle request ignored: debouncing")
+            return
+        self.debounce_timer.start(self.debounce_interval)
+        self.toggle_mute(pressed_at)
+
+    def toggle_mute(self, pressed_at=None):
+        """Flip the UI from the cached mute state at once and commit SetMute on the audio worker."""
+        if pressed_at is None:
+            pressed_at = time.perf_counter()
+        self.poll_scheduler.note_activity()
+        self.rearm_fast_poll()
+        if self.last_mute_state is None:
+            # Nothing to be optimistic about yet; let the worker read and flip the device state
+            self.audio_worker.request_toggle()
+            return
+        new_mute = not self.last_mute_state
+        self.pending_mute_target = new_mute
+        self.update_status(new_mute, pressed_at)
+        self.toggle_latency.record(time.perf_counter() - pressed_at)
+        self.audio_worker.request_mute(new_mute)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(self.toggle_latency.format_summary())
 
     def initialize_audio_device(self):
-        """Initialize audio device with retry logic."""
-        for attempt in range(3):
-            try:
-                devices = AudioUtilities.GetMicrophone()
-                if not devices:
-                    print("[ERROR] No microphone device found")
-                    return
-                interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-                self.volume = cast(interface, POINTER(IAudioEndpointVolume))
-                print("[INFO] Audio device initialized successfully")
-                return
-            except Exception as e:
-                print(f"[ERROR] Audio device initialization attempt {attempt + 1} failed: {str(e)}")
-                time.sleep(0.2)  # Brief delay before retry
-        self.volume = None
-        print("[ERROR] Failed to initialize audio device after retries")
+        """Re-bind the default microphone on the audio worker."""
+        self.audio_worker.request_refresh()
+
+    def on_device_state(self, active, push_active):
+        """Handle the result of a device (re)activation on the GUI thread."""
+        self.audio_device_active = active
+        self.push_notifications_active = push_active
+        if hasattr(self, 'timer'):
+            self.schedule_poll()
+        if self.manual_refresh_pending:
+            self.manual_refresh_pending = False
+            if active:
+                QMessageBox.information(self, "Success", "Microphone device refreshed successfully")
+            else:
+                QMessageBox.critical(self, "Error", "Failed to refresh audio device: No microphone device found")
+
+    def on_audio_error(self, message):
+        """Show a failed audio command on the GUI thread and reconcile any optimistic state."""
+        self.set_status_text(f"Status: Error ({message})")
+        self.report_startup_profile("failed")
+        if self.pending_mute_target is not None:
+            self.pending_mute_target = None
+            if self.audio_device_active:
+                self.audio_worker.request_read()
+        if not self.audio_device_active and self.overlay:
+            self.overlay.hide()
 
-    def update_status(self):
+    def on_mute_state(self, mute_state, source):
+        """Handle a mute state reported by the audio worker or pushed by the endpoint."""
+        if self.pending_mute_target is not None:
+            if source != "command":
+                # Stale read or notification while the optimistic target is still being committed
+                return
+            if mute_state != self.pending_mute_target and self.audio_worker.is_busy():
+                # An older commit; the latest target is still queued on the worker
+                return
+            # Last commit finished: accept the device state, rolling the UI back if it disagreed
+            self.pending_mute_target = None
+        self.report_startup_profile("ok")
+        if source != "command" and self.last_mute_state is not None and mute_state != self.last_mute_state:
+            log.info("External change (%s): %s", source, "Muted" if mute_state else "Unmuted")
+            if source == "read":
+                self.poll_scheduler.external_change()
+                self.rearm_fast_poll()
+        self.update_status(mute_state)
+
+    def update_status(self, mute_state=None, triggered_at=None):
         """Update status label, tray icon, overlay, and play sound if needed."""
-        if not self.volume:
-            self.status_label.setText("Status: Error (No audio device)")
-            if self.overlay:
-                self.overlay.hide()
+        if mute_state is None:
+            # Read asynchronously; the result comes back through on_mute_state
+            self.audio_worker.request_read()
             return
 
-        try:
-            mute_state = self.volume.GetMute()
-            status = "Muted" if mute_state else "Unmuted"
-            self.status_label.setText(f"Status: {status}")
-            self.tray_icon.setIcon(self.muted_tray_icon if mute_state else self.unmuted_tray_icon)
-            self.tray_icon.setToolTip(f"Microphone: {status}")
-
-            # Update overlay only if state changed
-            if hasattr(self, 'last_mute_state') and mute_state != self.last_mute_state:
-                if self.overlay:
-                    if mute_state:
-                        self.overlay.show()
-                        print(f"[INFO] Overlay shown: {status}")
-                    else:
-                        self.overlay.hide()
-                        print(f"[INFO] Overlay hidden: {status}")
-                self.play_sound(mute_state)
-
-            self.last_mute_state = mute_state
-        except Exception as e:
-            print(f"[ERROR] Failed to get mute status: {str(e)}")
-            self.volume = None
-            self.status_label.setText("Status: Error")
+        status = "Muted" if mute_state else "Unmuted"
+        self.set_status_text(f"Status: {status}")
+        self.tray_icon.setIcon(self.muted_tray_icon if mute_state else self.unmuted_tray_icon)
+
+        # Update overlay only if state changed
+        if mute_state != self.last_mute_state:
+            if self.overlay:
+                if mute_state:
+                    self.overlay.show()
+                    log.debug("Overlay shown: %s", status)
+                else:
+                    self.overlay.hide()
+                    log.debug("Overlay hidden: %s", status)
+            self.play_sound(mute_state, triggered_at)
+
+        self.last_mute_state = mute_state
+        self.update_tray_tooltip()
 
-    def play_sound(self, is_muted):
-        """Play sound for mute/unmute with robust error handling."""
+    def play_sound(self, is_muted, triggered_at=None):
+        """Play the pre-decoded mute/unmute sound; never touches the disk."""
         if not self.mixer_initialized:
-            print(f"[INFO] {'Mute' if is_muted else 'Unmute'} sound skipped: pygame mixer not initialized")
+            log.debug("%s sound skipped: pygame mixer not initialized", "Mute" if is_muted else "Unmute")
             return
 
         # Check if sound is enabled
-        sound_enabled = self.mute_sound_check.isChecked() if is_muted else self.unmute_sound_check.isChecked()
+        sound_enabled = self.config.mute_sound_enabled if is_muted else self.config.unmute_sound_enabled
         if not sound_enabled:
-            print(f"[INFO] {'Mute' if is_muted else 'Unmute'} sound disabled, skipping playback")
+            log.debug("%s sound disabled, skipping playback", "Mute" if is_muted else "Unmute")
             return
 
-        sound = self.mute_sound if is_muted else self.unmute_sound
-        sound_path = self.mute_sound_edit.text().strip() if is_muted else self.unmute_sound_edit.text().strip()
-
-        # Skip playback if sound path is empty
-        if not sound_path:
-            print(f"[INFO] No {'mute' if is_muted else 'unmute'} sound file specified, skipping playback")
-            return
-
-        if sound is None and sound_path and os.path.exists(sound_path):
-            try:
-                sound = pygame.mixer.Sound(sound_path)
-                if is_muted:
-                    self.mute_sound = sound
-                    print(f"Mute sound loaded: {sound_path}")
-                else:
-                    self.unmute_sound = sound
-                    print(f"Unmute sound loaded: {sound_path}")
-            except Exception as e:
-                print(f"[ERROR] Failed to load {'mute' if is_muted else 'unmute'} sound: {str(e)}")
-                return
-
-        if sound:
-            try:
-                if pygame.mixer.get_busy():
-                    pygame.mixer.stop()
-                pygame.mixer.Sound.play(sound)
-                print(f"[INFO] Playing {'mute' if is_muted else 'unmute'} sound")
-            except Exception as e:
-                print(f"[ERROR] Failed to play {'mute' if is_muted else 'unmute'} sound: {str(e)}")
-                if is_muted:
-                    self.mute_sound = None
-                else:
-                    self.unmute_sound = None
+        if self.sound_bank.play("mute" if is_muted else "unmute", triggered_at):
+            log.debug("Playing %s sound", "mute" if is_muted else "unmute")
         else:
-            print(f"[INFO] No valid {'mute' if is_muted else 'unmute'} sound, skipping playback")
+            log.debug("No valid %s sound, skipping playback", "mute" if is_muted else "unmute")
 
     def poll_mute_state(self):
-        """Poll mute state periodically, avoiding conflicts with toggle."""
-        if self.is_toggling:
-            print("[INFO] Polling skipped: toggle in progress")
-            self.timer.start(100)
-            return
-
-        with QMutexLocker(self.mute_lock):
-            if not self.volume:
-                self.initialize_audio_device()
-            if self.volume:
-                try:
-                    mute_state = self.volume.GetMute()
-                    if mute_state != self.last_mute_state:
-                        print(f"[INFO] External change: {'Muted' if mute_state else 'Unmuted'}")
-                        self.update_status()
-                    self.last_mute_state = mute_state
-                except Exception as e:
-                    print(f"[ERROR] Polling failed: {str(e)}")
-                    self.volume = None
-            self.timer.start(100)
+        """Poll mute state periodically through the audio worker, avoiding conflicts with toggle."""
+        _poll_ticks.inc()
+        if self.audio_worker.is_busy():
+            _polls_skipped.inc()
+            log.debug("Polling skipped: audio command in progress")
+        else:
+            self.poll_scheduler.poll_started()
+            self.audio_worker.request_read()
+        self.schedule_poll()
 
     def update_size(self):
         try:
             size = int(self.size_edit.text().strip())
             if 16 <= size <= 128:
+                self.config.overlay_size = size
                 self.update_overlay()
                 self.save_config()
             else:
                 QMessageBox.critical(self, "Error", "Size must be between 16 and 128 pixels")
-                self.size_edit.setText("48")
-                self.update_overlay()
+                self.size_edit.setText(str(self.config.overlay_size))
         except ValueError:
             QMessageBox.critical(self, "Error", "Size must be a number")
-            self.size_edit.setText("48")
-            self.update_overlay()
+            self.size_edit.setText(str(self.config.overlay_size))
     
     def setup_ui(self):
+        self.tabs = QTabWidget()
+        self.setCentralWidget(self.tabs)
         central_widget = QWidget()
-        self.setCentralWidget(central_widget)
+        self.tabs.addTab(central_widget, "Settings")
         layout = QVBoxLayout(central_widget)
         layout.setContentsMargins(15, 15, 15, 15)
         layout.setSpacing(10)
@@ -376,7 +667,7 @@ class MicMuteApp(QMainWindow):
         # Toggle and Minimize buttons
         button_layout = QHBoxLayout()
         self.toggle_button = QPushButton("Toggle Mute")
-        self.toggle_button.clicked.connect(self.queue_toggle)
+        self.toggle_button.clicked.connect(lambda: self.queue_toggle())
         button_layout.addWidget(self.toggle_button)
         self.refresh_button = QPushButton("Refresh Device")
         self.refresh_button.clicked.connect(lambda: self.refresh_device(manual=True))
@@ -474,7 +765,8 @@ class MicMuteApp(QMainWindow):
         mute_sound_layout = QHBoxLayout()
         self.mute_sound_check = QCheckBox()
         self.mute_sound_check.setChecked(True)
-        self.mute_sound_check.stateChanged.connect(self.save_config)
+        self.mute_sound_check.stateChanged.connect(
+            lambda: self.update_setting("mute_sound_enabled", self.mute_sound_check.isChecked()))
         mute_sound_layout.addWidget(self.mute_sound_check)
         mute_sound_layout.addWidget(QLabel("Mute:"))
         self.mute_sound_edit = QLineEdit()
@@ -489,7 +781,8 @@ class MicMuteApp(QMainWindow):
         unmute_sound_layout = QHBoxLayout()
         self.unmute_sound_check = QCheckBox()
         self.unmute_sound_check.setChecked(True)
-        self.unmute_sound_check.stateChanged.connect(self.save_config)
+        self.unmute_sound_check.stateChanged.connect(
+            lambda: self.update_setting("unmute_sound_enabled", self.unmute_sound_check.isChecked()))
         unmute_sound_layout.addWidget(self.unmute_sound_check)
         unmute_sound_layout.addWidget(QLabel("Unmute:"))
         self.unmute_sound_edit = QLineEdit()
@@ -532,249 +825,331 @@ class MicMuteApp(QMainWindow):
         startup_frame.addWidget(startup_label)
         startup_check_layout = QHBoxLayout()
         self.start_minimized_check = QCheckBox("Start Minimized to Tray")
-        self.start_minimized_check.stateChanged.connect(self.save_config)
+        self.start_minimized_check.stateChanged.connect(
+            lambda: self.update_setting("start_minimized", self.start_minimized_check.isChecked()))
         startup_check_layout.addWidget(self.start_minimized_check)
         self.start_with_windows_check = QCheckBox("Start with Windows")
-        self.start_with_windows_check.stateChanged.connect(self.toggle_windows_startup)
+        self.start_with_windows_check.stateChanged.connect(self.on_start_with_windows_changed)
         startup_check_layout.addWidget(self.start_with_windows_check)
         startup_frame.addLayout(startup_check_layout)
         layout.addLayout(startup_frame)
 
         layout.addStretch()
+        self.setup_diagnostics_tab()
+
+    def setup_diagnostics_tab(self):
+        """Live metrics (metrics.REGISTRY), refreshed once a second only while the tab is visible."""
+        diagnostics_widget = QWidget()
+        layout = QVBoxLayout(diagnostics_widget)
+        layout.setContentsMargins(15, 15, 15, 15)
+        self.diagnostics_text = QPlainTextEdit()
+        self.diagnostics_text.setReadOnly(True)
+        self.diagnostics_text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.diagnostics_text.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        layout.addWidget(self.diagnostics_text)
+        button_layout = QHBoxLayout()
+        export_json_button = QPushButton("Export JSON...")
+        export_json_button.clicked.connect(lambda: self.export_metrics("json"))
+        button_layout.addWidget(export_json_button)
+        export_prometheus_button = QPushButton("Export Prometheus...")
+        export_prometheus_button.clicked.connect(lambda: self.export_metrics("prometheus"))
+        button_layout.addWidget(export_prometheus_button)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset_metrics)
+        button_layout.addWidget(reset_button)
+        layout.addLayout(button_layout)
+        self.diagnostics_tab = diagnostics_widget
+        self.tabs.addTab(diagnostics_widget, "Diagnostics")
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.setInterval(1000)
+        self.diagnostics_timer.timeout.connect(self.refresh_diagnostics)
+        self.tabs.currentChanged.connect(self.update_diagnostics_timer)
+
+    def update_diagnostics_timer(self):
+        if not self.ui_built:
+            return
+        if self.isVisible() and self.tabs.currentWidget() is self.diagnostics_tab:
+            self.refresh_diagnostics()
+            self.diagnostics_timer.start()
+        else:
+            self.diagnostics_timer.stop()
+
+    def refresh_diagnostics(self):
+        scroll_bar = self.diagnostics_text.verticalScrollBar()
+        position = scroll_bar.value()
+        self.diagnostics_text.setPlainText(REGISTRY.format_table())
+        scroll_bar.setValue(position)
+
+    def export_metrics(self, format):
+        extension = "prom" if format == "prometheus" else "json"
+        path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", f"mic_mute_metrics.{extension}",
+                                              f"{format.capitalize()} files (*.{extension});;All files (*)")
+        if not path:
+            return
+        try:
+            REGISTRY.export(path, format)
+            log.info(f"Metrics exported to {path}")
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to export metrics: {str(e)}")
+
+    def reset_metrics(self):
+        REGISTRY.reset()
+        self.refresh_diagnostics()
     
     def setup_tray_icon(self):
         self.muted_tray_icon = self.create_tray_icon("mute_icon.ico")
         self.unmuted_tray_icon = self.create_tray_icon("icon.ico")
         self.tray_icon = QSystemTrayIcon(self.unmuted_tray_icon, self)
         menu = QMenu()
-        menu.addAction("Toggle Mute", self.queue_toggle)
-        menu.addAction("Show Window", self.show)
+        menu.addAction("Toggle Mute", lambda: self.queue_toggle())
+        menu.addAction("Mute All Microphones", lambda: self.mute_devices(True))
+        menu.addAction("Unmute All Microphones", lambda: self.mute_devices(False))
+        self.device_group_menu = menu.addMenu("Microphone Groups")
+        self.update_device_group_menu()
+        log_level_menu = menu.addMenu("Log Level")
+        self.log_level_group = QActionGroup(log_level_menu)
+        self.log_level_actions = {}
+        for level in app_logging.LEVEL_NAMES:
+            action = log_level_menu.addAction(level.capitalize(), lambda level=level: self.set_log_level(level))
+            action.setCheckable(True)
+            self.log_level_group.addAction(action)
+            self.log_level_actions[level] = action
+        self.log_level_actions[app_logging.current_level()].setChecked(True)
+        menu.addAction("Show Window", self.show_window)
         menu.addAction("Exit", self.exit_app)
         self.tray_icon.setContextMenu(menu)
         self.tray_icon.show()
 
+    def update_device_group_menu(self):
+        """Rebuild the tray submenu from the device_groups setting."""
+        self.device_group_menu.clear()
+        groups = self.config.device_groups
+        for name, selectors in groups.items():
+            self.device_group_menu.addAction(f"Mute {name}", lambda s=selectors: self.mute_devices(True, s))
+            self.device_group_menu.addAction(f"Unmute {name}", lambda s=selectors: self.mute_devices(False, s))
+        self.device_group_menu.menuAction().setVisible(bool(groups))
+
+    def set_log_level(self, level):
+        """Change verbosity at runtime (tray menu) and remember it."""
+        self.config.log_level = app_logging.set_level(level)
+        self.log_level_actions[self.config.log_level].setChecked(True)
+        log.info(f"Log level set to {self.config.log_level}")
+        self.save_config()
+
+    def mute_devices(self, muted, selectors=None):
+        """Mute or unmute a set of capture devices (all by default) in one audio worker pass."""
+        self.audio_worker.request_mute_devices(muted, selectors)
+        log.info(f"{'Mute' if muted else 'Unmute'} requested for {'all capture devices' if selectors is None else ', '.join(selectors)}")
+
+    def on_device_table(self, devices):
+        self.device_table = devices
+        self.update_tray_tooltip()
+
+    def on_breaker_state(self, state, description):
+        self.breaker_status = None if state == "closed" else f"Audio device unavailable: {description}"
+        self.update_tray_tooltip()
+
+    def update_tray_tooltip(self):
+        if self.last_mute_state is None:
+            tooltip = "Microphone: Unknown"
+        else:
+            tooltip = f"Microphone: {'Muted' if self.last_mute_state else 'Unmuted'}"
+        if len(self.device_table) > 1:
+            muted = sum(1 for device in self.device_table if device["muted"])
+            tooltip += f" ({muted} of {len(self.device_table)} microphones muted)"
+        if self.breaker_status:
+            tooltip += f"\n{self.breaker_status}"
+        self.tray_icon.setToolTip(tooltip)
+
     def create_tray_icon(self, icon_filename):
         icon_path = self.get_resource_path(os.path.join("resource", icon_filename))
         if os.path.exists(icon_path):
             return QIcon(icon_path)
         else:
-            print(f"[ERROR] Icon file {icon_path} not found, using fallback icon")
+            log.error(f"Icon file {icon_path} not found, using fallback icon")
             # Fallback to a default icon (e.g., empty QIcon or a generated one)
             image = QImage(32, 32, QImage.Format.Format_RGB32)
             image.fill(Qt.GlobalColor.gray)
             return QIcon(QPixmap.fromImage(image))
 
     def setup_overlay(self):
-        self.svg_code = """
-        <svg fill="red" width="64" height="64" viewBox="-0.24 0 1.52 1.52" xmlns="http://www.w3.org/2000/svg" class="cf-icon-svg"><path d="M0.933 0.633v0.105a0.421 0.421 0 0 1 -0.121 0.296 0.416 0.416 0 0 1 -0.131 0.090 0.4 0.4 0 0 1 -0.116 0.031v0.152h0.185a0.044 0.044 0 0 1 0 0.089H0.291a0.044 0.044 0 0 1 0 -0.089h0.185v-0.152a0.4 0.4 0 0 1 -0.116 -0.031 0.416 0.416 0 0 1 -0.131 -0.090 0.421 0.421 0 0 1 -0.121 -0.296v-0.105a0.044 0.044 0 1 1 0.089 0v0.105a0.33 0.33 0 0 0 0.096 0.233 0.319 0.319 0 0 0 0.458 0 0.33 0.33 0 0 0 0.096 -0.233v-0.105a0.044 0.044 0 1 1 0.089 0zM0.302 0.83a0.232 0.232 0 0 1 -0.019 -0.092V0.379A0.232 0.232 0 0 1 0.302 0.286a0.24 0.24 0 0 1 0.127 -0.127 0.232 0.232 0 0 1 0.093 -0.019 0.232 0.232 0 0 1 0.092 0.019 0.238 0.238 0 0 1 0.143 0.220l-0.001 0.359a0.237 0.237 0 0 1 -0.068 0.167 0.24 0.24 0 0 1 -0.075 0.051 0.232 0.232 0 0 1 -0.092 0.019 0.232 0.232 0 0 1 -0.093 -0.019A0.237 0.237 0 0 1 0.302 0.83"/>
-        </svg>
-        """
-        self.overlay = None
-        self.update_overlay()
+        if self.overlay is None:
+            self.update_overlay()
 
     def update_overlay(self):
-        if self.overlay:
-            self.overlay.close()
-            self.overlay = None
+        """Apply overlay settings to the persistent overlay window, creating it on first use."""
         screen = QApplication.primaryScreen()
         screen_size = (screen.size().width(), screen.size().height())
-        try:
-            margin = int(self.margin_edit.text() or 0)
-        except ValueError:
-            margin = 0
-        self.overlay = OverlayWidget(
-            self.svg_code,
-            str(self.size_edit.text().strip() or "48"),
-            self.opacity_slider.value() / 100.0,
-            self.position_combo.currentText(),
-            margin,
+        settings = (
+            self.config.overlay_size,
+            self.config.overlay_opacity,
+            self.config.overlay_position,
+            self.config.overlay_margin,
             screen_size
         )
-        if self.volume and self.volume.GetMute():
-            self.overlay.show()
-            print("Overlay shown: Muted")
+        if self.overlay is None:
+            self.overlay = OverlayWidget(self.svg_code, *settings)
         else:
+            self.overlay.apply_settings(*settings)
+        if self.last_mute_state:
+            if not self.overlay.isVisible():
+                self.overlay.show()
+                log.debug("Overlay shown: Muted")
+        elif self.overlay.isVisible():
             self.overlay.hide()
-            print("Overlay hidden: Unmuted")
+            log.debug("Overlay hidden: Unmuted")
+
+    def default_config(self):
+        return AppConfig(
+            mute_sound_file=self.get_resource_path(os.path.join("resource", "_mute.wav")),
+            unmute_sound_file=self.get_resource_path(os.path.join("resource", "_unmute.wav"))
+        )
 
     def load_config(self):
-        config_path = self.get_resource_path("config.json", writable=True)
-        bundled_config_path = self.get_resource_path("config.json")
-        default_mute_sound = self.get_resource_path(os.path.join("resource", "_mute.wav"))
-        default_unmute_sound = self.get_resource_path(os.path.join("resource", "_unmute.wav"))
-        default_hotkey = "ctrl+alt+m"
-        default_config = {
-            "overlay_position": "Top Mid",
-            "overlay_size": 48,
-            "overlay_margin": 10,
-            "overlay_opacity": 0.7,
-            "mute_sound_file": default_mute_sound,
-            "unmute_sound_file": default_unmute_sound,
-            "mute_sound_enabled": True,
-            "unmute_sound_enabled": True,
-            "start_minimized": False,
-            "start_with_windows": False,
-            "hotkey": default_hotkey,
-            "auto_refresh_enabled": False,
-            "auto_refresh_interval": 5
-        }
-
-        config = default_config
+        """Read and validate the settings file in one pass; touches no widgets."""
+        paths = (self.get_resource_path("config.json", writable=True), self.get_resource_path("config.json"))
+        config, source, self.config_needs_save = load_app_config(paths, self.default_config(), self.stat_cache)
+        for issue in config.issues:
+            log.warning(f"Config: {issue}")
+        if source is None:
+            log.info("No config found, using defaults")
+        else:
+            log.info(f"Loaded config from {source}")
+        return config
+
+    def apply_hotkey_config(self):
+        loaded_hotkey = self.config.hotkey
         try:
-            # Try loading from user config path first
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    config = json.load(f)
-                    # Merge with defaults to ensure all keys exist
-                    for key, value in default_config.items():
-                        config.setdefault(key, value)
-                    print(f"[INFO] Loaded config from {config_path}")
-            # Fallback to bundled config if user config doesn't exist
-            elif os.path.exists(bundled_config_path):
-                with open(bundled_config_path, 'r') as f:
-                    config = json.load(f)
-                    # Merge with defaults
-                    for key, value in default_config.items():
-                        config.setdefault(key, value)
-                    print(f"[INFO] Loaded bundled config from {bundled_config_path}")
-            else:
-                print(f"[INFO] No config found, using defaults")
-
-            # Validate sound file paths
-            mute_sound = config.get("mute_sound_file", default_mute_sound)
-            unmute_sound = config.get("unmute_sound_file", default_unmute_sound)
-            if not mute_sound or not os.path.exists(mute_sound):
-                print(f"[WARNING] Mute sound file {mute_sound} not found, using default")
-                mute_sound = default_mute_sound
-            if not unmute_sound or not os.path.exists(unmute_sound):
-                print(f"[WARNING] Unmute sound file {unmute_sound} not found, using default")
-                unmute_sound = default_unmute_sound
-
-            # Apply config to GUI
-            self.position_combo.setCurrentText(config.get("overlay_position", "Top Mid"))
-            self.size_edit.setText(str(config.get("overlay_size", 48)))
-            self.margin_edit.setText(str(config.get("overlay_margin", 10)))
-            self.opacity_slider.setValue(int(config.get("overlay_opacity", 0.7) * 100))
-            self.opacity_label.setText(f"{self.opacity_slider.value() / 100:.2f}")
-            self.mute_sound_edit.setText(mute_sound)
-            self.unmute_sound_edit.setText(unmute_sound)
-            self.mute_sound_check.setChecked(config.get("mute_sound_enabled", True))
-            self.unmute_sound_check.setChecked(config.get("unmute_sound_enabled", True))
-            self.start_minimized_check.setChecked(config.get("start_minimized", False))
-            self.start_with_windows_check.setChecked(config.get("start_with_windows", False))
-            self.auto_refresh_check.setChecked(config.get("auto_refresh_enabled", False))
-            self.auto_refresh_interval_edit.setText(str(config.get("auto_refresh_interval", 5)))
-
-            # Apply hotkey
-            loaded_hotkey = config.get("hotkey", default_hotkey)
-            if loaded_hotkey != self.current_hotkey:
-                try:
-                    if hasattr(self, 'hotkey_hook'):
-                        keyboard.unhook(self.hotkey_hook)
-                    def check_hotkey(event):
-                        keys = loaded_hotkey.split('+')
-                        all_pressed = all(is_pressed(key.strip()) for key in keys)
-                        if all_pressed and not self.is_toggling:
-                            self.trigger_toggle_mute.emit()
-                    self.hotkey_hook = keyboard.hook(check_hotkey, suppress=False)
-                    self.current_hotkey = loaded_hotkey
-                    # Format hotkey for display
-                    display_hotkey = " + ".join(key.strip().capitalize() for key in loaded_hotkey.split('+'))
-                    self.hotkey_display.setText(display_hotkey)
-                    print(f"[INFO] Loaded hotkey hook: {loaded_hotkey}")
-                except Exception as e:
-                    print(f"[ERROR] Error setting loaded hotkey hook '{loaded_hotkey}': {str(e)}")
-                    # Fallback to default hotkey
-                    if hasattr(self, 'hotkey_hook'):
-                        keyboard.unhook(self.hotkey_hook)
-                    def check_default_hotkey(event):
-                        keys = default_hotkey.split('+')
-                        all_pressed = all(is_pressed(key.strip()) for key in keys)
-                        if all_pressed and not self.is_toggling:
-                            self.trigger_toggle_mute.emit()
-                    self.hotkey_hook = keyboard.hook(check_default_hotkey, suppress=False)
-                    self.current_hotkey = default_hotkey
-                    display_default_hotkey = " + ".join(key.strip().capitalize() for key in default_hotkey.split('+'))
-                    self.hotkey_display.setText(display_default_hotkey)
-                    print(f"[INFO] Fell back to default hotkey hook: {default_hotkey}")
-
-            # Apply auto-refresh settings
-            self.auto_refresh_interval = config.get("auto_refresh_interval", 5)
-            if config.get("auto_refresh_enabled", False):
+            self.set_hotkey(loaded_hotkey)
+            log.info(f"Loaded hotkey hook: {loaded_hotkey}")
+        except Exception as e:
+            log.error(f"Error setting loaded hotkey hook '{loaded_hotkey}': {str(e)}")
+            if loaded_hotkey == "ctrl+alt+m":
+                return
+            # Fallback to default hotkey
+            try:
+                self.set_hotkey("ctrl+alt+m")
+                log.info("Fell back to default hotkey hook: ctrl+alt+m")
+            except Exception as e:
+                log.error(f"Error setting default hotkey hook: {str(e)}")
+
+    def apply_config_changes(self, previous=None):
+        """Run only the side effects whose settings differ from previous; None applies everything.
+
+        Returns the set of changed setting names.
+        """
+        config = self.config
+        changed = config.changed_fields(previous)
+        if "hotkey" in changed and config.hotkey != self.current_hotkey:
+            self.apply_hotkey_config()
+        if "hotkey_hook_process" in changed and previous is not None:
+            try:
+                self.install_hotkey_hook()
+            except Exception as e:
+                log.error(f"Error switching the keyboard hook mode: {str(e)}")
+        if changed & {"auto_refresh_enabled", "auto_refresh_interval"}:
+            self.auto_refresh_interval = config.auto_refresh_interval
+            if config.auto_refresh_enabled:
                 self.auto_refresh_timer.start(self.auto_refresh_interval * 1000)  # Convert seconds to milliseconds
-                print(f"[INFO] Auto-refresh enabled with interval {self.auto_refresh_interval} s")
+                log.info(f"Auto-refresh enabled with interval {self.auto_refresh_interval} s")
             else:
                 self.auto_refresh_timer.stop()
-                print(f"[INFO] Auto-refresh disabled")
-
+                log.info("Auto-refresh disabled")
+        if changed & {"fallback_poll_enabled", "fallback_poll_interval"}:
+            self.fallback_poll_enabled = config.fallback_poll_enabled
+            self.fallback_poll_interval = config.fallback_poll_interval
+            if hasattr(self, 'timer'):
+                self.schedule_poll()
+        if changed & {"poll_fast_interval", "poll_idle_interval", "poll_fast_period", "poll_pause_when_locked"}:
+            self.poll_scheduler.configure(config.poll_fast_interval, config.poll_idle_interval, config.poll_fast_period)
+            self.pause_polling_when_locked = config.poll_pause_when_locked
+            self.poll_scheduler.set_paused(self.pause_polling_when_locked and self.session_monitor.paused)
+            self.poll_scheduler.note_activity()
+            if hasattr(self, 'timer'):
+                self.schedule_poll()
+        if "start_with_windows" in changed:
+            self.toggle_windows_startup(save=False)
+        if "log_level" in changed:
+            app_logging.set_level(config.log_level)
+            self.log_level_actions[config.log_level].setChecked(True)
+        if "device_groups" in changed and previous is not None:
+            self.update_device_group_menu()
+        if previous is not None:
+            # Startup builds these in later stages; afterwards only what changed is touched
+            if changed & OVERLAY_SETTINGS and self.overlay is not None:
+                self.update_overlay()
+            if changed & {"mute_sound_file", "unmute_sound_file"} and self.mixer_initialized:
+                self.sound_bank.load({"mute": config.mute_sound_file, "unmute": config.unmute_sound_file})
+            if changed and self.ui_built:
+                self.sync_ui_from_config()
+        return changed
+
+    def apply_config(self):
+        """Apply the settings loaded at startup and create the user config if it is missing."""
+        self.apply_config_changes()
+        if self.config_needs_save:
             # Save config to ensure user config exists with defaults
             self.save_config()
-            self.apply_sounds()
-            self.update_overlay()
-            self.toggle_windows_startup()
-            print(f"[INFO] Configuration loaded and applied successfully")
-        except Exception as e:
-            print(f"[ERROR] Error loading config: {str(e)}")
-            # Apply default settings
-            self.position_combo.setCurrentText(default_config["overlay_position"])
-            self.size_edit.setText(str(default_config["overlay_size"]))
-            self.margin_edit.setText(str(default_config["overlay_margin"]))
-            self.opacity_slider.setValue(int(default_config["overlay_opacity"] * 100))
-            self.opacity_label.setText(f"{default_config['overlay_opacity']:.2f}")
-            self.mute_sound_edit.setText(default_mute_sound)
-            self.unmute_sound_edit.setText(default_unmute_sound)
-            self.mute_sound_check.setChecked(default_config["mute_sound_enabled"])
-            self.unmute_sound_check.setChecked(default_config["unmute_sound_enabled"])
-            self.start_minimized_check.setChecked(default_config["start_minimized"])
-            self.start_with_windows_check.setChecked(default_config["start_with_windows"])
-            self.auto_refresh_check.setChecked(default_config["auto_refresh_enabled"])
-            self.auto_refresh_interval_edit.setText(str(default_config["auto_refresh_interval"]))
-            self.current_hotkey = default_hotkey
-            self.hotkey_display.setText(default_hotkey)
-            try:
-                if hasattr(self, 'hotkey_hook'):
-                    keyboard.unhook(self.hotkey_hook)
-                def check_default_hotkey(event):
-                    keys = default_hotkey.split('+')
-                    all_pressed = all(is_pressed(key.strip()) for key in keys)
-                    if all_pressed and not self.is_toggling:
-                        self.trigger_toggle_mute.emit()
-                self.hotkey_hook = keyboard.hook(check_default_hotkey, suppress=False)
-                print(f"[INFO] Set default hotkey hook after error: {self.current_hotkey}")
-            except Exception as e:
-                print(f"[ERROR] Error setting default hotkey hook after config load failure: {str(e)}")
-            self.save_config()
-            self.apply_sounds()
-            self.update_overlay()
-            self.toggle_windows_startup()
-            print(f"[INFO] Applied default configuration due to load error")
-    
-    def save_config(self):
+        log.info("Configuration loaded and applied successfully")
+
+    def setup_config_watch(self):
+        """Hot-reload external edits: file-system notifications, with a slow stat() timer as the fallback."""
+        from PyQt6.QtCore import QFileSystemWatcher
         config_path = self.get_resource_path("config.json", writable=True)
-        try:
-            config = {
-                "overlay_position": self.position_combo.currentText(),
-                "overlay_size": int(self.size_edit.text().strip() or 48),
-                "overlay_margin": int(self.margin_edit.text() or 0),
-                "overlay_opacity": self.opacity_slider.value() / 100.0,
-                "mute_sound_file": self.mute_sound_edit.text(),
-                "unmute_sound_file": self.unmute_sound_edit.text(),
-                "mute_sound_enabled": self.mute_sound_check.isChecked(),
-                "unmute_sound_enabled": self.unmute_sound_check.isChecked(),
-                "start_minimized": self.start_minimized_check.isChecked(),
-                "start_with_windows": self.start_with_windows_check.isChecked(),
-                "hotkey": self.current_hotkey,
-                "auto_refresh_enabled": self.auto_refresh_check.isChecked(),
-                "auto_refresh_interval": int(self.auto_refresh_interval_edit.text().strip() or 5)
-            }
-            with open(config_path, 'w') as f:
-                json.dump(config, f, indent=4)
-            print(f"Saved config to {config_path}")
-        except Exception as e:
-            print(f"Error saving config: {str(e)}")
-    
-    def toggle_windows_startup(self):
+        self.config_monitor = ConfigFileMonitor(config_path)
+        self.config_reload_timer = QTimer()
+        self.config_reload_timer.setSingleShot(True)
+        self.config_reload_timer.timeout.connect(self.check_config_file)
+        # Atomic saves replace the file, which drops a plain file watch; the directory watch catches those
+        self.config_file_watcher = QFileSystemWatcher([os.path.dirname(config_path), config_path])
+        self.config_file_watcher.fileChanged.connect(lambda path: self.config_reload_timer.start(200))
+        self.config_file_watcher.directoryChanged.connect(lambda path: self.config_reload_timer.start(200))
+        self.config_stat_timer = QTimer()
+        self.config_stat_timer.timeout.connect(self.check_config_file)
+        self.config_stat_timer.start(self.config_stat_interval)
+
+    def check_config_file(self):
+        if self.config_writer.has_pending():
+            # Our own save is about to land; the monitor will see the file again afterwards
+            return
+        if not self.config_monitor.changed():
+            return
+        config_path = self.config_monitor.path
+        if config_path not in self.config_file_watcher.files() and os.path.exists(config_path):
+            self.config_file_watcher.addPath(config_path)
+        self.reload_config()
+
+    def reload_config(self):
+        """Re-read the settings file and apply only what differs from the settings in use."""
+        previous = self.config
+        self.stat_cache.clear()  # Sound files may have been added or removed along with the edit
+        config, source, _ = load_app_config((self.config_monitor.path,), self.default_config(), self.stat_cache)
+        if source is None:
+            log.warning("Config file is missing or unreadable; keeping current settings")
+            return
+        for issue in config.issues:
+            log.warning(f"Config: {issue}")
+        self.config = config
+        changed = self.apply_config_changes(previous)
+        if changed:
+            log.info(f"Config reloaded from disk, applied: {', '.join(sorted(changed))}")
+
+    def save_config(self):
+        """Queue the settings for the background writer; repeated calls within its quiet period coalesce."""
+        self.config.hotkey = self.current_hotkey
+        self.config.fallback_poll_enabled = self.fallback_poll_enabled
+        self.config.fallback_poll_interval = self.fallback_poll_interval
+        self.config_writer.save(self.config.to_dict())
+
+    def on_start_with_windows_changed(self):
+        self.config.start_with_windows = self.start_with_windows_check.isChecked()
+        self.toggle_windows_startup()
+
+    def toggle_windows_startup(self, save=True):
         """Toggle Windows startup by adding/removing a registry entry in HKEY_CURRENT_USER to run MicCTRL.exe with admin privileges, handling spaces in the path."""
+        if winreg is None:
+            log.info("Windows startup not available on this platform")
+            return
         try:
             registry_key = r"Software\Microsoft\Windows\CurrentVersion\Run"
             app_name = "MicMuteApp"
@@ -782,57 +1157,73 @@ class MicMuteApp(QMainWindow):
             quoted_path = f'"{executable_path}"'
             powershell_command = f'powershell -Command "Start-Process \'{quoted_path}\' -Verb RunAs"'
 
-            if self.start_with_windows_check.isChecked():
-                # Open registry key with write access
-                with winreg.OpenKey(winreg.HKEY_CURRENT_USER, registry_key, 0, winreg.KEY_SET_VALUE) as key:
-                    winreg.SetValueEx(key, app_name, 0, winreg.REG_SZ, powershell_command)
-                print(f"[INFO] Added registry entry for startup: {app_name} with command: {powershell_command}")
+            # Read first so an unchanged setting never rewrites the Run key
+            try:
+                with winreg.OpenKey(winreg.HKEY_CURRENT_USER, registry_key, 0, winreg.KEY_QUERY_VALUE) as key:
+                    current_command = winreg.QueryValueEx(key, app_name)[0]
+            except FileNotFoundError:
+                current_command = None
+
+            if self.config.start_with_windows:
+                if current_command == powershell_command:
+                    log.info(f"Registry entry for startup already up to date: {app_name}")
+                else:
+                    # Open registry key with write access
+                    with winreg.OpenKey(winreg.HKEY_CURRENT_USER, registry_key, 0, winreg.KEY_SET_VALUE) as key:
+                        winreg.SetValueEx(key, app_name, 0, winreg.REG_SZ, powershell_command)
+                    log.info(f"Added registry entry for startup: {app_name} with command: {powershell_command}")
+            elif current_command is None:
+                log.info(f"No registry entry found for {app_name} to remove")
             else:
                 # Open registry key with write access to delete entry
                 try:
                     with winreg.OpenKey(winreg.HKEY_CURRENT_USER, registry_key, 0, winreg.KEY_SET_VALUE) as key:
                         winreg.DeleteValue(key, app_name)
-                    print(f"[INFO] Removed registry entry for startup: {app_name}")
+                    log.info(f"Removed registry entry for startup: {app_name}")
                 except FileNotFoundError:
-                    print(f"[INFO] No registry entry found for {app_name} to remove")
-            self.save_config()
+                    log.info(f"No registry entry found for {app_name} to remove")
+            if save:
+                self.save_config()
         except Exception as e:
-            print(f"[ERROR] Error toggling Windows startup: {str(e)}")
+            log.error(f"Error toggling Windows startup: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to toggle Windows startup: {str(e)}")
 
     def update_overlay_position(self, position):
+        self.config.overlay_position = position
         self.update_overlay()
         self.save_config()
 
     def update_overlay_size(self, size):
+        self.config.overlay_size = int(str(size).split('x')[0])
         self.update_overlay()
         self.save_config()
 
     def update_margin(self):
         try:
             margin = int(self.margin_edit.text() or 0)
-            if 0 <= margin <= 50:
-                self.update_overlay()
-            else:
+            if not 0 <= margin <= 50:
                 QMessageBox.critical(self, "Error", "Margin must be between 0 and 50")
                 self.margin_edit.setText("0")
-                self.update_overlay()
+                margin = 0
         except ValueError:
             QMessageBox.critical(self, "Error", "Margin must be a number")
             self.margin_edit.setText("0")
-            self.update_overlay()
+            margin = 0
+        self.config.overlay_margin = margin
+        self.update_overlay()
         self.save_config()
 
     def update_opacity(self, value):
         try:
             opacity = value / 100.0
             self.opacity_label.setText(f"{opacity:.2f}")
+            self.config.overlay_opacity = opacity
             if self.overlay:
                 self.overlay.setWindowOpacity(opacity)
-                print(f"Overlay opacity set to: {opacity:.2f}")
+                log.debug("Overlay opacity set to: %.2f", opacity)
             self.save_config()
         except Exception as e:
-            print(f"Error updating overlay opacity: {str(e)}")
+            log.error(f"Error updating overlay opacity: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to update opacity: {str(e)}")
 
     def start_hotkey_capture(self):
@@ -852,22 +1243,9 @@ class MicMuteApp(QMainWindow):
 
     def apply_captured_hotkey(self, new_hotkey):
         try:
-            if hasattr(self, 'hotkey_hook'):
-                keyboard.unhook(self.hotkey_hook)
-            
-            def check_hotkey(event):
-                keys = new_hotkey.split('+')
-                all_pressed = all(is_pressed(key.strip()) for key in keys)
-                if all_pressed and not self.is_toggling:
-                    self.trigger_toggle_mute.emit()
-            
-            self.hotkey_hook = keyboard.hook(check_hotkey, suppress=False)
-            self.current_hotkey = new_hotkey
-            # Format hotkey for display (e.g., "ctrl+alt+m" -> "Ctrl + Alt + M")
-            display_hotkey = " + ".join(key.strip().capitalize() for key in new_hotkey.split('+'))
-            self.hotkey_display.setText(display_hotkey)
+            self.set_hotkey(new_hotkey)
             self.save_config()
-            print(f"[HotkeyWorker] New hotkey hook set: {new_hotkey}")
+            log.info(f"New hotkey hook set: {new_hotkey}")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to set hotkey: {str(e)}")
         finally:
@@ -879,33 +1257,79 @@ class MicMuteApp(QMainWindow):
 
     def setup_polling(self):
         self.timer = QTimer()
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.poll_mute_state)
-        self.timer.start(100)
+        REGISTRY.gauge("poll_interval_ms", "Current poll interval (0 when polling is off)",
+                       function=lambda: self.timer.interval() if self.timer.isActive() else 0)
+        # Lock and display-off notifications arrive as native messages for this window (see nativeEvent)
+        self.session_monitor.register(int(self.winId()))
+        self.schedule_poll()
+
+    def schedule_poll(self):
+        """Poll adaptively without push notifications, slowly (or not at all) when they are active.
+
+        Nothing is polled while the session is locked or the display is off.
+        """
+        if self.pause_polling_when_locked and self.session_monitor.paused:
+            self.timer.stop()
+        elif not self.push_notifications_active:
+            self.timer.start(self.poll_scheduler.next_interval())
+        elif self.fallback_poll_enabled:
+            self.timer.start(self.fallback_poll_interval)
+        else:
+            self.timer.stop()
+
+    def on_input_activity(self):
+        """A key was pressed while polling was slow: poll at the fast rate again."""
+        self.poll_scheduler.note_activity()
+        self.rearm_fast_poll()
+
+    def rearm_fast_poll(self):
+        """Bring a slow pending poll forward to the fast interval."""
+        if hasattr(self, 'timer') and not self.push_notifications_active and self.timer.isActive():
+            if self.timer.remainingTime() > self.poll_scheduler.fast_interval:
+                self.timer.start(self.poll_scheduler.fast_interval)
+
+    def on_session_state_changed(self):
+        paused = self.session_monitor.paused
+        log.info("Session %s: polling %s", "locked or display off" if paused else "active",
+                 "paused" if paused and self.pause_polling_when_locked else "running")
+        self.poll_scheduler.set_paused(paused and self.pause_polling_when_locked)
+        if not paused:
+            # The state may have changed while nobody was polling
+            self.poll_mute_state()
+        elif hasattr(self, 'timer'):
+            self.schedule_poll()
+
+    def nativeEvent(self, event_type, message):
+        if self.session_monitor.registered and event_type == b"windows_generic_MSG":
+            if self.session_monitor.handle_native(int(message)):
+                self.on_session_state_changed()
+        return super().nativeEvent(event_type, message)
 
     def refresh_device(self, manual=True):
-        try:
-            self.initialize_audio_device()
-            self.update_status()
-            print("Microphone device refreshed")
-            if manual:
-                QMessageBox.information(self, "Success", "Microphone device refreshed successfully")
-        except Exception as e:
-            print(f"[ERROR] Failed to refresh audio device: {str(e)}")
-            if manual:
-                QMessageBox.critical(self, "Error", f"Failed to refresh audio device: {str(e)}")
+        # The outcome is reported asynchronously through on_device_state
+        self.manual_refresh_pending = self.manual_refresh_pending or manual
+        self.initialize_audio_device()
+        log.info("Microphone device refresh requested")
+
+    def check_audio_device(self):
+        """Cheap endpoint-id check; the worker re-binds (and reports via on_device_state) only on a change."""
+        self.audio_worker.request_device_check()
 
     def toggle_auto_refresh(self):
         try:
-            if self.auto_refresh_check.isChecked():
+            self.config.auto_refresh_enabled = self.auto_refresh_check.isChecked()
+            if self.config.auto_refresh_enabled:
                 self.update_auto_refresh_interval()
-                self.refresh_device(manual=False)  # Trigger immediate refresh without popup
-                print(f"[INFO] Auto-refresh enabled with interval {self.auto_refresh_interval} ms")
+                self.check_audio_device()  # Immediate check without popup
+                log.info(f"Auto-refresh enabled with interval {self.auto_refresh_interval} ms")
             else:
                 self.auto_refresh_timer.stop()
-                print("[INFO] Auto-refresh disabled")
+                log.info("Auto-refresh disabled")
             self.save_config()
         except Exception as e:
-            print(f"[ERROR] Error toggling auto-refresh: {str(e)}")
+            log.error(f"Error toggling auto-refresh: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to toggle auto-refresh: {str(e)}")
 
     def update_auto_refresh_interval(self):
@@ -913,10 +1337,11 @@ class MicMuteApp(QMainWindow):
             interval = int(self.auto_refresh_interval_edit.text().strip() or 5)
             if 1 <= interval <= 60:  # Limit between 1 and 60 seconds
                 self.auto_refresh_interval = interval
-                if self.auto_refresh_check.isChecked():
+                self.config.auto_refresh_interval = interval
+                if self.config.auto_refresh_enabled:
                     self.auto_refresh_timer.start(self.auto_refresh_interval * 1000)  # Convert seconds to milliseconds
-                    self.refresh_device(manual=False)  # Trigger immediate refresh without popup
-                    print(f"[INFO] Auto-refresh interval set to {self.auto_refresh_interval} s")
+                    self.check_audio_device()  # Immediate check without popup
+                    log.info(f"Auto-refresh interval set to {self.auto_refresh_interval} s")
                 self.save_config()
             else:
                 QMessageBox.critical(self, "Error", "Interval must be between 1 and 60 seconds")
@@ -936,49 +1361,43 @@ class MicMuteApp(QMainWindow):
         if file_path:
             self.unmute_sound_edit.setText(file_path)
 
-    def apply_sounds(self):
-        self.mute_sound = None
-        self.unmute_sound = None
+    def apply_sounds(self, save=True):
+        if self.ui_built:
+            self.config.mute_sound_file = self.mute_sound_edit.text().strip()
+            self.config.unmute_sound_file = self.unmute_sound_edit.text().strip()
         if not self.mixer_initialized:
-            print("[INFO] Sound application skipped: pygame mixer not initialized")
-            self.mute_sound_edit.setText("")
-            self.unmute_sound_edit.setText("")
-            self.mute_sound_check.setChecked(False)
-            self.unmute_sound_check.setChecked(False)
-            self.save_config()
+            log.info("Sound application skipped: pygame mixer not initialized")
+            self.config.mute_sound_file = self.config.unmute_sound_file = ""
+            self.config.mute_sound_enabled = self.config.unmute_sound_enabled = False
+            if self.ui_built:
+                self.sync_ui_from_config()
+            if save:
+                self.save_config()
             return
 
-        mute_sound_path = self.mute_sound_edit.text().strip()
-        unmute_sound_path = self.unmute_sound_edit.text().strip()
-        if mute_sound_path and os.path.exists(mute_sound_path) and self.mute_sound_check.isChecked():
-            try:
-                self.mute_sound = pygame.mixer.Sound(mute_sound_path)
-                print(f"Mute sound loaded from: {mute_sound_path}")
-            except Exception as e:
-                print(f"Failed to load mute sound file: {str(e)}")
-                self.mute_sound = None
-        if unmute_sound_path and os.path.exists(unmute_sound_path) and self.unmute_sound_check.isChecked():
-            try:
-                self.unmute_sound = pygame.mixer.Sound(unmute_sound_path)
-                print(f"Unmute sound loaded from: {unmute_sound_path}")
-            except Exception as e:
-                print(f"Failed to load unmute sound file: {str(e)}")
-                self.unmute_sound = None
-        self.save_config()
+        # Decode both sounds in the background; the enabled checkboxes are honoured at play time
+        self.sound_bank.load({
+            "mute": self.config.mute_sound_file,
+            "unmute": self.config.unmute_sound_file
+        })
+        if save:
+            self.save_config()
 
     def clear_mute_sound(self):
         """Clear the mute sound file path and reset the mute sound."""
-        self.mute_sound_edit.setText("")
-        self.mute_sound = None
-        self.save_config()
-        print("[INFO] Mute sound cleared")
+        self.config.mute_sound_file = ""
+        if self.ui_built:
+            self.mute_sound_edit.setText("")
+        self.apply_sounds()
+        log.info("Mute sound cleared")
 
     def clear_unmute_sound(self):
         """Clear the unmute sound file path and reset the unmute sound."""
-        self.unmute_sound_edit.setText("")
-        self.unmute_sound = None
-        self.save_config()
-        print("[INFO] Unmute sound cleared")
+        self.config.unmute_sound_file = ""
+        if self.ui_built:
+            self.unmute_sound_edit.setText("")
+        self.apply_sounds()
+        log.info("Unmute sound cleared")
 
     def get_resource_path(self, relative_path, writable=False):
         try:
@@ -993,42 +1412,82 @@ class MicMuteApp(QMainWindow):
 
     def exit_app(self):
         try:
-            if hasattr(self, 'hotkey_hook'):
-                keyboard.unhook(self.hotkey_hook)
+            self.remove_hotkey_hook()
         except Exception as e:
-            print(f"Error removing hotkey hook: {str(e)}")
+            log.error(f"Error removing hotkey hook: {str(e)}")
+        self.stop_hook_process()
+        self.audio_worker.stop()
+        self.session_monitor.unregister()
+        if self.control_server:
+            self.control_server.stop()
+            self.control_server = None
+        if self.instance_guard:
+            self.instance_guard.release()
         if self.overlay:
             self.overlay.close()
             self.overlay = None
         self.tray_icon.hide()
-        pygame.mixer.quit()
-        pythoncom.CoUninitialize()
+        self.sound_bank.close()
+        self.config_writer.close()
+        app_logging.shutdown_logging()
         QApplication.quit()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_diagnostics_timer()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_diagnostics_timer()
+
     def changeEvent(self, event):
         """Handle window state changes, such as minimization."""
-        if event.type() == QEvent.Type.WindowStateChange and self.isMinimized() and self.start_minimized_check.isChecked():
+        if event.type() == QEvent.Type.WindowStateChange and self.isMinimized() and self.config.start_minimized:
             self.hide()
-            print("[INFO] Window minimized to system tray")
+            log.info("Window minimized to system tray")
             event.accept()
         else:
             super().changeEvent(event)
 
     def closeEvent(self, event):
         """Handle window close event, optionally minimizing to tray."""
-        if self.start_minimized_check.isChecked():
+        if self.config.start_minimized:
             self.hide()
-            print("[INFO] Window closed to system tray")
+            log.info("Window closed to system tray")
             event.ignore()
         else:
             try:
-                if hasattr(self, 'hotkey_hook'):
-                    keyboard.unhook(self.hotkey_hook)
+                self.remove_hotkey_hook()
             except Exception as e:
-                print(f"Error removing hotkey hook: {str(e)}")
+                log.error(f"Error removing hotkey hook: {str(e)}")
+            self.stop_hook_process()
+            self.config_writer.flush()
             event.accept()
 
 if __name__ == "__main__":
+    profile_startup = "--startup-profile" in sys.argv
+    if profile_startup:
+        sys.argv.remove("--startup-profile")
+    profiler = StartupProfiler(started_at=_STARTUP_T0, enabled=profile_startup)
+    profiler.mark("import")
+    app_dir = os.path.join(os.path.expanduser("~"), ".mic_mute_app")
+    app_logging.setup_logging(app_dir)
+    instance_guard = SingleInstance("MicMuteApp", app_dir)
+    if not instance_guard.acquire():
+        # Another instance owns the hotkey and tray: ask it to show itself (or toggle) and exit
+        command = "toggle" if "--toggle" in sys.argv else "show"
+        reply = instance_guard.forward(command)
+        if reply and reply.get("ok"):
+            log.info(f"Forwarded '{command}' to the running instance")
+            app_logging.shutdown_logging()
+            sys.exit(0)
+        log.error("Another instance is running but not responding")
+        app_logging.shutdown_logging()
+        sys.exit(1)
+    if "--toggle" in sys.argv:
+        sys.argv.remove("--toggle")
+    profiler.mark("instance check")
     app = QApplication(sys.argv)
-    window = MicMuteApp()
+    profiler.mark("Qt init")
+    window = MicMuteApp(profiler=profiler, instance_guard=instance_guard)
     sys.exit(app.exec())
\ No newline at end of file
@@ -1,34 +1,80 @@
+import time
+_STARTUP_T0 = time.perf_counter()  # Start of the "import" phase for --startup-profile
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-from comtypes import CLSCTX_ALL
-from ctypes import cast, POINTER
-import pythoncom
 import keyboard
 import pystray
 from PIL import Image, ImageDraw, ImageTk
 import threading
-import io
-import cairosvg
-import json
 import os
-import pygame
 import sys
-import winreg
+try:
+    import winreg
+except ImportError:  # Non-Windows hosts (headless benchmarks with a fake backend)
+    winreg = None
+from audio_backend import DEVICE_DEFAULT_CHANGED, PycawAudioBackend
+from command_queue import MUTE, TOGGLE, CommandQueue, WakeThread, coalesce, resolve_mute
+from device_manager import DeviceManager
+from icon_atlas import MUTED_OVERLAY_SVG, IconAtlas
+from metrics import REGISTRY
+from overlay_cache import LRUCache
+from poll_scheduler import PollScheduler
+from retry_policy import OPEN, CircuitBreaker
+from session_monitor import SessionMonitor
+from sound_bank import PygameSoundSink, SoundBank
+from startup_profile import StartupProfiler
+from config_store import ConfigWriter, ConfigFileMonitor
+from config_model import AppConfig, StatCache, load_config as load_app_config
+import app_logging
+
+log = app_logging.get_logger("app")
 
 class MicMuteApp:
-    def __init__(self, root):
+    def __init__(self, root, audio_backend=None, sound_sink=None, profiler=None):
+        self.profiler = profiler if profiler is not None else StartupProfiler(enabled=False)
         self.root = root
         self.root.title("Microphone Mute Control")
         self.root.geometry("410x900")
         self.root.resizable(False, False)
         self.root.configure(bg="#ffffff")
         
-        pythoncom.CoInitialize()
-        
-        self.device = None
-        self.volume = None
+        self.audio = audio_backend if audio_backend is not None else PycawAudioBackend()
+        self.audio.initialize_thread()
+        self.profiler.mark("COM init")
+        
+        # Stops a missing microphone from being re-activated on every poll
+        self.breaker = CircuitBreaker(on_change=self.on_breaker_change)
+        self.push_notifications_active = False
+        self.poll_scheduler = PollScheduler()  # Adaptive poll timing, used when push notifications are unavailable
+        self.session_monitor = SessionMonitor()  # Tk has no native message hook; the lock state is polled
+        self.pause_polling_when_locked = True
+        self.poll_job = None
+        self.next_poll_interval = 0
+        REGISTRY.gauge("poll_interval_ms", "Current poll interval (0 when polling is off)",
+                       function=lambda: self.next_poll_interval)
+        self.fallback_poll_interval = 5000  # ms, slow safety net while push notifications are active
+        # The keyboard hook, the tray menu and COM notifications post commands; the Tk loop runs them in batches
+        # Posting threads only set an Event; the blocking cross-thread event_generate runs on the wake thread
+        self.command_wake = WakeThread(self.wake_command_loop)
+        self.commands = CommandQueue(self.command_wake.set)
+        self.command_backstop_interval = 250  # ms, drains anything a failed wake left behind
+        self.command_handlers = {
+            "mute_devices": self.mute_devices,
+            "set_log_level": self.set_log_level,
+            "show_window": self.show_window,
+            "finish_hotkey_capture": self.finish_hotkey_capture,
+            "exit": self.exit_app,
+            "mute_changed": self.on_mute_notification,
+            "device_changed": self.on_device_notification,
+        }
+        self.root.bind("<<MicMuteCommand>>", self.process_commands)
+        self.root.after(self.command_backstop_interval, self.drain_stranded_commands)
+        self.device_manager = DeviceManager(self.audio)  # Other capture devices, opened on first use
+        # Hot-plug and default-device changes re-bind only when the default endpoint id changed
+        self.pending_device_events = []
+        self.audio.watch_devices(self.push_device_event)
         self.initialize_audio_device()
+        self.profiler.mark("audio device")
         
         # Configure modern ttk style
         style = ttk.Style()
@@ -157,26 +203,38 @@ class MicMuteApp:
         )
         self.start_with_windows_check.grid(row=1, column=0, columnspan=2, sticky="w", padx=5, pady=5)
         
+        self.profiler.mark("UI")
+        # Saves are coalesced and written atomically on a background thread
+        self.config_writer = ConfigWriter(self.get_resource_path("config.json", writable=True), indent=4)
+        self.stat_cache = StatCache()
         self.load_config()
+        self.profiler.mark("config")
         self.is_capturing_hotkey = False
         
         self.icon = None
         self.create_tray_icon()
         
         self.overlay = None
+        self.overlay_geometry_key = None
+        self.overlay_geometry_cache = None
+        self.icon_atlas = IconAtlas(MUTED_OVERLAY_SVG, os.path.dirname(self.get_resource_path("config.json", writable=True)))
+        self.icon_atlas.load()
+        self.overlay_images = LRUCache(capacity=8)
         self.create_overlay()
+        # Without cairo every size is rasterized in pure Python; keep that off the Tk thread
+        threading.Thread(target=self.icon_atlas.prerender, name="IconPrerender", daemon=True).start()
         
-        pygame.mixer.init()
-        self.mute_sound = None
-        self.unmute_sound = None
+        # The mixer is opened and the sounds decoded once the Tk loop is idle
+        self.sound_bank = SoundBank(sound_sink if sound_sink is not None else PygameSoundSink())
+        self.root.after_idle(self.open_sound_bank)
         self.last_mute_state = None
         
         try:
             self.current_hotkey = "ctrl+alt+m"
             keyboard.add_hotkey(self.current_hotkey, self.toggle_mute)
-            print(f"Initial hotkey set: {self.current_hotkey}")
+            log.info(f"Initial hotkey set: {self.current_hotkey}")
         except Exception as e:
-            print(f"Error setting initial hotkey: {str(e)}")
+            log.error(f"Error setting initial hotkey: {str(e)}")
         
         # Only minimize if start_minimized_var is True
         if not self.start_minimized_var.get():
@@ -184,9 +242,22 @@ class MicMuteApp:
         else:
             self.root.withdraw()
         
+        self.profiler.mark("tray + overlay + hotkey")
         self.update_status()
+        self.profiler.mark("first mute read")
+        self.profiler.report()
         self.poll_mute_state()
+        self.config_monitor = ConfigFileMonitor(self.get_resource_path("config.json", writable=True))
+        self.config_stat_interval = 2000  # ms
+        self.root.after(self.config_stat_interval, self.check_config_file)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+    def open_sound_bank(self):
+        self.sound_bank.open()
+        self.sound_bank.load({
+            "mute": self.mute_sound_var.get().strip(),
+            "unmute": self.unmute_sound_var.get().strip()
+        })
     
     def get_resource_path(self, relative_path, writable=False):
         """Get the path for a resource, handling both script and executable cases."""
@@ -204,123 +275,242 @@ class MicMuteApp:
     
     def initialize_audio_device(self):
         try:
-            devices = AudioUtilities.GetMicrophone()
-            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-            self.volume = cast(interface, POINTER(IAudioEndpointVolume))
-            print("Audio device initialized successfully")
+            self.audio.activate()
+            log.info("Audio device initialized successfully")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to initialize audio device: {str(e)}")
-            self.volume = None
+            self.audio.release()
+        self.subscribe_mute_notifications()
+
+    def subscribe_mute_notifications(self):
+        self.push_notifications_active = False
+        if self.audio.is_active():
+            self.push_notifications_active = self.audio.subscribe(self.push_mute_state)
+
+    def push_mute_state(self, is_muted):
+        # Runs on a COM thread: post the value to the Tk loop, which the wake thread wakes
+        self.commands.post("mute_changed", is_muted)
+
+    def on_mute_notification(self, mute_state):
+        if mute_state is not None and mute_state != self.last_mute_state:
+            log.info(f"External mute change notified: {'Muted' if mute_state else 'Unmuted'}")
+            self.update_status()
     
+    def push_device_event(self, event, device_id):
+        # Runs on a COM thread, like push_mute_state; a burst of events is handled by the first command
+        self.pending_device_events.append(event)
+        self.commands.post("device_changed")
+
+    def on_device_notification(self):
+        events, self.pending_device_events = self.pending_device_events, []
+        if not events:
+            return
+        if self.device_manager.is_open and any(name != DEVICE_DEFAULT_CHANGED for name in events):
+            self.device_manager.reopen()
+        self.check_audio_device()
+        self.update_tray_menu()
+
+    def check_audio_device(self):
+        """Re-bind the default microphone only if its endpoint id differs from the bound one."""
+        try:
+            if self.audio.is_active() and self.audio.default_device_id() == self.audio.bound_device_id:
+                return
+        except Exception as e:
+            log.error(f"Error querying the default microphone: {str(e)}")
+        try:
+            self.audio.activate()
+            log.info("Default microphone changed, audio device re-bound")
+        except Exception as e:
+            log.warning(f"No microphone after device change: {str(e)}")
+            self.audio.release()
+        self.subscribe_mute_notifications()
+        self.update_status()
+
     def refresh_device(self):
         try:
             self.initialize_audio_device()
+            if self.device_manager.is_open:
+                self.device_manager.reopen()
             self.update_status()
-            print("Microphone device refreshed")
+            self.update_tray_menu()
+            log.info("Microphone device refreshed")
             messagebox.showinfo("Success", "Microphone device refreshed successfully")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh audio device: {str(e)}")
     
+    def default_config(self):
+        return AppConfig(
+            mute_sound_file=self.get_resource_path(os.path.join("resource", "_mute.wav")),
+            unmute_sound_file=self.get_resource_path(os.path.join("resource", "_unmute.wav"))
+        )
+
     def load_config(self):
-        config_path = self.get_resource_path("config.json", writable=True)
-        default_mute_sound = self.get_resource_path(os.path.join("resource", "_mute.wav"))
-        default_unmute_sound = self.get_resource_path(os.path.join("resource", "_unmute.wav"))
-        
-        try:
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    config = json.load(f)
-                    self.position_var.set(config.get("overlay_position", "Top Mid"))
-                    self.size_var.set(config.get("overlay_size", "48x48"))
-                    self.margin_var.set(str(config.get("overlay_margin", 10)))
-                    self.opacity_var.set(config.get("overlay_opacity", 0.7))
-                    self.mute_sound_var.set(config.get("mute_sound_file", default_mute_sound))
-                    self.unmute_sound_var.set(config.get("unmute_sound_file", default_unmute_sound))
-                    self.start_minimized_var.set(config.get("start_minimized", False))
-                    self.start_with_windows_var.set(config.get("start_with_windows", False))
-                    self.opacity_value_label.config(text=f"{self.opacity_var.get():.1f}")
-                    print(f"Loaded config from {config_path}: position={self.position_var.get()}, size={self.size_var.get()}, margin={self.margin_var.get()}, opacity={self.opacity_var.get()}, mute_sound={self.mute_sound_var.get()}, unmute_sound={self.unmute_sound_var.get()}, start_minimized={self.start_minimized_var.get()}, start_with_windows={self.start_with_windows_var.get()}")
-            else:
-                bundled_config_path = self.get_resource_path("config.json")
-                if os.path.exists(bundled_config_path):
-                    with open(bundled_config_path, 'r') as f:
-                        config = json.load(f)
-                        self.position_var.set(config.get("overlay_position", "Top Mid"))
-                        self.size_var.set(config.get("overlay_size", "48x48"))
-                        self.margin_var.set(str(config.get("overlay_margin", 10)))
-                        self.opacity_var.set(config.get("overlay_opacity", 0.7))
-                        self.mute_sound_var.set(config.get("mute_sound_file", default_mute_sound))
-                        self.unmute_sound_var.set(config.get("unmute_sound_file", default_unmute_sound))
-                        self.start_minimized_var.set(config.get("start_minimized", False))
-                        self.start_with_windows_var.set(config.get("start_with_windows", False))
-                        self.opacity_value_label.config(text=f"{self.opacity_var.get():.1f}")
-                        print(f"Loaded bundled config from {bundled_config_path}: position AREA=Top Mid, size={self.size_var.get()}, margin={self.margin_var.get()}, opacity={self.opacity_var.get()}, mute_sound={self.mute_sound_var.get()}, unmute_sound={self.unmute_sound_var.get()}, start_minimized={self.start_minimized_var.get()}, start_with_windows={self.start_with_windows_var.get()}")
-                else:
-                    self.mute_sound_var.set(default_mute_sound)
-                    self.unmute_sound_var.set(default_unmute_sound)
-                    self.start_minimized_var.set(False)
-                    self.start_with_windows_var.set(False)
-                    self.save_config()
-            self.toggle_windows_startup()
-        except Exception as e:
-            print(f"Error loading config: {str(e)}")
-            self.mute_sound_var.set(default_mute_sound)
-            self.unmute_sound_var.set(default_unmute_sound)
-            self.start_minimized_var.set(False)
-            self.start_with_windows_var.set(False)
+        """Load the shared settings model and copy the keys this front end exposes into its variables."""
+        paths = (self.get_resource_path("config.json", writable=True), self.get_resource_path("config.json"))
+        config, source, needs_save = load_app_config(paths, self.default_config(), self.stat_cache)
+        for issue in config.issues:
+            log.warning(f"Config: {issue}")
+        self.config = config
+        app_logging.set_level(config.log_level)
+        self.apply_poll_config()
+        self.sync_vars_from_config()
+        log.info(f"Loaded config from {source or 'defaults'}: position={self.position_var.get()}, size={self.size_var.get()}, margin={self.margin_var.get()}, opacity={self.opacity_var.get()}, mute_sound={self.mute_sound_var.get()}, unmute_sound={self.unmute_sound_var.get()}, start_minimized={self.start_minimized_var.get()}, start_with_windows={self.start_with_windows_var.get()}")
+        if needs_save:
             self.save_config()
+        self.toggle_windows_startup(save=False)
+
+    def sync_vars_from_config(self):
+        config = self.config
+        self.position_var.set(config.overlay_position)
+        self.size_var.set(f"{config.overlay_size}x{config.overlay_size}")
+        self.margin_var.set(str(config.overlay_margin))
+        self.opacity_var.set(config.overlay_opacity)
+        self.mute_sound_var.set(config.mute_sound_file)
+        self.unmute_sound_var.set(config.unmute_sound_file)
+        self.start_minimized_var.set(config.start_minimized)
+        self.start_with_windows_var.set(config.start_with_windows)
+        self.opacity_value_label.config(text=f"{self.opacity_var.get():.1f}")
+
+    def check_config_file(self):
+        """Stat-based hot reload: pick up external edits of the settings file without a restart."""
+        if not self.config_writer.has_pending() and self.config_monitor.changed():
+            self.reload_config()
+        self.check_screen_size()
+        self.root.after(self.config_stat_interval, self.check_config_file)
+
+    def reload_config(self):
+        previous = self.config
+        self.stat_cache.clear()  # Sound files may have been added or removed along with the edit
+        config, source, _ = load_app_config((self.config_monitor.path,), self.default_config(), self.stat_cache)
+        if source is None:
+            log.warning("Config file is missing or unreadable; keeping current settings")
+            return
+        self.config = config
+        changed = config.changed_fields(previous)
+        if changed:
+            self.apply_config_changes(changed)
+            log.info(f"Config reloaded from disk, applied: {', '.join(sorted(changed))}")
+
+    def apply_config_changes(self, changed):
+        """Run only the side effects whose settings changed."""
+        self.sync_vars_from_config()
+        if self.overlay:
+            if "overlay_size" in changed:
+                self.update_overlay_size(self.size_var.get())
+            elif changed & {"overlay_position", "overlay_margin"}:
+                self.place_overlay()
+            if "overlay_opacity" in changed:
+                self.overlay.attributes('-alpha', self.config.overlay_opacity)
+        if changed & {"mute_sound_file", "unmute_sound_file"}:
+            self.sound_bank.load({"mute": self.config.mute_sound_file, "unmute": self.config.unmute_sound_file})
+        if "start_with_windows" in changed:
+            self.toggle_windows_startup(save=False)
+        if "log_level" in changed:
+            app_logging.set_level(self.config.log_level)
+        if "device_groups" in changed:
+            self.update_tray_menu()
+        if changed & {"poll_fast_interval", "poll_idle_interval", "poll_fast_period", "poll_pause_when_locked"}:
+            self.apply_poll_config()
+            self.poll_soon()
+
+    def apply_poll_config(self):
+        config = self.config
+        self.poll_scheduler.configure(config.poll_fast_interval, config.poll_idle_interval, config.poll_fast_period)
+        self.pause_polling_when_locked = config.poll_pause_when_locked
+        if not self.pause_polling_when_locked:
+            self.poll_scheduler.set_paused(False)
+
+    def poll_soon(self):
+        """Note activity and bring a slow pending poll forward to the fast interval."""
+        self.poll_scheduler.note_activity()
+        if self.poll_job is not None and not self.push_notifications_active \
+                and self.next_poll_interval > self.poll_scheduler.fast_interval:
+            self.root.after_cancel(self.poll_job)
+            self.poll_job = self.root.after(self.poll_scheduler.fast_interval, self.poll_mute_state)
     
     def save_config(self):
-        config_path = self.get_resource_path("config.json", writable=True)
+        # Settings this front end does not expose (hotkey, auto-refresh, ...) are kept as loaded
         try:
-            config = {
-                "overlay_position": self.position_var.get(),
-                "overlay_size": self.size_var.get(),
-                "overlay_margin": int(self.margin_var.get()),
-                "overlay_opacity": float(self.opacity_var.get()),
-                "mute_sound_file": self.mute_sound_var.get(),
-                "unmute_sound_file": self.unmute_sound_var.get(),
-                "start_minimized": self.start_minimized_var.get(),
-                "start_with_windows": self.start_with_windows_var.get()
-            }
-            with open(config_path, 'w') as f:
-                json.dump(config, f)
-            print(f"Saved config to {config_path}: position={self.position_var.get()}, size={self.size_var.get()}, margin={self.margin_var.get()}, opacity={self.opacity_var.get()}, mute_sound={self.mute_sound_var.get()}, unmute_sound={self.unmute_sound_var.get()}, start_minimized={self.start_minimized_var.get()}, start_with_windows={self.start_with_windows_var.get()}")
+            config = self.config
+            config.overlay_position = self.position_var.get()
+            config.overlay_size = int(self.size_var.get().split('x')[0])
+            config.overlay_margin = int(self.margin_var.get())
+            config.overlay_opacity = float(self.opacity_var.get())
+            config.mute_sound_file = self.mute_sound_var.get()
+            config.unmute_sound_file = self.unmute_sound_var.get()
+            config.start_minimized = self.start_minimized_var.get()
+            config.start_with_windows = self.start_with_windows_var.get()
+            self.config_writer.save(config.to_dict())
+            log.debug(f"Queued config save: position={self.position_var.get()}, size={self.size_var.get()}, margin={self.margin_var.get()}, opacity={self.opacity_var.get()}, mute_sound={self.mute_sound_var.get()}, unmute_sound={self.unmute_sound_var.get()}, start_minimized={self.start_minimized_var.get()}, start_with_windows={self.start_with_windows_var.get()}")
         except Exception as e:
-            print(f"Error saving config: {str(e)}")
+            log.error(f"Error saving config: {str(e)}")
     
-    def toggle_windows_startup(self):
+    def toggle_windows_startup(self, save=True):
+        if winreg is None:
+            log.info("Windows startup not available on this platform")
+            return
         try:
             key = winreg.HKEY_CURRENT_USER
             sub_key = r"Software\Microsoft\Windows\CurrentVersion\Run"
             app_name = "MicMuteApp"
             executable_path = os.path.abspath(sys.executable if hasattr(sys, '_MEIPASS') else __file__)
             
+            # Read first so an unchanged setting never rewrites the Run key
+            try:
+                with winreg.OpenKey(key, sub_key, 0, winreg.KEY_QUERY_VALUE) as reg_key:
+                    current_command = winreg.QueryValueEx(reg_key, app_name)[0]
+            except FileNotFoundError:
+                current_command = None
             with winreg.OpenKey(key, sub_key, 0, winreg.KEY_SET_VALUE) as reg_key:
                 if self.start_with_windows_var.get():
-                    winreg.SetValueEx(reg_key, app_name, 0, winreg.REG_SZ, f'"{executable_path}"')
-                    print(f"Added to Windows startup: {executable_path}")
+                    if current_command != f'"{executable_path}"':
+                        winreg.SetValueEx(reg_key, app_name, 0, winreg.REG_SZ, f'"{executable_path}"')
+                        log.info(f"Added to Windows startup: {executable_path}")
+                elif current_command is None:
+                    log.info("App was not in Windows startup")
                 else:
                     try:
                         winreg.DeleteValue(reg_key, app_name)
-                        print("Removed from Windows startup")
+                        log.info("Removed from Windows startup")
                     except FileNotFoundError:
-                        print("App was not in Windows startup")
+                        log.info("App was not in Windows startup")
         except Exception as e:
-            print(f"Error toggling Windows startup: {str(e)}")
+            log.error(f"Error toggling Windows startup: {str(e)}")
             messagebox.showerror("Error", f"Failed to toggle Windows startup: {str(e)}")
-        self.save_config()
+        if save:
+            self.save_config()
     
     def create_tray_icon(self):
         self.muted_tray_icon = self.create_icon("red", "M")
         self.unmuted_tray_icon = self.create_icon("green", "U")
-        menu = (
+        self.icon = pystray.Icon("MicMuteApp", self.unmuted_tray_icon, "Microphone Mute", self.build_tray_menu())
+        threading.Thread(target=self.icon.run, daemon=True).start()
+
+    def build_tray_menu(self):
+        """The tray menu, with a Mute/Unmute pair per device_groups entry."""
+        # pystray calls these on its own thread; everything is posted to the Tk loop
+        group_items = []
+        for name, selectors in self.config.device_groups.items():
+            group_items.append(pystray.MenuItem(f"Mute {name}", lambda icon, item, s=selectors: self.commands.post("mute_devices", True, s)))
+            group_items.append(pystray.MenuItem(f"Unmute {name}", lambda icon, item, s=selectors: self.commands.post("mute_devices", False, s)))
+        return pystray.Menu(
             pystray.MenuItem("Toggle Mute", self.toggle_mute),
-            pystray.MenuItem("Show Window", self.show_window),
-            pystray.MenuItem("Exit", self.exit_app)
+            pystray.MenuItem("Mute All Microphones", lambda: self.commands.post("mute_devices", True)),
+            pystray.MenuItem("Unmute All Microphones", lambda: self.commands.post("mute_devices", False)),
+            pystray.MenuItem("Microphone Groups", pystray.Menu(*group_items), visible=bool(group_items)),
+            pystray.MenuItem("Log Level", pystray.Menu(*(
+                pystray.MenuItem(level.capitalize(), lambda icon, item, level=level: self.commands.post("set_log_level", level),
+                                 checked=lambda item, level=level: app_logging.current_level() == level, radio=True)
+                for level in app_logging.LEVEL_NAMES))),
+            pystray.MenuItem("Show Window", lambda: self.commands.post("show_window")),
+            pystray.MenuItem("Exit", lambda: self.commands.post("exit"))
         )
-        self.icon = pystray.Icon("MicMuteApp", self.unmuted_tray_icon, "Microphone Mute", menu)
-        threading.Thread(target=self.icon.run, daemon=True).start()
+
+    def update_tray_menu(self):
+        """Rebuild the tray menu so the Microphone Groups submenu follows the settings."""
+        if self.icon:
+            self.icon.menu = self.build_tray_menu()
+            self.icon.update_menu()
     
     def create_icon(self, color, letter):
         image = Image.new('RGB', (32, 32), color=color)
@@ -329,24 +519,7 @@ class MicMuteApp:
         return image
     
     def create_overlay(self):
-        print("Creating overlay window")
-        svg_code = """
-        <svg fill="red" width="64" height="64" viewBox="-0.24 0 1.52 1.52" xmlns="http://www.w3.org/2000/svg" class="cf-icon-svg"><path d="M0.933 0.633v0.105a0.421 0.421 0 0 1 -0.121 0.296 0.416 0.416 0 0 1 -0.131 0.090 0.4 0.4 0 0 1 -0.116 0.031v0.152h0.185a0.044 0.044 0 0 1 0 0.089H0.291a0.044 0.044 0 0 1 0 -0.089h0.185v-0.152a0.4 0.4 0 0 1 -0.116 -0.031 0.416 0.416 0 0 1 -0.131 -0.090 0.421 0.421 0 0 1 -0.121 -0.296v-0.105a0.044 0.044 0 1 1 0.089 0v0.105a0.33 0.33 0 0 0 0.096 0.233 0.319 0.319 0 0 0 0.458 0 0.33 0.33 0 0 0 0.096 -0.233v-0.105a0.044 0.044 0 1 1 0.089 0zM0.302 0.83a0.232 0.232 0 0 1 -0.019 -0.092V0.379A0.232 0.232 0 0 1 0.302 0.286a0.24 0.24 0 0 1 0.127 -0.127 0.232 0.232 0 0 1 0.093 -0.019 0.232 0.232 0 0 1 0.092 0.019 0.238 0.238 0 0 1 0.143 0.22l-0.001 0.359a0.237 0.237 0 0 1 -0.068 0.167 0.24 0.24 0 0 1 -0.075 0.051 0.232 0.232 0 0 1 -0.092 0.019 0.232 0.232 0 0 1 -0.093 -0.019A0.237 0.237 0 0 1 0.302 0.83"/></svg>
-        """
-        try:
-            icon_size = int(self.size_var.get().split('x')[0])
-            png_data = io.BytesIO()
-            cairosvg.svg2png(bytestring=svg_code.encode('utf-8'), write_to=png_data, output_width=icon_size, output_height=icon_size, background_color='transparent')
-            muted_image = Image.open(png_data)
-            print(f"SVG converted to PNG, mode: {muted_image.mode}, size: {icon_size}x{icon_size}")
-            if muted_image.mode != 'RGBA':
-                muted_image = muted_image.convert('RGBA')
-            self.muted_overlay_icon = ImageTk.PhotoImage(muted_image)
-            print(f"Created {icon_size}x{icon_size} vector muted icon with transparent background")
-        except Exception as e:
-            print(f"Error creating vector muted icon: {str(e)}")
-            self.muted_overlay_icon = self.create_overlay_icon("red", muted=True)
-        
+        log.info("Creating overlay window")
         self.overlay = tk.Toplevel(self.root)
         self.overlay.overrideredirect(True)
         self.overlay.attributes('-topmost', True)
@@ -355,19 +528,55 @@ class MicMuteApp:
         self.overlay.configure(bg='#000000')
         self.overlay_label = tk.Label(self.overlay, borderwidth=0, bg='#000000')
         self.overlay_label.pack()
-        if self.volume and self.volume.GetMute():
-            self.overlay_label.config(image=self.muted_overlay_icon)
-            self.overlay.deiconify()
-        else:
-            self.overlay.withdraw()
-        self.update_overlay_position(self.position_var.get())
+        self.overlay_placed_geometry = None
+        self.overlay_state = None
+        self.overlay_label_image = None
+        self.place_overlay()
+        self.overlay.withdraw()
+        self.show_overlay("muted" if self.audio.is_active() and self.audio.get_mute() else None)
+
+    def overlay_image(self, state):
+        """PhotoImage for state at the current overlay size, built from the icon atlas once and kept."""
+        icon_size = int(self.size_var.get().split('x')[0])
+        return self.overlay_images.get_or_create((state, icon_size), lambda: self.create_overlay_image(state, icon_size))
+
+    def create_overlay_image(self, state, icon_size):
+        try:
+            return tk.PhotoImage(master=self.root, data=self.icon_atlas.png_base64(state, icon_size))
+        except Exception as e:
+            log.error(f"Error creating {state} overlay icon: {str(e)}")
+            return self.create_overlay_icon("red" if state == "muted" else "orange", muted=state == "muted")
+
+    def show_overlay(self, state):
+        """Show the overlay with the icon for state ("muted", "error"), or hide it for None.
+
+        Only touches Tk when something changed; the geometry is already in place and nothing is saved.
+        """
+        if state is not None:
+            image = self.overlay_image(state)
+            if image is not self.overlay_label_image:
+                self.overlay_label.config(image=image)
+                self.overlay_label_image = image
+        if (state is None) != (self.overlay_state is None):
+            if state is None:
+                self.overlay.withdraw()
+            else:
+                self.overlay.deiconify()
+        if state != self.overlay_state:
+            log.debug("Overlay %s", state or "hidden")
+        self.overlay_state = state
     
-    def update_overlay_position(self, position):
+    def overlay_geometry(self):
+        """Tk geometry string for the overlay; recomputed only when the screen size or a placement setting changes."""
         try:
-            screen_width = self.root.winfo_screenwidth()
-            screen_height = self.root.winfo_screenheight()
-            icon_size = int(self.size_var.get().split('x')[0])
             margin = int(self.margin_var.get())
+        except ValueError:
+            margin = 0
+        key = (self.root.winfo_screenwidth(), self.root.winfo_screenheight(), self.position_var.get(),
+               int(self.size_var.get().split('x')[0]), margin)
+        if key != self.overlay_geometry_key:
+            self.overlay_geometry_key = key
+            screen_width, screen_height, position, icon_size, margin = key
             if position == "Top Left":
                 x_position, y_position = margin, margin
             elif position == "Top Mid":
@@ -386,26 +595,42 @@ class MicMuteApp:
                 x_position, y_position = screen_width - icon_size - margin, screen_height - icon_size - margin
             else:
                 x_position, y_position = (screen_width - icon_size) // 2, margin
-            self.overlay.geometry(f"{icon_size}x{icon_size}+{x_position}+{y_position}")
-            print(f"Overlay positioned at {x_position},{y_position} for screen {screen_width}x{screen_height}, position: {position}, size: {icon_size}x{icon_size}, margin: {margin}")
-            self.overlay.update_idletasks()
-            self.overlay.update()
+            self.overlay_geometry_cache = f"{icon_size}x{icon_size}+{x_position}+{y_position}"
+            log.debug("Overlay positioned at %d,%d for screen %dx%d, position: %s, size: %dx%d, margin: %d",
+                      x_position, y_position, screen_width, screen_height, position, icon_size, icon_size, margin)
+        return self.overlay_geometry_cache
+
+    def place_overlay(self):
+        """Move the overlay if its geometry changed. No redraw is forced; Tk applies it when idle."""
+        geometry = self.overlay_geometry()
+        if geometry != self.overlay_placed_geometry:
+            self.overlay.geometry(geometry)
+            self.overlay_placed_geometry = geometry
+
+    def update_overlay_position(self, position):
+        """Settings change: move the overlay and remember the placement."""
+        try:
+            self.position_var.set(position)
+            self.place_overlay()
             self.save_config()
         except Exception as e:
-            print(f"Error setting overlay position: {str(e)}")
+            log.error(f"Error setting overlay position: {str(e)}")
+
+    def check_screen_size(self):
+        """Re-place the overlay after a resolution or monitor change."""
+        if self.overlay and (self.root.winfo_screenwidth(), self.root.winfo_screenheight()) != self.overlay_geometry_key[:2]:
+            self.place_overlay()
     
     def update_overlay_size(self, size):
+        """Settings change: swap in the atlas icon for the new size and re-place the window in place."""
         try:
-            print(f"Overlay size set to: {size}")
-            was_muted = self.volume.GetMute() if self.volume else False
-            self.overlay.destroy()
-            self.create_overlay()
-            if was_muted:
-                self.overlay_label.config(image=self.muted_overlay_icon)
-                self.overlay.deiconify()
+            log.info(f"Overlay size set to: {size}")
+            self.size_var.set(size)
+            self.show_overlay(self.overlay_state)
+            self.place_overlay()
             self.save_config()
         except Exception as e:
-            print(f"Error updating overlay size: {str(e)}")
+            log.error(f"Error updating overlay size: {str(e)}")
             messagebox.showerror("Error", f"Failed to update size: {str(e)}")
     
     def update_margin(self):
@@ -414,7 +639,7 @@ class MicMuteApp:
             margin = int(margin_str) if margin_str else 0
             if 0 <= margin <= 50:
                 self.margin_var.set(str(margin))
-                print(f"Margin set to: {margin}")
+                log.info(f"Margin set to: {margin}")
                 self.update_overlay_position(self.position_var.get())
             else:
                 messagebox.showerror("Error", "Margin must be between 0 and 50")
@@ -432,10 +657,10 @@ class MicMuteApp:
             self.opacity_value_label.config(text=f"{opacity:.1f}")
             if self.overlay:
                 self.overlay.attributes('-alpha', opacity)
-                print(f"Overlay opacity set to: {opacity}")
+                log.debug("Overlay opacity set to: %s", opacity)
             self.save_config()
         except Exception as e:
-            print(f"Error updating overlay opacity: {str(e)}")
+            log.error(f"Error updating overlay opacity: {str(e)}")
             messagebox.showerror("Error", f"Failed to update opacity: {str(e)}")
     
     def create_overlay_icon(self, color, muted):
@@ -455,7 +680,7 @@ class MicMuteApp:
             return
         self.is_capturing_hotkey = True
         self.set_hotkey_button.config(text="Press Keys...", state="disabled")
-        self.root.update()
+        self.root.update_idletasks()
         try:
             threading.Thread(target=self.capture_hotkey, daemon=True).start()
         except Exception as e:
@@ -464,16 +689,24 @@ class MicMuteApp:
             messagebox.showerror("Error", f"Failed to start hotkey capture: {str(e)}")
     
     def capture_hotkey(self):
+        # Runs on its own thread: only reads the keys, the Tk loop applies the result
         try:
             new_hotkey = keyboard.read_hotkey(suppress=False)
-            if not new_hotkey:
-                raise ValueError("No hotkey captured")
+            error = None if new_hotkey else "No hotkey captured"
+        except Exception as e:
+            new_hotkey, error = None, str(e)
+        self.commands.post("finish_hotkey_capture", new_hotkey, error)
+
+    def finish_hotkey_capture(self, new_hotkey, error):
+        try:
+            if error:
+                raise ValueError(error)
             if self.current_hotkey:
                 keyboard.remove_hotkey(self.current_hotkey)
             keyboard.add_hotkey(new_hotkey, self.toggle_mute)
             self.current_hotkey = new_hotkey
             self.label_hotkey.config(text=f"{new_hotkey}")
-            print(f"Captured and set hotkey: {new_hotkey}")
+            log.info(f"Captured and set hotkey: {new_hotkey}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to set hotkey: {str(e)}")
             if self.current_hotkey:
@@ -484,59 +717,111 @@ class MicMuteApp:
         finally:
             self.is_capturing_hotkey = False
             self.set_hotkey_button.config(text="Set Hotkey", state="normal")
-            self.root.update()
     
     def poll_mute_state(self):
-        if self.volume:
+        if self.pause_polling_when_locked and self.session_monitor.check_locked():
+            paused = self.session_monitor.paused
+            log.info("Session %s: polling %s", "locked" if paused else "unlocked", "paused" if paused else "resumed")
+            self.poll_scheduler.set_paused(paused)
+        if self.poll_scheduler.paused:
+            # Nothing is read while locked; only the lock state is checked, at the idle rate
+            self.next_poll_interval = 0
+            self.poll_job = self.root.after(self.poll_scheduler.idle_interval, self.poll_mute_state)
+            return
+        if self.audio.is_active():
             try:
-                current_mute = self.volume.GetMute()
+                self.poll_scheduler.poll_started()
+                current_mute = self.audio.get_mute()
+                self.breaker.record_success()
                 if hasattr(self, 'last_mute_state') and current_mute != self.last_mute_state:
-                    print(f"External mute change detected: {'Muted' if current_mute else 'Unmuted'}")
+                    log.info("External mute change detected: %s", "Muted" if current_mute else "Unmuted")
+                    self.poll_scheduler.external_change()
                     self.update_status()
                 self.last_mute_state = current_mute
             except Exception as e:
-                print(f"Error polling mute state: {str(e)}")
-        self.root.after(100, self.poll_mute_state)
+                log.error("Error polling mute state: %s", e)
+                self.breaker.record_failure()
+                if self.breaker.state == OPEN:
+                    self.audio.release()
+        elif self.breaker.allow():
+            try:
+                self.audio.activate()
+                self.breaker.record_success()
+                log.info("Audio device re-initialized")
+                self.subscribe_mute_notifications()
+                self.update_status()
+            except Exception as e:
+                log.warning("Audio device still unavailable: %s", e)
+                self.audio.release()
+                self.breaker.record_failure()
+        if self.push_notifications_active:
+            interval = self.fallback_poll_interval
+        else:
+            interval = self.poll_scheduler.next_interval()
+        self.next_poll_interval = interval
+        self.poll_job = self.root.after(interval, self.poll_mute_state)
     
     def toggle_mute(self):
-        if self.volume:
+        """Safe from any thread (keyboard hook, tray menu): the toggle is posted to the Tk loop."""
+        self.poll_scheduler.note_activity()
+        self.commands.post(TOGGLE)
+
+    def wake_command_loop(self):
+        # On the wake thread, the only non-Tk thread that touches Tk: the virtual event is queued to the Tk loop
+        try:
+            self.root.event_generate("<<MicMuteCommand>>", when="tail")
+        except Exception as e:
+            self.commands.wake_failed()
+            log.error(f"Error forwarding command: {str(e)}")
+
+    def drain_stranded_commands(self):
+        """Backstop for commands whose wake-up was lost; normally finds the queue empty."""
+        if len(self.commands):
+            self.process_commands()
+        self.root.after(self.command_backstop_interval, self.drain_stranded_commands)
+
+    def process_commands(self, event=None):
+        """Run everything posted since the last batch; a burst of toggles becomes one SetMute and one redraw."""
+        for name, args in coalesce(self.commands.drain()):
+            if name == MUTE:
+                self.apply_mute(*args)
+            else:
+                self.command_handlers[name](*args)
+
+    def apply_mute(self, target, flip):
+        if self.audio.is_active():
             try:
-                current_mute = self.volume.GetMute()
-                new_mute = 1 if current_mute == 0 else 0
-                self.volume.SetMute(new_mute, None)
+                current = self.audio.get_mute()
+                new_mute = resolve_mute(current, target, flip)
+                if new_mute != current:
+                    self.audio.set_mute(new_mute)
                 self.update_status()
-                print(f"Microphone toggled to: {'Muted' if new_mute else 'Unmuted'}")
+                log.debug("Microphone toggled to: %s", "Muted" if new_mute else "Unmuted")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to toggle mute: {str(e)}")
     
-    def play_sound(self, is_muted):
-        sound = self.mute_sound if is_muted else self.unmute_sound
-        sound_path = self.mute_sound_var.get().strip() if is_muted else self.unmute_sound_var.get().strip()
+    def set_log_level(self, level):
+        """Change verbosity at runtime (tray menu) and remember it."""
+        self.config.log_level = app_logging.set_level(level)
+        log.info(f"Log level set to {self.config.log_level}")
+        self.save_config()
 
-        if sound is None and sound_path and os.path.exists(sound_path):
-            try:
-                sound = pygame.mixer.Sound(sound_path)
-                if is_muted:
-                    self.mute_sound = sound
-                    print(f"Mute sound loaded for playback from: {sound_path}")
-                else:
-                    self.unmute_sound = sound
-                    print(f"Unmute sound loaded for playback from: {sound_path}")
-            except Exception as e:
-                print(f"Error loading {'mute' if is_muted else 'unmute'} sound for playback: {str(e)}")
-                sound = None
+    def mute_devices(self, muted, selectors=None):
+        """Mute or unmute a set of capture devices (all by default) through the cached device table."""
+        try:
+            self.device_manager.open()
+        except Exception as e:
+            self.device_manager.close()
+            messagebox.showerror("Error", f"Failed to enumerate microphones: {str(e)}")
+            return
+        targets = dict.fromkeys(self.device_manager.resolve(selectors), muted)
+        errors = self.device_manager.set_mute(targets)
+        log.info(f"{len(targets) - len(errors)} of {len(targets)} microphone(s) {'muted' if muted else 'unmuted'}")
+        self.update_status()
 
-        if sound:
-            try:
-                pygame.mixer.Sound.play(sound)
-            except Exception as e:
-                print(f"Error playing {'mute' if is_muted else 'unmute'} sound: {str(e)}")
-                if is_muted:
-                    self.mute_sound = None
-                else:
-                    self.unmute_sound = None
-        else:
-            print(f"No valid {'mute' if is_muted else 'unmute'} sound, skipping playback")
+    def play_sound(self, is_muted):
+        if not self.sound_bank.play("mute" if is_muted else "unmute"):
+            log.debug("No valid %s sound, skipping playback", "mute" if is_muted else "unmute")
     
     def browse_mute_sound(self):
         file_path = filedialog.askopenfilename(filetypes=[("WAV files", "*.wav")])
@@ -549,54 +834,47 @@ class MicMuteApp:
             self.unmute_sound_var.set(file_path)
     
     def apply_sounds(self):
-        self.mute_sound = None
-        self.unmute_sound = None
-        mute_sound_path = self.mute_sound_var.get().strip()
-        unmute_sound_path = self.unmute_sound_var.get().strip()
-        
-        if mute_sound_path and os.path.exists(mute_sound_path):
-            try:
-                self.mute_sound = pygame.mixer.Sound(mute_sound_path)
-                print(f"Mute sound loaded from: {mute_sound_path}")
-            except Exception as e:
-                print(f"Failed to load mute sound file: {str(e)}")
-                self.mute_sound = None
-        
-        if unmute_sound_path and os.path.exists(unmute_sound_path):
-            try:
-                self.unmute_sound = pygame.mixer.Sound(unmute_sound_path)
-                print(f"Unmute sound loaded from: {unmute_sound_path}")
-            except Exception as e:
-                print(f"Failed to load unmute sound file: {str(e)}")
-                self.unmute_sound = None
-        
+        # Decoded on a background thread and kept resident for playback
+        self.sound_bank.load({
+            "mute": self.mute_sound_var.get().strip(),
+            "unmute": self.unmute_sound_var.get().strip()
+        })
         self.save_config()
     
     def update_status(self):
-        if self.volume:
+        if self.audio.is_active():
             try:
-                mute_state = self.volume.GetMute()
+                mute_state = self.audio.get_mute()
                 status = "Muted" if mute_state else "Unmuted"
                 self.label.config(text=f"Status: {status}")
                 if self.icon:
                     self.icon.icon = self.muted_tray_icon if mute_state else self.unmuted_tray_icon
-                    self.icon.title = f"Microphone: {status}"
+                    self.icon.title = self.tray_title(status)
                 if self.overlay:
-                    if mute_state:
-                        self.overlay_label.config(image=self.muted_overlay_icon)
-                        self.overlay.deiconify()
-                        self.update_overlay_position(self.position_var.get())
-                        print(f"Overlay shown: {status}")
-                    else:
-                        self.overlay.withdraw()
-                        print(f"Overlay hidden: {status}")
+                    self.show_overlay("muted" if mute_state else None)
                 if hasattr(self, 'last_mute_state') and mute_state != self.last_mute_state:
                     self.play_sound(mute_state)
                 self.last_mute_state = mute_state
             except Exception as e:
                 self.label.config(text="Status: Error")
+                if self.overlay:
+                    self.show_overlay("error")
                 messagebox.showerror("Error", f"Failed to get mute status: {str(e)}")
     
+    def on_breaker_change(self, breaker):
+        if breaker.state == OPEN:
+            log.warning(f"Audio circuit breaker open: {breaker.describe()}")
+        else:
+            log.info(f"Audio circuit breaker {breaker.state}")
+        if self.icon:
+            status = "Unknown" if self.last_mute_state is None else ("Muted" if self.last_mute_state else "Unmuted")
+            self.icon.title = self.tray_title(status)
+
+    def tray_title(self, status):
+        if self.breaker.state == "closed":
+            return f"Microphone: {status}"
+        return f"Microphone: {status}\nAudio device unavailable: {self.breaker.describe()}"
+
     def show_window(self):
         self.root.deiconify()
     
@@ -612,12 +890,18 @@ class MicMuteApp:
                 keyboard.remove_hotkey(self.current_hotkey)
         except:
             pass
+        self.command_wake.stop()
+        self.audio.unwatch_devices()
+        self.device_manager.close()
+        self.audio.release()
         if self.icon:
             self.icon.stop()
         if self.overlay:
             self.overlay.destroy()
-        pygame.mixer.quit()
-        pythoncom.CoUninitialize()
+        self.sound_bank.close()
+        self.config_writer.close()
+        self.audio.uninitialize_thread()
+        app_logging.shutdown_logging()
         self.root.destroy()
     
     def __del__(self):
@@ -630,12 +914,17 @@ class MicMuteApp:
             self.icon.stop()
         if self.overlay:
             self.overlay.destroy()
-        pygame.mixer.quit()
-        pythoncom.CoUninitialize()
+        self.sound_bank.close()
+        self.audio.uninitialize_thread()
 
 def main():
+    profile_startup = "--startup-profile" in sys.argv
+    profiler = StartupProfiler(started_at=_STARTUP_T0, enabled=profile_startup)
+    profiler.mark("import")
+    app_logging.setup_logging(os.path.join(os.path.expanduser("~"), ".mic_mute_app"))
     root = tk.Tk()
-    app = MicMuteApp(root)
+    profiler.mark("Tk init")
+    app = MicMuteApp(root, profiler=profiler)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+"""Adaptive poll timing for when endpoint change notifications are unavailable.
+
+Without push notifications the only way to notice an external mute (another
+application, a keyboard mute key) is to read the state periodically.
+PollScheduler keeps the interval at fast_interval for fast_period ms after
+any activity (a toggle, a key press, a detected change), then stretches it
+by backoff on every poll up to idle_interval, which bounds the detection
+delay while idle. While paused (session locked, display off) it returns
+None: nobody can see the state, so there is nothing to poll for.
+
+idle is True while the interval is above fast_interval. A keyboard hook may
+read it on its own thread and post one wake-up to the UI thread when it is
+set, so a key press (possibly the mute key) brings polling back to the fast
+rate without waiting for the next slow tick.
+"""
+import time
+
+from metrics import REGISTRY
+
+_detection_window = REGISTRY.histogram(
+    "external_change_detection_seconds", "Upper bound on the delay before a polled external change was seen")
+_pauses = REGISTRY.counter("poll_pauses_total", "Times polling paused for a locked session or an off display")
+
+
+class PollScheduler:
+    """Chooses the delay before the next poll; intervals are in milliseconds."""
+
+    def __init__(self, fast_interval=100, idle_interval=2000, fast_period=3000, backoff=1.5, clock=time.monotonic):
+        self.backoff = backoff
+        self.clock = clock
+        self.configure(fast_interval, idle_interval, fast_period)
+        self.current = self.fast_interval
+        self.paused = False
+        self.idle = False
+        self.last_activity = clock()
+        self.last_poll = None
+        self.previous_poll = None
+        REGISTRY.gauge("poll_paused", "1 while polling is paused (session locked or display off)",
+                       function=lambda: int(self.paused))
+
+    def configure(self, fast_interval, idle_interval, fast_period):
+        self.fast_interval = fast_interval
+        self.idle_interval = max(fast_interval, idle_interval)
+        self.fast_period = fast_period
+
+    def note_activity(self):
+        """Poll fast for the next fast_period ms."""
+        self.last_activity = self.clock()
+        self.idle = False
+
+    def set_paused(self, paused):
+        """Pause or resume polling. Returns True when the state changed; resuming counts as activity."""
+        if paused == self.paused:
+            return False
+        self.paused = paused
+        if paused:
+            _pauses.inc()
+            self.idle = False
+        else:
+            self.note_activity()
+        return True
+
+    def poll_started(self):
+        self.previous_poll, self.last_poll = self.last_poll, self.clock()
+
+    def external_change(self):
+        """The last poll found a change made elsewhere: stay fast, and record how late it may have been seen."""
+        self.note_activity()
+        if self.previous_poll is not None:
+            _detection_window.record(self.last_poll - self.previous_poll)
+
+    def next_interval(self):
+        """Delay in ms before the next poll, or None while paused."""
+        if self.paused:
+            return None
+        if (self.clock() - self.last_activity) * 1000 < self.fast_period:
+            self.current = self.fast_interval
+        else:
+            self.current = min(self.idle_interval, self.current * self.backoff)
+        self.idle = self.current > self.fast_interval
+        return int(self.current)
@@ -0,0 +1,103 @@
+"""Retry policy and circuit breaker for audio backend calls.
+
+RetryPolicy spaces out the attempts inside one operation with exponential
+backoff and jitter. CircuitBreaker sits in front of the backend: after
+failure_threshold consecutive failures it opens and rejects calls without
+touching COM until reset_timeout has passed, then lets one trial call through
+(half-open). A failed trial re-opens it with the timeout doubled, up to
+max_reset_timeout, so an unplugged microphone costs a handful of activation
+attempts per minute instead of ten per second.
+"""
+import random
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter: delay(n) is base_delay * multiplier**n, capped, minus up to jitter of it."""
+
+    def __init__(self, attempts=3, base_delay=0.2, multiplier=2.0, max_delay=2.0, jitter=0.5, seed=None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def delay(self, attempt):
+        """Seconds to wait after the attempt-th failure (0-based)."""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        return delay * (1.0 - self.jitter * self._random.random())
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with exponentially growing open periods.
+
+    on_change(breaker) is called after every state change, on the thread that
+    recorded the outcome.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=1.0, max_reset_timeout=30.0,
+                 on_change=None, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.on_change = on_change
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self.retry_at = None
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go through now; an open breaker turns half-open once its timeout is up."""
+        with self._lock:
+            if self.state == CLOSED or self.state == HALF_OPEN:
+                return True
+            if self.clock() < self.retry_at:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+        self._changed()
+        return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state == CLOSED:
+                return
+            self.state = CLOSED
+            self.reset_timeout = self.base_reset_timeout
+            self.retry_at = None
+        self._changed()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+            elif self.state == OPEN or self.failures < self.failure_threshold:
+                return
+            self.state = OPEN
+            self.retry_at = self.clock() + self.reset_timeout
+        self._changed()
+
+    def describe(self):
+        """Short human-readable state for tooltips and logs."""
+        with self._lock:
+            state, retry_at, failures = self.state, self.retry_at, self.failures
+        if state == CLOSED:
+            return "OK"
+        if state == HALF_OPEN:
+            return "retrying now"
+        return f"{failures} failures, retry in {max(0.0, retry_at - self.clock()):.0f} s"
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change(self)
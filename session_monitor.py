@@ -0,0 +1,124 @@
+"""Session lock and display power state, so polling can pause while nobody is looking.
+
+On Windows, register(hwnd) subscribes a window to WM_WTSSESSION_CHANGE
+(lock/unlock) and to WM_POWERBROADCAST console display-state changes; the
+front end passes each native message to handle_native(). Front ends without
+access to native messages (Tkinter) call check_locked() on their poll tick
+instead, which tries to switch to the input desktop (that fails while the
+lock screen owns it). Elsewhere nothing is registered and the session always
+counts as active.
+"""
+import ctypes
+import sys
+
+from app_logging import get_logger
+
+log = get_logger("session")
+
+WM_WTSSESSION_CHANGE = 0x02B1
+WM_POWERBROADCAST = 0x0218
+WTS_SESSION_LOCK = 0x7
+WTS_SESSION_UNLOCK = 0x8
+PBT_POWERSETTINGCHANGE = 0x8013
+NOTIFY_FOR_THIS_SESSION = 0
+DEVICE_NOTIFY_WINDOW_HANDLE = 0
+DESKTOP_SWITCHDESKTOP = 0x0100
+
+
+class _GUID(ctypes.Structure):
+    _fields_ = [("Data1", ctypes.c_uint32), ("Data2", ctypes.c_uint16), ("Data3", ctypes.c_uint16),
+                ("Data4", ctypes.c_ubyte * 8)]
+
+
+class _POWERBROADCAST_SETTING(ctypes.Structure):
+    _fields_ = [("PowerSetting", _GUID), ("DataLength", ctypes.c_uint32), ("Data", ctypes.c_uint32)]
+
+
+class _MSG(ctypes.Structure):
+    _fields_ = [("hwnd", ctypes.c_void_p), ("message", ctypes.c_uint), ("wParam", ctypes.c_size_t),
+                ("lParam", ctypes.c_ssize_t)]
+
+
+# GUID_CONSOLE_DISPLAY_STATE {6FE69556-704A-47A0-8F24-C28D936FDA47}: Data is 0 off, 1 on, 2 dimmed
+GUID_CONSOLE_DISPLAY_STATE = bytes(_GUID(0x6FE69556, 0x704A, 0x47A0,
+                                         (ctypes.c_ubyte * 8)(0x8F, 0x24, 0xC2, 0x8D, 0x93, 0x6F, 0xDA, 0x47)))
+
+
+class SessionMonitor:
+    """Tracks whether the session is locked or the display is off; paused is either."""
+
+    def __init__(self):
+        self.locked = False
+        self.display_off = False
+        self.registered = False
+        self._hwnd = None
+        self._power_notification = None
+
+    @property
+    def paused(self):
+        return self.locked or self.display_off
+
+    def register(self, hwnd):
+        """Subscribe hwnd to lock and display notifications. Returns False where unsupported."""
+        if sys.platform != "win32" or self.registered:
+            return self.registered
+        try:
+            user32 = ctypes.windll.user32
+            if not ctypes.windll.wtsapi32.WTSRegisterSessionNotification(ctypes.c_void_p(hwnd), NOTIFY_FOR_THIS_SESSION):
+                raise ctypes.WinError()
+            user32.RegisterPowerSettingNotification.restype = ctypes.c_void_p
+            guid = _GUID.from_buffer_copy(GUID_CONSOLE_DISPLAY_STATE)
+            self._power_notification = user32.RegisterPowerSettingNotification(
+                ctypes.c_void_p(hwnd), ctypes.byref(guid), DEVICE_NOTIFY_WINDOW_HANDLE)
+        except (AttributeError, OSError) as e:
+            log.warning(f"Session notifications unavailable: {str(e)}")
+            return False
+        self._hwnd = hwnd
+        self.registered = True
+        return True
+
+    def unregister(self):
+        if not self.registered:
+            return
+        try:
+            ctypes.windll.wtsapi32.WTSUnRegisterSessionNotification(ctypes.c_void_p(self._hwnd))
+            if self._power_notification:
+                ctypes.windll.user32.UnregisterPowerSettingNotification(ctypes.c_void_p(self._power_notification))
+        except (AttributeError, OSError) as e:
+            log.warning(f"Failed to unregister session notifications: {str(e)}")
+        self._power_notification = None
+        self.registered = False
+
+    def handle_native(self, address):
+        """Inspect a native MSG at address. Returns True when paused changed."""
+        message = _MSG.from_address(address)
+        return self.handle_message(message.message, message.wParam, message.lParam)
+
+    def handle_message(self, message, wparam, lparam):
+        """Update from one window message. Returns True when paused changed."""
+        was_paused = self.paused
+        if message == WM_WTSSESSION_CHANGE:
+            if wparam == WTS_SESSION_LOCK:
+                self.locked = True
+            elif wparam == WTS_SESSION_UNLOCK:
+                self.locked = False
+        elif message == WM_POWERBROADCAST and wparam == PBT_POWERSETTINGCHANGE and lparam:
+            setting = _POWERBROADCAST_SETTING.from_address(lparam)
+            if bytes(setting.PowerSetting) == GUID_CONSOLE_DISPLAY_STATE:
+                self.display_off = setting.Data == 0
+        return self.paused != was_paused
+
+    def check_locked(self):
+        """Poll the lock state without notifications. Returns True when paused changed."""
+        if sys.platform != "win32":
+            return False
+        was_paused = self.paused
+        user32 = ctypes.windll.user32
+        user32.OpenInputDesktop.restype = ctypes.c_void_p
+        desktop = user32.OpenInputDesktop(0, False, DESKTOP_SWITCHDESKTOP)
+        if desktop:
+            self.locked = not user32.SwitchDesktop(ctypes.c_void_p(desktop))
+            user32.CloseDesktop(ctypes.c_void_p(desktop))
+        else:
+            self.locked = True
+        return self.paused != was_paused
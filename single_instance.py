@@ -0,0 +1,91 @@
+"""Single-instance guard with hand-off to the running instance.
+
+The first instance takes a per-user lock (a named mutex on Windows, an
+flock()ed lock file elsewhere) and serves commands on a local endpoint. A
+later launch fails to take the lock, forwards its command ("show", "toggle")
+over that endpoint and exits, instead of scanning the process list and killing
+the running copy.
+"""
+import os
+import sys
+
+import local_ipc
+from app_logging import get_logger
+
+log = get_logger("instance")
+
+_ERROR_ALREADY_EXISTS = 183
+
+
+class SingleInstance:
+    """Per-user lock for name; the lock and the command endpoint are both O(1) to check."""
+
+    def __init__(self, name, directory):
+        self.name = name
+        self.directory = directory
+        self.address = local_ipc.default_address(name, directory)
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        self.acquired = False
+        self._handle = None
+
+    def acquire(self):
+        """Try to become the primary instance. Returns False if another instance holds the lock."""
+        if self.acquired:
+            return True
+        if sys.platform == "win32":
+            self.acquired = self._acquire_mutex()
+        else:
+            self.acquired = self._acquire_lock_file()
+        return self.acquired
+
+    def _acquire_mutex(self):
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateMutexW.restype = wintypes.HANDLE
+        kernel32.CreateMutexW.argtypes = (wintypes.LPVOID, wintypes.BOOL, wintypes.LPCWSTR)
+        user = os.environ.get("USERNAME", "user")
+        handle = kernel32.CreateMutexW(None, False, f"Local\\{self.name}-{user}")
+        if not handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        if ctypes.get_last_error() == _ERROR_ALREADY_EXISTS:
+            kernel32.CloseHandle(handle)
+            return False
+        self._handle = handle
+        return True
+
+    def _acquire_lock_file(self):
+        import fcntl
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._handle = lock_file
+        return True
+
+    def release(self):
+        """Give up the lock; the operating system also drops it when the process dies."""
+        if not self.acquired:
+            return
+        if sys.platform == "win32":
+            import ctypes
+            ctypes.windll.kernel32.CloseHandle(self._handle)
+        else:
+            self._handle.close()
+        self._handle = None
+        self.acquired = False
+
+    def forward(self, command, timeout=2.0):
+        """Send command to the primary instance. Returns its reply, or None if it did not answer."""
+        try:
+            return local_ipc.request(self.address, {"cmd": command}, timeout)
+        except (OSError, ValueError) as e:
+            log.error(f"Running instance did not answer '{command}': {str(e)}")
+            return None
@@ -0,0 +1,183 @@
+"""Pre-decoded mute/unmute feedback sounds.
+
+SoundBank decodes every configured sound into memory on a background thread
+(at startup and whenever sounds are re-applied) so that playing one is a
+buffer hand-off with no disk access or decoding. Playback goes through a
+SoundSink: PygameSoundSink reserves a dedicated mixer channel so feedback
+never has to stop other sounds, while NullSoundSink and RecordingSoundSink
+let the app run headless.
+"""
+import os
+import threading
+import time
+
+from metrics import REGISTRY
+from app_logging import get_logger
+
+log = get_logger("sound")
+
+
+class SoundSink:
+    """Output device for decoded sounds."""
+    available = False
+
+    def open(self):
+        """Prepare the output. Returns False (and stays unavailable) on failure."""
+        return self.available
+
+    def close(self):
+        pass
+
+    def decode(self, path):
+        """Decode the file at path into a resident buffer."""
+        raise NotImplementedError
+
+    def play(self, buffer):
+        """Start playing a decoded buffer, replacing whatever the feedback channel is playing."""
+        raise NotImplementedError
+
+    def output_latency(self):
+        """Seconds between play() returning and the first sample reaching the device."""
+        return 0.0
+
+
+class PygameSoundSink(SoundSink):
+    """pygame mixer output on a reserved channel."""
+
+    def __init__(self, frequency=44100, buffer=512):
+        self.frequency = frequency
+        self.buffer = buffer
+        self.channel = None
+
+    def open(self):
+        import pygame
+        try:
+            # A small mixer buffer keeps trigger-to-first-sample latency low
+            pygame.mixer.pre_init(self.frequency, -16, 2, self.buffer)
+            pygame.mixer.init()
+            pygame.mixer.set_reserved(1)
+            self.channel = pygame.mixer.Channel(0)
+            self.available = True
+            log.info("Pygame mixer initialized successfully")
+        except pygame.error as e:
+            log.warning(f"Failed to initialize pygame mixer: {str(e)}. Sound feedback will be disabled.")
+            self.available = False
+        return self.available
+
+    def close(self):
+        if self.available:
+            import pygame
+            pygame.mixer.quit()
+        self.available = False
+        self.channel = None
+
+    def decode(self, path):
+        import pygame
+        return pygame.mixer.Sound(path)
+
+    def play(self, buffer):
+        self.channel.play(buffer)
+
+    def output_latency(self):
+        import pygame
+        init = pygame.mixer.get_init()
+        frequency = init[0] if init else self.frequency
+        return self.buffer / float(frequency)
+
+
+class NullSoundSink(SoundSink):
+    """Discards all sounds; used when there is no audio output."""
+    available = True
+
+    def decode(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def play(self, buffer):
+        pass
+
+
+class RecordingSoundSink(NullSoundSink):
+    """Records every played buffer with a timestamp, for headless runs and tests."""
+
+    def __init__(self):
+        self.played = []
+
+    def play(self, buffer):
+        self.played.append((time.perf_counter(), buffer))
+
+
+class SoundBank:
+    """Keeps decoded feedback sounds resident and plays them by name."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.buffers = {}
+        self.latency = REGISTRY.histogram("sound_latency_seconds", "Sound trigger-to-first-sample latency")
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._loader = None
+
+    def open(self):
+        return self.sink.open()
+
+    def close(self):
+        self.sink.close()
+        self.buffers = {}
+
+    @property
+    def available(self):
+        return self.sink.available
+
+    def load(self, paths, wait=False):
+        """Decode {name: path} on a background thread and swap them in once ready.
+
+        Empty or missing paths unload that name. Returns the loader thread.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        loader = threading.Thread(target=self._load, args=(dict(paths), generation), name="SoundBankLoader", daemon=True)
+        self._loader = loader
+        loader.start()
+        if wait:
+            loader.join()
+        return loader
+
+    def wait_until_loaded(self, timeout=None):
+        loader = self._loader
+        if loader is not None:
+            loader.join(timeout)
+
+    def _load(self, paths, generation):
+        buffers = {}
+        for name, path in paths.items():
+            if not path or not self.sink.available:
+                continue
+            if not os.path.exists(path):
+                log.warning(f"{name.capitalize()} sound file {path} not found")
+                continue
+            try:
+                buffers[name] = self.sink.decode(path)
+                log.info(f"{name.capitalize()} sound loaded from: {path}")
+            except Exception as e:
+                log.error(f"Failed to load {name} sound file: {str(e)}")
+        with self._lock:
+            # A newer load() superseded this one while it was decoding
+            if generation == self._generation:
+                self.buffers = buffers
+
+    def play(self, name, triggered_at=None):
+        """Play a resident sound. Returns False if it is not loaded or playback failed."""
+        buffer = self.buffers.get(name)
+        if buffer is None or not self.sink.available:
+            return False
+        if triggered_at is None:
+            triggered_at = time.perf_counter()
+        try:
+            self.sink.play(buffer)
+        except Exception as e:
+            log.error(f"Failed to play {name} sound: {str(e)}")
+            return False
+        self.latency.record(time.perf_counter() - triggered_at + self.sink.output_latency())
+        return True
@@ -0,0 +1,51 @@
+"""Per-phase startup timing for the --startup-profile command-line option.
+
+The front ends mark each startup phase as it finishes; phases that run on
+another thread (e.g. COM initialization on the audio worker) are recorded with
+their own duration. The report is logged once, when the first mute state
+arrives, so it covers the whole time-to-ready on logon.
+"""
+import time
+
+from app_logging import get_logger
+
+log = get_logger("startup")
+
+
+class StartupProfiler:
+    """Collects (phase, seconds, elapsed-at-end) entries relative to a start time."""
+
+    def __init__(self, started_at=None, enabled=True):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.enabled = enabled
+        self.phases = []
+        self.reported = False
+        self._last = self.started_at
+
+    def mark(self, phase):
+        """End the phase that started at the previous mark (or at started_at)."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last, now - self.started_at))
+        self._last = now
+
+    def record(self, phase, seconds):
+        """Add a phase measured elsewhere, typically on another thread."""
+        self.phases.append((phase, seconds, None))
+
+    def total(self):
+        return time.perf_counter() - self.started_at
+
+    def format_report(self):
+        lines = ["Startup profile:"]
+        for phase, seconds, elapsed in self.phases:
+            at = f"t={elapsed * 1000:.1f} ms" if elapsed is not None else "concurrent"
+            lines.append(f"  {phase:<24}{seconds * 1000:9.1f} ms  ({at})")
+        return "\n".join(lines)
+
+    def report(self):
+        """Log the breakdown once; later calls do nothing."""
+        if self.reported:
+            return
+        self.reported = True
+        if self.enabled:
+            log.info("%s", self.format_report())